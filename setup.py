@@ -22,6 +22,7 @@ setuptools.setup(
         "uniswapV3Python.src",
         "uniswapV3Python.src.libraries",
         "uniswapV3Python.tests",
+        "uniswapV3Python.benchmarks",
     ],
     python_requires=">=3.7",
 )
@@ -0,0 +1,52 @@
+# Throughput of replaying an event file through a pool, in events per second, for files of growing size. The
+# events are recorded from a simulated history of mints, swaps back and forth and burns, and replayed through a new
+# pool. The replay streams the file, so the memory used doesn't grow with the number of events.
+#
+# Usage: python -m uniswapV3Python.benchmarks.eventReplay
+import os, sys, tempfile
+
+from .utilities import *
+from ..src.libraries import EventReplay
+
+EVENT_COUNTS = [1000, 10000, 50000]
+
+
+# Records a history of about `numEvents` events to an event file
+def recordHistory(path, numEvents):
+    ledger, accounts = createLedger()
+    pool = UniswapPool(BENCH_TOKENS[0], BENCH_TOKENS[1], 3000, 60, ledger)
+    pool.initialize(ONE_TO_ONE_SQRT_PRICE)
+    events = []
+    pool.events.subscribe(events.append)
+    pool.mint(accounts[0], -887220, 887220, 10**21)
+    for i in range(numEvents // 4):
+        tick = (i % 50 - 25) * 60
+        pool.mint(accounts[0], tick - 600, tick + 600, 10**18)
+        pool.swap(accounts[1], True, 10**17, TickMath.MIN_SQRT_RATIO + 1)
+        pool.swap(accounts[1], False, 10**17, TickMath.MAX_SQRT_RATIO - 1)
+        pool.burn(accounts[0], tick - 600, tick + 600, 10**18)
+    EventReplay.writeEvents(path, events, ONE_TO_ONE_SQRT_PRICE)
+
+
+def benchmarkReplay(numEvents):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "events.jsonl")
+        recordHistory(path, numEvents)
+        ledger, _ = createLedger()
+        pool = UniswapPool(BENCH_TOKENS[0], BENCH_TOKENS[1], 3000, 60, ledger)
+        return EventReplay.replay(pool, path)
+
+
+def main(eventCounts=EVENT_COUNTS):
+    print("{:>12} {:>16} {:>14}".format("events", "events/s", "divergences"))
+    for numEvents in eventCounts:
+        report = benchmarkReplay(numEvents)
+        print(
+            "{:>12} {:>16.0f} {:>14}".format(
+                report.events, report.eventsPerSecond, report.divergenceCount
+            )
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or EVENT_COUNTS)
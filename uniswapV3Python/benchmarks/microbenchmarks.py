@@ -0,0 +1,280 @@
+# Microbenchmarks of the hot math and storage functions, run on fixed input corpora taken from the test vectors of
+# test_tickMath, test_SqrtPriceMath, test_swapMath and test_tick, and compared against a committed baseline. The run
+# fails (exit code 1) if any function is slower than the baseline by more than the threshold.
+# Times are compared relative to a calibration loop of plain Python integer arithmetic timed alongside every function,
+# so a baseline recorded on one machine can gate runs on another. Each time is the best of several rounds, to filter
+# out noise.
+#
+# Usage: python -m uniswapV3Python.benchmarks.microbenchmarks [--threshold 0.25] [--update-baseline]
+import argparse, json, os, platform, sys, timeit
+
+from .utilities import *
+from ..src.libraries import FullMath, SqrtPriceMath, SwapMath, Tick, Position
+from ..src.libraries.Position import PositionInfo
+from ..tests.utilities import encodePriceSqrt, expandTo18Decimals
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "microbenchmarks.json")
+# Maximum slowdown relative to the baseline, 0.25 = 25% slower
+THRESHOLD = 0.25
+ROUNDS = 30
+# Seconds
+MEASUREMENT_TIME = 0.02
+# Runs of the functions slower than the threshold to confirm a regression, and of all of them to record the baseline
+RETRIES = 2
+
+
+# test_tickMath
+TICKS = [
+    sign * absTick
+    for absTick in [50, 100, 250, 500, 1_000, 2_500, 3_000, 4_000, 5_000, 50_000]
+    + [150_000, 250_000, 500_000, 738_203]
+    for sign in [-1, 1]
+]
+SQRT_RATIOS = [
+    MIN_SQRT_RATIO,
+    encodePriceSqrt(10**12, 1),
+    encodePriceSqrt(10**6, 1),
+    encodePriceSqrt(1, 64),
+    encodePriceSqrt(1, 8),
+    encodePriceSqrt(1, 2),
+    encodePriceSqrt(1, 1),
+    encodePriceSqrt(2, 1),
+    encodePriceSqrt(8, 1),
+    encodePriceSqrt(64, 1),
+    encodePriceSqrt(1, 10**6),
+    encodePriceSqrt(1, 10**12),
+    MAX_SQRT_RATIO - 1,
+]
+
+# test_swapMath: (sqrtRatioCurrentX96, sqrtRatioTargetX96, liquidity, amountRemaining, feePips)
+SWAP_STEPS = [
+    (
+        encodePriceSqrt(1, 1),
+        encodePriceSqrt(101, 100),
+        expandTo18Decimals(2),
+        expandTo18Decimals(1),
+        600,
+    ),
+    (
+        encodePriceSqrt(1, 1),
+        encodePriceSqrt(101, 100),
+        expandTo18Decimals(2),
+        -expandTo18Decimals(1),
+        600,
+    ),
+    (
+        encodePriceSqrt(1, 1),
+        encodePriceSqrt(1000, 100),
+        expandTo18Decimals(2),
+        expandTo18Decimals(1),
+        600,
+    ),
+    (
+        encodePriceSqrt(1, 1),
+        encodePriceSqrt(1000, 100),
+        expandTo18Decimals(2),
+        -expandTo18Decimals(1),
+        600,
+    ),
+    (
+        417332158212080721273783715441582,
+        1452870262520218020823638996,
+        159344665391607089467575320103,
+        -1,
+        1,
+    ),
+    (2, 1, 1, 3915081100057732413702495386755767, 1),
+    (2413, 79887613182836312, 1985041575832132834610021537970, 10, 1872),
+    (
+        20282409603651670423947251286016,
+        20282409603651670423947251286016 * 11 // 10,
+        1024,
+        -4,
+        3000,
+    ),
+]
+
+# test_SqrtPriceMath: (sqrtPX96, liquidity, amountIn, zeroForOne)
+NEXT_PRICES_FROM_INPUT = [
+    (2**96, expandTo18Decimals(1) // 10, 0, True),
+    (encodePriceSqrt(1, 1), expandTo18Decimals(1), expandTo18Decimals(1) // 10, False),
+    (encodePriceSqrt(1, 1), expandTo18Decimals(1), expandTo18Decimals(1) // 10, True),
+    (encodePriceSqrt(1, 1), expandTo18Decimals(10), 2**100, True),
+    (encodePriceSqrt(1, 1), 1, MAX_UINT256 // 2, True),
+]
+
+# Products and denominators computed in the swap steps and position updates above
+MUL_DIVS = [
+    (encodePriceSqrt(1, 1), expandTo18Decimals(2), 2**96),
+    (2**128 - 1, 2**128 - 1, 2**128),
+    (MAX_UINT256 // 3, 2**96, MAX_UINT256 // 7),
+    (expandTo18Decimals(1), 999400, 1000000),
+    (1452870262520218020823638996, 159344665391607089467575320103, 2**96),
+]
+
+
+# Runs the function on every input of the corpus, with fresh mutable state for the storage functions
+def getBenchmarks():
+    # test_tick: crossing twice is a no op, so the state is the same after every call of the corpus
+    tickMapping = {2: TickInfo(3, 4, 1, 2), -2: TickInfo(3, -4, 5, 6)}
+    crosses = [(tickMapping, 2, 7, 9), (tickMapping, -2, 7, 9)] * 2
+
+    # Mint, accrue fees and burn, so the position liquidity is the same after every call of the corpus
+    position = PositionInfo(0, 0, 0, 0, 0)
+    updates = [
+        (position, expandTo18Decimals(1), 0, 0),
+        (position, 0, 2**128, 2**129),
+        (position, -expandTo18Decimals(1), 2**129, 2**130),
+        (position, 0, 0, 0),
+    ]
+
+    return {
+        "TickMath.getSqrtRatioAtTick": (
+            TickMath.getSqrtRatioAtTick,
+            [(tick,) for tick in TICKS],
+        ),
+        "TickMath.getTickAtSqrtRatio": (
+            TickMath.getTickAtSqrtRatio,
+            [(ratio,) for ratio in SQRT_RATIOS],
+        ),
+        "SwapMath.computeSwapStep": (SwapMath.computeSwapStep, SWAP_STEPS),
+        "SqrtPriceMath.getNextSqrtPriceFromInput": (
+            SqrtPriceMath.getNextSqrtPriceFromInput,
+            NEXT_PRICES_FROM_INPUT,
+        ),
+        "FullMath.mulDiv": (FullMath.mulDiv, MUL_DIVS),
+        "Tick.cross": (Tick.cross, crosses),
+        "Position.update": (Position.update, updates),
+    }
+
+
+# Plain Python integer arithmetic, similar to the work done by the math libraries
+def calibrationLoop():
+    value = 2**160 + 12345
+    for i in range(1, 200):
+        value = (value * (2**96 + i)) // (2**96 - i) + (value >> 7)
+    return value
+
+
+# Time of a calibration loop call and of a call of the function on each input of the corpus, in nanoseconds. The
+# rounds alternate between timing both of them, so a slower machine or a noisy neighbour affect them alike, and the
+# best time of each is kept.
+def timeCorpus(fcn, corpus, rounds=ROUNDS):
+    def runCorpus():
+        for args in corpus:
+            fcn(*args)
+
+    timers = [timeit.Timer(calibrationLoop), timeit.Timer(runCorpus)]
+    # Enough calls for every measurement to take about MEASUREMENT_TIME
+    numbers = [
+        max(int(MEASUREMENT_TIME / (timer.timeit(1) or 1e-9)), 1) for timer in timers
+    ]
+    best = [float("inf"), float("inf")]
+    for _ in range(rounds):
+        for (i, timer) in enumerate(timers):
+            best[i] = min(best[i], timer.timeit(numbers[i]) / numbers[i])
+    return (best[0] * 1e9, best[1] / len(corpus) * 1e9)
+
+
+# Time of every function in calibration loops, and in nanoseconds for reference
+# @param names The functions to run, all of them by default
+def runBenchmarks(rounds=ROUNDS, names=None):
+    results = {}
+    for (name, (fcn, corpus)) in getBenchmarks().items():
+        if names is None or name in names:
+            (calibration, time) = timeCorpus(fcn, corpus, rounds)
+            results[name] = {"ns": time, "relative": time / calibration}
+    return results
+
+
+# Runs the functions again, keeping the best time of each
+def rerunBenchmarks(results, names, rounds=ROUNDS):
+    for (name, result) in runBenchmarks(rounds, names).items():
+        if result["relative"] < results[name]["relative"]:
+            results[name] = result
+
+
+# Slowdown of every function relative to the baseline, on the times relative to the calibration loop
+# @return dict of name => (baseline time, current time, change)
+def compare(baseline, results):
+    comparison = {}
+    for (name, result) in results.items():
+        if name not in baseline["results"]:
+            continue
+        baselineTime = baseline["results"][name]["relative"]
+        comparison[name] = (
+            baselineTime,
+            result["relative"],
+            result["relative"] / baselineTime - 1,
+        )
+    return comparison
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Microbenchmarks regression gate")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="record the current times as the new baseline",
+    )
+    options = parser.parse_args(args)
+
+    results = runBenchmarks(options.rounds)
+
+    if options.update_baseline:
+        for _ in range(RETRIES):
+            rerunBenchmarks(results, results, options.rounds)
+        baseline = {
+            "python": platform.python_version(),
+            "validationLevel": getValidationLevel(),
+            "results": results,
+        }
+        with open(options.baseline, "w") as file:
+            file.write(json.dumps(baseline, indent=2) + "\n")
+        print("Baseline written to " + options.baseline)
+        return 0
+
+    with open(options.baseline) as file:
+        baseline = json.load(file)
+    if baseline["validationLevel"] != getValidationLevel():
+        print("Baseline recorded with validation level " + baseline["validationLevel"])
+        return 2
+    # Confirm the regressions on new runs, so a burst of noise doesn't fail the gate
+    for _ in range(RETRIES):
+        slower = [
+            name
+            for (name, (_, _, change)) in compare(baseline, results).items()
+            if change > options.threshold
+        ]
+        if not slower:
+            break
+        rerunBenchmarks(results, slower, options.rounds)
+
+    print(
+        "{:<42} {:>14} {:>14} {:>9}".format("function", "baseline", "current", "change")
+    )
+    regressions = []
+    for (name, (baselineTime, time, change)) in compare(baseline, results).items():
+        print(
+            "{:<42} {:>14.4f} {:>14.4f} {:>+8.1f}%".format(
+                name, baselineTime, time, change * 100
+            )
+        )
+        if change > options.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(
+            "Slower than the baseline by more than {:.0f}%: {}".format(
+                options.threshold * 100, ", ".join(regressions)
+            )
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
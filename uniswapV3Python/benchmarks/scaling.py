@@ -0,0 +1,139 @@
+# Latency of the pool operations and memory of the pool state as the pool grows, for every fee tier enabled in the
+# Factory. Two sweeps are run: the number of initialized ticks (with one position per pair of ticks) and the number
+# of positions (over a fixed number of ticks, or two ticks per position when there are fewer positions than pairs of
+# ticks). The counts the pools were built with are reported along with the requested ones. For each pool it measures
+# swaps that stay within the current tick range and swaps crossing CROSSED_TICKS initialized ticks, their quotes, and
+# a mint, burn and collect of a position in range. The results are written as JSON to track regressions across
+# releases.
+#
+# Usage: python -m uniswapV3Python.benchmarks.scaling [--output results.json] [--quick]
+import argparse, json, platform, sys, tracemalloc
+
+from .utilities import *
+from ..src.libraries.Factory import Factory
+
+TICK_COUNTS = [10, 100, 1000, 10000, 100000, 1000000]
+POSITION_COUNTS = [1, 100, 1000, 10000, 100000]
+# Initialized ticks of the pools of the position sweep
+POSITION_SWEEP_TICKS = 1000
+QUICK_TICK_COUNTS = [10, 1000, 10000]
+QUICK_POSITION_COUNTS = [1, 1000]
+CROSSED_TICKS = 10
+ITERATIONS = 100
+
+
+# Build the pool, measuring the memory allocated for it in bytes
+def buildPool(numTicks, numPositions, fee):
+    tracemalloc.start()
+    pool, accounts = createPoolWithState(numTicks, numPositions, fee)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return pool, accounts, memory
+
+
+def benchmarkPool(numTicks, numPositions, fee, iterations=ITERATIONS):
+    pool, accounts, memory = buildPool(numTicks, numPositions, fee)
+    tickSpacing = pool.tickSpacing
+    (ticks, positions) = (len(pool.ticks), len(pool.positions))
+
+    # The nearest initialized ticks are at -tickSpacing and tickSpacing, so the small swaps cross none
+    sqrtPriceSmall = TickMath.getSqrtRatioAtTick(-tickSpacing // 2)
+    crossedTicks = min(CROSSED_TICKS, ticks // 2)
+    sqrtPriceCrossing = TickMath.getSqrtRatioAtTick(-crossedTicks * tickSpacing - 1)
+
+    # Swap back and forth so the pool state is the same on every iteration, each round trip is two swaps
+    def swapRoundTrip(sqrtPriceLimitX96):
+        pool.swap(accounts[1], True, MAX_INT128, sqrtPriceLimitX96)
+        pool.swap(accounts[1], False, MAX_INT128, ONE_TO_ONE_SQRT_PRICE)
+
+    latencies = {
+        "swapSmall": timeCall(lambda: swapRoundTrip(sqrtPriceSmall), iterations) / 2,
+        "swapCrossing": timeCall(lambda: swapRoundTrip(sqrtPriceCrossing), iterations)
+        / 2,
+        "quoteSmall": timeCall(
+            lambda: pool.quoteSwap(True, MAX_INT128, sqrtPriceSmall), iterations
+        ),
+        "quoteCrossing": timeCall(
+            lambda: pool.quoteSwap(True, MAX_INT128, sqrtPriceCrossing), iterations
+        ),
+    }
+
+    # Mint, burn and collect the same position in range, timing each of them
+    elapsed = {"mint": 0, "burn": 0, "collect": 0}
+    (tickLower, tickUpper) = (-2 * tickSpacing, 2 * tickSpacing)
+    calls = [
+        ("mint", pool.mint, (tickLower, tickUpper, 10**18)),
+        ("burn", pool.burn, (tickLower, tickUpper, 10**18)),
+        ("collect", pool.collect, (tickLower, tickUpper, MAX_UINT128, MAX_UINT128)),
+    ]
+    for _ in range(iterations):
+        for (name, fcn, args) in calls:
+            start = time.perf_counter()
+            fcn(accounts[0], *args)
+            elapsed[name] += time.perf_counter() - start
+    for (name, total) in elapsed.items():
+        latencies[name] = total / iterations * 1e6
+
+    return {
+        "fee": fee,
+        "tickSpacing": tickSpacing,
+        "requestedTicks": numTicks,
+        "requestedPositions": numPositions,
+        "ticks": ticks,
+        "positions": positions,
+        "crossedTicks": crossedTicks,
+        "memoryBytes": memory,
+        "latencyUs": latencies,
+    }
+
+
+def runSweeps(tickCounts, positionCounts, iterations=ITERATIONS):
+    results = []
+    for fee in Factory().feeAmountTickSpacing:
+        for numTicks in tickCounts:
+            results.append(
+                dict(
+                    sweep="ticks",
+                    **benchmarkPool(numTicks, max(numTicks // 2, 1), fee, iterations),
+                )
+            )
+        for numPositions in positionCounts:
+            results.append(
+                dict(
+                    sweep="positions",
+                    **benchmarkPool(
+                        POSITION_SWEEP_TICKS, numPositions, fee, iterations
+                    ),
+                )
+            )
+    return results
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Pool scaling benchmarks")
+    parser.add_argument("--output", help="JSON file to write, stdout by default")
+    parser.add_argument("--quick", action="store_true", help="run smaller sweeps")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    options = parser.parse_args(args)
+
+    tickCounts = QUICK_TICK_COUNTS if options.quick else TICK_COUNTS
+    positionCounts = QUICK_POSITION_COUNTS if options.quick else POSITION_COUNTS
+    report = {
+        "benchmark": "scaling",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "validationLevel": getValidationLevel(),
+        "iterations": options.iterations,
+        "results": runSweeps(tickCounts, positionCounts, options.iterations),
+    }
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
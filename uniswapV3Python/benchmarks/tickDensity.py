@@ -0,0 +1,36 @@
+# Swap latency as a function of the number of initialized ticks in the pool.
+# The cost of finding the next initialized tick should not depend on the tick density, so the latency of a swap
+# that crosses a fixed number of ticks should stay flat as the number of initialized ticks grows.
+#
+# Usage: python -m uniswapV3Python.benchmarks.tickDensity
+import sys
+
+from .utilities import *
+
+TICK_COUNTS = [10, 100, 1000, 10000, 50000]
+ITERATIONS = 200
+
+
+def benchmarkSwap(numTicks, iterations=ITERATIONS):
+    pool, accounts = createPoolWithTicks(numTicks)
+    tickSpacing = pool.tickSpacing
+    # Swap back and forth across ~3 initialized ticks so the pool state is the same on every iteration
+    sqrtPriceLow = TickMath.getSqrtRatioAtTick(-3 * tickSpacing + 1)
+    sqrtPriceHigh = ONE_TO_ONE_SQRT_PRICE
+
+    def swapRoundTrip():
+        pool.swap(accounts[1], True, MAX_INT128, sqrtPriceLow)
+        pool.swap(accounts[1], False, MAX_INT128, sqrtPriceHigh)
+
+    # Each round trip consists of two swaps
+    return timeCall(swapRoundTrip, iterations) / 2
+
+
+def main(tickCounts=TICK_COUNTS):
+    print("{:>12} {:>16}".format("ticks", "swap (us)"))
+    for numTicks in tickCounts:
+        print("{:>12} {:>16.1f}".format(numTicks, benchmarkSwap(numTicks)))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or TICK_COUNTS)
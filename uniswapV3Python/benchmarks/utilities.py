@@ -0,0 +1,153 @@
+import time
+
+from ..src.UniswapPool import *
+from ..src.libraries.Account import Ledger
+from ..src.libraries import PoolSnapshot
+from ..src.libraries.Position import PositionInfo
+
+BENCH_TOKENS = ["Token0", "Token1"]
+
+# Same tick spacings as the ones enabled by default in the Factory
+TICK_SPACINGS = {500: 10, 3000: 60, 10000: 200}
+
+ONE_TO_ONE_SQRT_PRICE = 2**96
+
+
+def createLedger(numAccounts=2):
+    accounts = [
+        ["ACCOUNT" + str(i), BENCH_TOKENS, [MAX_INT256 // 1000, MAX_INT256 // 1000]]
+        for i in range(numAccounts)
+    ]
+    ledger = Ledger(accounts)
+    return ledger, list(ledger.accounts.keys())
+
+
+# Create a pool at a 1:1 price with `numTicks` consecutive initialized ticks centered around the current price,
+# plus a full range position so there is always liquidity in range.
+def createPoolWithTicks(numTicks, fee=3000, liquidityPerPosition=10**18):
+    ledger, accounts = createLedger()
+    tickSpacing = TICK_SPACINGS[fee]
+    pool = UniswapPool(BENCH_TOKENS[0], BENCH_TOKENS[1], fee, tickSpacing, ledger)
+    pool.initialize(ONE_TO_ONE_SQRT_PRICE)
+
+    minTick = -(MAX_TICK // tickSpacing) * tickSpacing
+    maxTick = (MAX_TICK // tickSpacing) * tickSpacing
+    pool.mint(accounts[0], minTick, maxTick, liquidityPerPosition)
+
+    # Consecutive positions share their boundary ticks, so n positions initialize n + 1 ticks
+    firstTick = max(-(numTicks // 2) * tickSpacing, minTick + tickSpacing)
+    for i in range(max(numTicks - 1, 1)):
+        tickLower = firstTick + i * tickSpacing
+        tickUpper = tickLower + tickSpacing
+        if tickUpper >= maxTick:
+            break
+        pool.mint(accounts[0], tickLower, tickUpper, liquidityPerPosition)
+
+    return pool, accounts
+
+
+# Create a pool at a 1:1 price with `numTicks` initialized ticks and `numPositions` positions, building its state
+# directly instead of minting every position, so pools with hundreds of thousands of ticks are built in seconds.
+# The ticks are the bounds of nested ranges centered around the current price, [-i, i] * tickSpacing, all of them in
+# range. Every range needs a position for its ticks to be initialized, so there are at most two ticks per position, and
+# the positions beyond one per range are spread over the ranges with other owners. The number of ticks is also limited
+# by the tick range of the tick spacing, so it can be lower than requested, but the number of positions is always the
+# requested one.
+def createPoolWithState(
+    numTicks, numPositions, fee=3000, liquidityPerPosition=10**18
+):
+    ledger, accounts = createLedger()
+    tickSpacing = TICK_SPACINGS[fee]
+    assert numPositions >= 1
+    numRanges = max(min(numTicks // 2, MAX_TICK // tickSpacing, numPositions), 1)
+
+    positions = {}
+    positionsPerRange = [0] * numRanges
+    for i in range(numPositions):
+        rangeIndex = i % numRanges
+        tick = (rangeIndex + 1) * tickSpacing
+        positions[("POSITION" + str(i // numRanges), -tick, tick)] = PositionInfo(
+            liquidityPerPosition, 0, 0, 0, 0
+        )
+        positionsPerRange[rangeIndex] += 1
+
+    ticks = {}
+    tickBitmap = {}
+    for rangeIndex in range(numRanges):
+        liquidity = positionsPerRange[rangeIndex] * liquidityPerPosition
+        tick = (rangeIndex + 1) * tickSpacing
+        for (boundary, liquidityNet) in [(-tick, liquidity), (tick, -liquidity)]:
+            ticks[boundary] = TickInfo(
+                liquidity, liquidityNet, 0, 0, TickMath.getSqrtRatioAtTick(boundary)
+            )
+            compressed = boundary // tickSpacing
+            wordPos = compressed >> 8
+            tickBitmap[wordPos] = tickBitmap.get(wordPos, 0) | (1 << (compressed % 256))
+
+    pool = UniswapPool.fromSnapshot(
+        PoolSnapshot.Snapshot(
+            BENCH_TOKENS[0],
+            BENCH_TOKENS[1],
+            fee,
+            tickSpacing,
+            (ONE_TO_ONE_SQRT_PRICE, 0, 0),
+            0,
+            0,
+            (0, 0),
+            numPositions * liquidityPerPosition,
+            # Enough to pay for any swap, the pool reserves don't change the swap results
+            (MAX_INT256 // 1000, MAX_INT256 // 1000),
+            False,
+            dict(sorted(ticks.items())),
+            tickBitmap,
+            positions,
+        ),
+        ledger,
+    )
+    return pool, accounts
+
+
+# Run fcn `iterations` times and return the mean time per call in microseconds
+def timeCall(fcn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fcn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+# Pool test cases of the UniswapV3Pool swap tests (snapshot cases). The fixtures in poolFixtures wrap a plain
+# function returning the test case, which we call directly.
+def getPoolTestCases():
+    from ..tests import poolFixtures
+
+    testCases = []
+    i = 0
+    while hasattr(poolFixtures, "pool" + str(i)):
+        testCases.append(getattr(poolFixtures, "pool" + str(i)).__wrapped__())
+        i += 1
+    return testCases
+
+
+def getSwapTestCases(poolTestCase):
+    from ..tests.poolFixtures import DEFAULT_POOL_SWAP_TESTS
+
+    if poolTestCase.swapTests == None:
+        return DEFAULT_POOL_SWAP_TESTS
+    return poolTestCase.swapTests
+
+
+def createPoolFromTestCase(poolTestCase):
+    ledger, accounts = createLedger()
+    pool = UniswapPool(
+        BENCH_TOKENS[0],
+        BENCH_TOKENS[1],
+        poolTestCase.feeAmount,
+        poolTestCase.tickSpacing,
+        ledger,
+    )
+    pool.initialize(poolTestCase.startingPrice)
+    for position in poolTestCase.positions:
+        pool.mint(
+            accounts[0], position.tickLower, position.tickUpper, position.liquidity
+        )
+    return pool, accounts
@@ -0,0 +1,82 @@
+# Swap latency for each validation level across all the UniswapV3Pool swap test cases (snapshot cases).
+# It also checks that every level gives bit-identical results: same return values (or the same revert) and the same
+# pool state after every swap.
+#
+# Usage: python -m uniswapV3Python.benchmarks.validationLevels
+import copy, time
+
+from .utilities import *
+from ..tests.utilities import swapCaseToParams
+
+LEVELS = [VALIDATION_STRICT, VALIDATION_BOUNDARY, VALIDATION_OFF]
+ITERATIONS = 20
+
+
+# Copies of the state, as slot0, the protocol fees and the balances are live views updated in place by later swaps
+def poolState(pool):
+    return (
+        copy.copy(pool.slot0),
+        pool.liquidity,
+        pool.feeGrowthGlobal0X128,
+        pool.feeGrowthGlobal1X128,
+        copy.copy(pool.protocolFees),
+        dict(pool.ticks),
+        dict(pool.balances),
+    )
+
+
+# Run all the swap test cases on forks of the pools and return the results and the total time spent swapping
+def runSwapTests(pools, iterations):
+    results = []
+    elapsed = 0
+    for pool, accounts, swapTests in pools:
+        for testCase in swapTests:
+            (zeroForOne, amountSpecified, sqrtPriceLimitX96) = swapCaseToParams(
+                testCase
+            )
+            for _ in range(iterations):
+                poolInstance = pool.fork()
+                start = time.perf_counter()
+                try:
+                    result = poolInstance.swap(
+                        accounts[1], zeroForOne, amountSpecified, sqrtPriceLimitX96
+                    )
+                except AssertionError as msg:
+                    result = "Revert: " + str(msg)
+                elapsed += time.perf_counter() - start
+            results.append((result, poolState(poolInstance)))
+    return results, elapsed
+
+
+def main():
+    pools = []
+    for poolTestCase in getPoolTestCases():
+        pool, accounts = createPoolFromTestCase(poolTestCase)
+        pools.append((pool, accounts, getSwapTestCases(poolTestCase)))
+    numSwaps = sum(len(swapTests) for (_, _, swapTests) in pools)
+
+    previousLevel = getValidationLevel()
+    reference = None
+    print(
+        "{:>10} {:>12} {:>10} {:>10}".format(
+            "level", "swap (us)", "speedup", "identical"
+        )
+    )
+    try:
+        for level in LEVELS:
+            setValidationLevel(level)
+            results, elapsed = runSwapTests(pools, ITERATIONS)
+            latency = elapsed / (numSwaps * ITERATIONS) * 1e6
+            if reference == None:
+                reference = (results, latency)
+            print(
+                "{:>10} {:>12.1f} {:>9.2f}x {:>10}".format(
+                    level, latency, reference[1] / latency, str(results == reference[0])
+                )
+            )
+    finally:
+        setValidationLevel(previousLevel)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 from .libraries import Tick, TickMath, SwapMath, FullMath, LiquidityMath
-from .libraries import Position, SqrtPriceMath, SafeMath
+from .libraries import Position, SqrtPriceMath, SafeMath, TickBitmap
+from .libraries.Journal import Journal
+from .libraries import Events, PoolSnapshot
 
 from .libraries.Account import Account
 from .libraries.Shared import *
 from dataclasses import dataclass
+import bisect, contextlib, copy
 
 
 @dataclass
@@ -76,6 +79,29 @@ class StepComputations:
     feeAmount: int
 
 
+## cumulative amounts of a swap through the initialized ticks in one direction, computed with full swap steps. It is
+## extended lazily, as far as the swaps quoted need, up to the lowest or highest price.
+@dataclass
+class DepthLadder:
+    ## the cache of the swap
+    cache: SwapCache
+    ## the swap state at the end of the ladder built so far, for an unlimited exact input
+    state: SwapState
+    ## the swap state at the start of every segment, the last one being the end of the ladder
+    segmentStates: list
+    ## cumulative input, including fees, and output at the start of every segment
+    amountsIn: list
+    amountsOut: list
+    ## the price at the start of every segment, negated when zeroForOne so that it is increasing
+    sortedPrices: list
+    ## number of initialized ticks crossed at the start of every segment
+    crossedCounts: list
+    ## the price limit of the swap, the lowest or highest price
+    sqrtPriceLimitX96: int
+    ## whether the tickBitmap was walked, which changes the steps
+    useTickBitmap: bool
+
+
 @dataclass
 class ProtocolFees:
     token0: int
@@ -86,9 +112,13 @@ class UniswapPool(Account):
 
     # Constructor
     def __init__(self, token0, token1, fee, tickSpacing, ledger):
-        checkInputTypes(string=(token0, token1), uint24=(fee), int24=(tickSpacing))
+        checkBoundaryInputTypes(
+            string=(token0, token1), uint24=(fee), int24=(tickSpacing)
+        )
         # Contract storage variables
-        super().__init__("UniswapPool", [token0, token1], [0, 0])
+        super().__init__(
+            ledger, ledger.registerAccount("UniswapPool", [token0, token1], [0, 0])
+        )
         self.token0 = token0
         self.token1 = token1
         self.fee = fee
@@ -101,25 +131,176 @@ class UniswapPool(Account):
         self.feeGrowthGlobal1X128 = 0
         self.protocolFees = ProtocolFees(0, 0)
         self.liquidity = 0
-        # dict ( int24 => Tick.Info)
-        self.ticks = dict()
-        self.positions = dict()
+        # dict ( int24 => Tick.Info) with a sorted index of the initialized ticks
+        self.ticks = TickMapping()
+        # dict ( int16 => uint256) packed initialized state of the ticks, as in the Solidity contract
+        self.tickBitmap = StorageMapping()
+        # dict ( bytes32 => Position.Info)
+        self.positions = StorageMapping()
+        # Walk the tickBitmap word by word in swap, reproducing the on-chain swap steps, instead of jumping
+        # straight to the next initialized tick. Both give the same result up to rounding in each step.
+        self.useTickBitmap = False
+        # Cached depth ladders of each direction (zeroForOne => DepthLadder), see #quoteSwap
+        self.depthLadders = {}
+        # Events emitted by the pool, see Events.EventBus. Inactive until it has a buffer capacity or subscribers
+        self.events = Events.EventBus()
+        # Log of the state-changing calls, appended once they succeed, see OperationLog. None if the pool is not logged
+        self.operationLog = None
+
+    ### @notice Creates a copy-on-write fork of the pool and its ledger for what-if scenarios
+    ### @dev Ticks, positions and ledger accounts are shared with the parent pool and only copied when they are
+    ### first accessed by either of them, so forking doesn't clone the whole state like a deepcopy. The fork can be
+    ### merged back into the parent pool via #merge or simply discarded.
+    ### @return The forked pool
+    def fork(self):
+        fork = copy.copy(self)
+        fork.slot0 = copy.copy(self.slot0)
+        fork.protocolFees = copy.copy(self.protocolFees)
+        fork.ticks = self.ticks.fork()
+        fork.tickBitmap = self.tickBitmap.fork()
+        fork.positions = self.positions.fork()
+        fork.ledger = self.ledger.fork()
+        # The events of the fork are not seen by the subscribers of the parent pool
+        fork.events = Events.EventBus(self.events.capacity)
+        fork.operationLog = None
+        return fork
+
+    ### @notice Merges a fork of this pool back into it, making this pool adopt the fork's state and applying the
+    ### balance changes of the fork to the ledger (see Ledger#merge)
+    ### @dev Reverts if the pool balances changed after forking, as the pool state the fork started from is gone.
+    ### Other changes made to this pool after forking are overwritten. The fork must be discarded afterwards.
+    ### @param fork A pool created by calling #fork on this pool
+    def merge(self, fork):
+        require(fork.address == self.address, "Not a fork of this pool")
+        for token in [self.token0, self.token1]:
+            tokenId = self.ledger.tokenIds[token]
+            require(
+                self.ledger.getBalance(self.handle, tokenId)
+                == fork.ledger.getForkBalance(self.handle, tokenId),
+                "Pool changed since fork",
+            )
+        (ledger, events, operationLog) = (self.ledger, self.events, self.operationLog)
+        self.__dict__.update(fork.__dict__)
+        (self.ledger, self.events, self.operationLog) = (ledger, events, operationLog)
+        self.ledger.merge(fork.ledger)
+        # The operations of the fork are not logged, so the merged state needs a checkpoint to be recoverable
+        if self.operationLog is not None:
+            self.operationLog.checkpoint()
+
+    ### @notice Saves the full state of the pool to a binary snapshot file, see PoolSnapshot
+    ### @dev The pool token balances are saved too, but not the rest of the ledger
+    ### @param path The path of the snapshot file
+    def save(self, path):
+        PoolSnapshot.write(
+            path,
+            PoolSnapshot.Snapshot(
+                self.token0,
+                self.token1,
+                self.fee,
+                self.tickSpacing,
+                (self.slot0.sqrtPriceX96, self.slot0.tick, self.slot0.feeProtocol),
+                self.feeGrowthGlobal0X128,
+                self.feeGrowthGlobal1X128,
+                (self.protocolFees.token0, self.protocolFees.token1),
+                self.liquidity,
+                (self.balances[self.token0], self.balances[self.token1]),
+                self.useTickBitmap,
+                # Read the entries without copying the ones shared with a fork
+                {tick: dict.__getitem__(self.ticks, tick) for tick in self.ticks},
+                dict(self.tickBitmap.items()),
+                dict(self.positions.items()),
+            ),
+        )
 
-        self.ledger = ledger
+    ### @notice Loads a pool from a snapshot file written by #save
+    ### @dev The pool is a new account of the ledger, which gets the token balances saved with the pool
+    ### @param path The path of the snapshot file
+    ### @param ledger Reference to the ledger
+    ### @return The loaded pool
+    def load(path, ledger):
+        return UniswapPool.fromSnapshot(PoolSnapshot.read(path), ledger)
+
+    ### @notice Creates a pool with the state of a snapshot, e.g. read by PoolSnapshot#read or built in memory
+    ### @param snapshot PoolSnapshot.Snapshot, whose ticks, bitmap and positions are owned by the pool from now on
+    ### @param ledger Reference to the ledger
+    ### @return The new pool
+    def fromSnapshot(snapshot, ledger):
+        pool = UniswapPool(
+            snapshot.token0, snapshot.token1, snapshot.fee, snapshot.tickSpacing, ledger
+        )
+        pool.slot0 = Slot0(*snapshot.slot0)
+        pool.feeGrowthGlobal0X128 = snapshot.feeGrowthGlobal0X128
+        pool.feeGrowthGlobal1X128 = snapshot.feeGrowthGlobal1X128
+        pool.protocolFees = ProtocolFees(*snapshot.protocolFees)
+        pool.liquidity = snapshot.liquidity
+        pool.useTickBitmap = snapshot.useTickBitmap
+        pool.ticks = TickMapping(snapshot.ticks)
+        pool.tickBitmap = StorageMapping(snapshot.tickBitmap)
+        pool.positions = StorageMapping(snapshot.positions)
+        ledger.setBalance(pool.address, pool.token0, snapshot.balances[0])
+        ledger.setBalance(pool.address, pool.token1, snapshot.balances[1])
+        return pool
+
+    ### @notice Runs the calls made within the context as a transaction that is reverted if any of them reverts
+    ### @dev Mimics Solidity revert semantics. Every write to the pool storage and to the ledger balances is recorded
+    ### in an undo journal and restored if an exception is raised within the context, which is then re-raised.
+    ### Transactions can be nested.
+    ### e.g. with pool.transaction():
+    ###          pool.mint(...)
+    ###          pool.swap(...)
+    @contextlib.contextmanager
+    def transaction(self):
+        journal = Journal()
+        journal.recordFields(
+            self,
+            [
+                "slot0",
+                "liquidity",
+                "feeGrowthGlobal0X128",
+                "feeGrowthGlobal1X128",
+                "protocolFees",
+                "depthLadders",
+            ],
+        )
+        journaled = [self.ticks, self.tickBitmap, self.positions, self.ledger]
+        for storage in journaled:
+            storage.journals.append(journal)
+        # Events are held until the outermost transaction ends, and dropped if it reverts
+        # and so are the logged operations
+        held = [self.events]
+        if self.operationLog is not None:
+            held.append(self.operationLog)
+        marks = [log.hold() for log in held]
+        try:
+            yield
+        except BaseException:
+            # Stop journaling before restoring the storage
+            for storage in journaled:
+                storage.journals.remove(journal)
+            journaled = []
+            journal.rollback()
+            for (log, mark) in zip(held, marks):
+                log.discard(mark)
+            raise
+        finally:
+            for storage in journaled:
+                storage.journals.remove(journal)
+            for log in held:
+                log.release()
 
     ### @dev Common checks for valid tick inputs.
     def checkTicks(tickLower, tickUpper):
         checkInputTypes(int24=(tickLower, tickUpper))
-        assert tickLower < tickUpper, "TLU"
-        assert tickLower >= TickMath.MIN_TICK, "TLM"
-        assert tickUpper <= TickMath.MAX_TICK, "TUM"
+        require(tickLower < tickUpper, "TLU")
+        require(tickLower >= TickMath.MIN_TICK, "TLM")
+        require(tickUpper <= TickMath.MAX_TICK, "TUM")
 
     ### @notice Sets the initial price for the pool
     ### @dev Price is represented as a sqrt(amountToken1/amountToken0) Q64.96 value
     ### @param sqrtPriceX96 the initial sqrt price of the pool as a Q64.96
     def initialize(self, sqrtPriceX96):
-        checkInputTypes(uint160=(sqrtPriceX96))
-        assert self.slot0.sqrtPriceX96 == 0, "AI"
+        checkBoundaryInputTypes(uint160=(sqrtPriceX96))
+        require(self.slot0.sqrtPriceX96 == 0, "AI")
 
         tick = TickMath.getTickAtSqrtRatio(sqrtPriceX96)
 
@@ -128,6 +309,9 @@ class UniswapPool(Account):
             tick,
             0,
         )
+        self._invalidateDepthLadders()
+        if self.operationLog is not None:
+            self.operationLog.append("initialize", [sqrtPriceX96])
 
     ## @dev Effect some changes to a position
     ## @param params the position details and the change to the position's liquidity to effect
@@ -141,6 +325,7 @@ class UniswapPool(Account):
             int128=(params.liquidityDelta),
         )
         UniswapPool.checkTicks(params.tickLower, params.tickUpper)
+        self._invalidateDepthLadders()
 
         # Initialize values
         amount0 = amount1 = 0
@@ -154,23 +339,25 @@ class UniswapPool(Account):
         )
 
         if params.liquidityDelta != 0:
+            sqrtPriceLowerX96 = Tick.getSqrtRatioAtTick(self.ticks, params.tickLower)
+            sqrtPriceUpperX96 = Tick.getSqrtRatioAtTick(self.ticks, params.tickUpper)
             if self.slot0.tick < params.tickLower:
                 ## current tick is below the passed range; liquidity can only become in range by crossing from left to
                 ## right, when we'll need _more_ token0 (it's becoming more valuable) so user must provide it
                 amount0 = SqrtPriceMath.getAmount0DeltaHelper(
-                    TickMath.getSqrtRatioAtTick(params.tickLower),
-                    TickMath.getSqrtRatioAtTick(params.tickUpper),
+                    sqrtPriceLowerX96,
+                    sqrtPriceUpperX96,
                     params.liquidityDelta,
                 )
             elif self.slot0.tick < params.tickUpper:
                 ## current tick is inside the passed range
                 amount0 = SqrtPriceMath.getAmount0DeltaHelper(
                     self.slot0.sqrtPriceX96,
-                    TickMath.getSqrtRatioAtTick(params.tickUpper),
+                    sqrtPriceUpperX96,
                     params.liquidityDelta,
                 )
                 amount1 = SqrtPriceMath.getAmount1DeltaHelper(
-                    TickMath.getSqrtRatioAtTick(params.tickLower),
+                    sqrtPriceLowerX96,
                     self.slot0.sqrtPriceX96,
                     params.liquidityDelta,
                 )
@@ -181,8 +368,8 @@ class UniswapPool(Account):
                 ## current tick is above the passed range; liquidity can only become in range by crossing from right to
                 ## left, when we'll need _more_ token1 (it's becoming more valuable) so user must provide it
                 amount1 = SqrtPriceMath.getAmount1DeltaHelper(
-                    TickMath.getSqrtRatioAtTick(params.tickLower),
-                    TickMath.getSqrtRatioAtTick(params.tickUpper),
+                    sqrtPriceLowerX96,
+                    sqrtPriceUpperX96,
                     params.liquidityDelta,
                 )
 
@@ -229,9 +416,13 @@ class UniswapPool(Account):
             )
 
         if flippedLower:
-            assert tickLower % self.tickSpacing == 0  ## ensure that the tick is spaced
+            ## ensure that the tick is spaced
+            require(tickLower % self.tickSpacing == 0)
+            TickBitmap.flipTick(self.tickBitmap, tickLower, self.tickSpacing)
         if flippedUpper:
-            assert tickUpper % self.tickSpacing == 0  ## ensure that the tick is spaced
+            ## ensure that the tick is spaced
+            require(tickUpper % self.tickSpacing == 0)
+            TickBitmap.flipTick(self.tickBitmap, tickUpper, self.tickSpacing)
 
         (feeGrowthInside0X128, feeGrowthInside1X128) = Tick.getFeeGrowthInside(
             self.ticks,
@@ -265,10 +456,10 @@ class UniswapPool(Account):
     ## @return amount0 The amount of token0 that was paid to mint the given amount of liquidity.
     ## @return amount1 The amount of token1 that was paid to mint the given amount of liquidity.
     def mint(self, recipient, tickLower, tickUpper, amount):
-        checkInputTypes(
+        checkBoundaryInputTypes(
             accounts=(recipient), int24=(tickLower, tickUpper), uint128=(amount)
         )
-        assert amount > 0
+        require(amount > 0)
 
         (_, amount0Int, amount1Int) = self._modifyPosition(
             ModifyPositionParams(recipient, tickLower, tickUpper, amount)
@@ -281,6 +472,14 @@ class UniswapPool(Account):
         self.ledger.transferToken(recipient, self, self.token0, amount0)
         self.ledger.transferToken(recipient, self, self.token1, amount1)
 
+        if self.events.active:
+            self.events.emit(
+                Events.Mint(
+                    recipient, recipient, tickLower, tickUpper, amount, amount0, amount1
+                )
+            )
+        if self.operationLog is not None:
+            self.operationLog.append("mint", [recipient, tickLower, tickUpper, amount])
         return (amount0, amount1)
 
     ## @notice Collects tokens owed to a position
@@ -298,7 +497,7 @@ class UniswapPool(Account):
     def collect(
         self, recipient, tickLower, tickUpper, amount0Requested, amount1Requested
     ):
-        checkInputTypes(
+        checkBoundaryInputTypes(
             accounts=(recipient),
             int24=(tickLower, tickUpper),
             uint128=(amount0Requested, amount1Requested),
@@ -326,6 +525,17 @@ class UniswapPool(Account):
             position.tokensOwed1 -= amount1
             self.ledger.transferToken(self, recipient, self.token1, amount1)
 
+        if self.events.active:
+            self.events.emit(
+                Events.Collect(
+                    recipient, recipient, tickLower, tickUpper, amount0, amount1
+                )
+            )
+        if self.operationLog is not None:
+            self.operationLog.append(
+                "collect",
+                [recipient, tickLower, tickUpper, amount0Requested, amount1Requested],
+            )
         return (recipient, tickLower, tickUpper, amount0, amount1)
 
     ## @notice Burn liquidity from the sender and account tokens owed for the liquidity to the position
@@ -337,7 +547,7 @@ class UniswapPool(Account):
     ## @return amount0 The amount of token0 sent to the recipient
     ## @return amount1 The amount of token1 sent to the recipient
     def burn(self, recipient, tickLower, tickUpper, amount):
-        checkInputTypes(
+        checkBoundaryInputTypes(
             accounts=(recipient), int24=(tickLower, tickUpper), uint128=(amount)
         )
 
@@ -358,6 +568,12 @@ class UniswapPool(Account):
             position.tokensOwed0 += amount0
             position.tokensOwed1 += amount1
 
+        if self.events.active:
+            self.events.emit(
+                Events.Burn(recipient, tickLower, tickUpper, amount, amount0, amount1)
+            )
+        if self.operationLog is not None:
+            self.operationLog.append("burn", [recipient, tickLower, tickUpper, amount])
         return (recipient, tickLower, tickUpper, amount, amount0, amount1)
 
     ## @notice Swap token0 for token1, or token1 for token0
@@ -370,26 +586,462 @@ class UniswapPool(Account):
     ## @return amount0 The delta of the balance of token0 of the pool, exact when negative, minimum when positive
     ## @return amount1 The delta of the balance of token1 of the pool, exact when negative, minimum when positive
     def swap(self, recipient, zeroForOne, amountSpecified, sqrtPriceLimitX96):
-        checkInputTypes(
+        checkBoundaryInputTypes(
             accounts=(recipient),
             bool=(zeroForOne),
             int256=(amountSpecified),
             uint160=(sqrtPriceLimitX96),
         )
-        assert amountSpecified != 0, "AS"
+        (amount0, amount1, state) = self._executeSwap(
+            zeroForOne, amountSpecified, sqrtPriceLimitX96
+        )
+
+        ## do the transfers and collect payment
+        if zeroForOne:
+            if amount1 < 0:
+                self.ledger.transferToken(self, recipient, self.token1, abs(amount1))
+            balanceBefore = self.balances[self.token0]
+            self.ledger.transferToken(recipient, self, self.token0, abs(amount0))
+            require(balanceBefore + abs(amount0) == self.balances[self.token0], "IIA")
+        else:
+            if amount0 < 0:
+                self.ledger.transferToken(self, recipient, self.token0, abs(amount0))
+
+            balanceBefore = self.balances[self.token1]
+            self.ledger.transferToken(recipient, self, self.token1, abs(amount1))
+            require(balanceBefore + abs(amount1) == self.balances[self.token1], "IIA")
+
+        self._emitSwap(recipient, amount0, amount1, state)
+        if self.operationLog is not None:
+            self.operationLog.append(
+                "swap", [recipient, zeroForOne, amountSpecified, sqrtPriceLimitX96]
+            )
+        return (
+            recipient,
+            amount0,
+            amount1,
+            state.sqrtPriceX96,
+            state.liquidity,
+            state.tick,
+        )
+
+    ## @notice Executes a batch of swaps, settling the token transfers once for the whole batch
+    ## @dev The swaps are executed sequentially against the curve, exactly as consecutive calls to #swap, but the token
+    ## deltas are netted per recipient and token and settled in a single ledger pass at the end. Recipients only need
+    ## to cover their net payment. The batch runs as a transaction, so if any swap or the settlement reverts the whole
+    ## batch is reverted.
+    ## @param orders List of (recipient, zeroForOne, amountSpecified, sqrtPriceLimitX96) tuples, as the #swap parameters
+    ## @return List with the #swap return values of each order
+    def swapBatch(self, orders):
+        results = []
+        ## address => account, and (address, token) => delta of the account balance
+        recipients = {}
+        deltas = {}
+        with self.transaction():
+            for (recipient, zeroForOne, amountSpecified, sqrtPriceLimitX96) in orders:
+                checkBoundaryInputTypes(
+                    accounts=(recipient),
+                    bool=(zeroForOne),
+                    int256=(amountSpecified),
+                    uint160=(sqrtPriceLimitX96),
+                )
+                if type(recipient) == str:
+                    recipient = self.ledger.getAccountWithAddress(recipient)
+                recipients[recipient.address] = recipient
+
+                (amount0, amount1, state) = self._executeSwap(
+                    zeroForOne, amountSpecified, sqrtPriceLimitX96
+                )
+                for (token, amount) in ((self.token0, amount0), (self.token1, amount1)):
+                    key = (recipient.address, token)
+                    deltas[key] = deltas.get(key, 0) - amount
+                self._emitSwap(recipient.address, amount0, amount1, state)
+
+                results.append(
+                    (
+                        recipient.address,
+                        amount0,
+                        amount1,
+                        state.sqrtPriceX96,
+                        state.liquidity,
+                        state.tick,
+                    )
+                )
+
+            ## settle the net transfers and collect payment
+            settlement = [
+                (recipients[address], token, delta)
+                for ((address, token), delta) in deltas.items()
+                if delta != 0
+            ]
+            poolDeltas = {self.token0: 0, self.token1: 0}
+            for (_, token, delta) in settlement:
+                poolDeltas[token] -= delta
+            for token in poolDeltas:
+                if poolDeltas[token] != 0:
+                    settlement.append((self, token, poolDeltas[token]))
+
+            balancesBefore = dict(self.balances)
+            self.ledger.settle(settlement)
+            for token in poolDeltas:
+                require(
+                    balancesBefore[token] + poolDeltas[token] == self.balances[token],
+                    "IIA",
+                )
+
+            if self.operationLog is not None:
+                self.operationLog.append(
+                    "swapBatch",
+                    [
+                        [
+                            [address, *order]
+                            for ((_, *order), (address, *_)) in zip(orders, results)
+                        ]
+                    ],
+                )
+
+        return results
+
+    ## @dev Emits the Swap event of a swap executed by #_executeSwap, the recipient being also the sender
+    def _emitSwap(self, recipient, amount0, amount1, state):
+        if self.events.active:
+            self.events.emit(
+                Events.Swap(
+                    recipient,
+                    recipient,
+                    amount0,
+                    amount1,
+                    state.sqrtPriceX96,
+                    state.liquidity,
+                    state.tick,
+                )
+            )
+
+    ## @dev Executes the swap steps and writes the resulting state to the pool storage, without transferring tokens
+    ## @return amount0 The delta of the balance of token0 of the pool
+    ## @return amount1 The delta of the balance of token1 of the pool
+    ## @return state The final swap state
+    def _executeSwap(self, zeroForOne, amountSpecified, sqrtPriceLimitX96):
+        self._invalidateDepthLadders()
+        slot0Start = self.slot0
+
+        (cache, state) = self._startSwap(zeroForOne, amountSpecified, sqrtPriceLimitX96)
+
+        exactInput = amountSpecified > 0
+
+        self._computeSwapSteps(
+            cache, state, zeroForOne, exactInput, sqrtPriceLimitX96, True
+        )
+
+        ## End of swap loop
+        ## update tick
+        if state.tick != slot0Start.tick:
+            self.slot0.sqrtPriceX96 = state.sqrtPriceX96
+            self.slot0.tick = state.tick
+        else:
+            ## otherwise just update the price
+            self.slot0.sqrtPriceX96 = state.sqrtPriceX96
+
+        ## update liquidity if it changed
+        if cache.liquidityStart != state.liquidity:
+            self.liquidity = state.liquidity
+
+        ## update fee growth global and, if necessary, protocol fees
+        ## overflow is acceptable, protocol has to withdraw before it hits type(uint128).max fees
+
+        if zeroForOne:
+            self.feeGrowthGlobal0X128 = state.feeGrowthGlobalX128
+            if state.protocolFee > 0:
+                self.protocolFees.token0 += state.protocolFee
+        else:
+            self.feeGrowthGlobal1X128 = state.feeGrowthGlobalX128
+            if state.protocolFee > 0:
+                self.protocolFees.token1 += state.protocolFee
+
+        (amount0, amount1) = UniswapPool._getSwapAmounts(
+            state, zeroForOne, exactInput, amountSpecified
+        )
+
+        return (amount0, amount1, state)
+
+    ## @notice Computes the result of a swap without executing it
+    ## @dev Runs the same swap steps as #swap against a local swap state. Ticks are not crossed and no tokens are
+    ## transferred, so the pool storage and the ledger are left untouched. The swap is resumed from the cached depth
+    ## ladder of the pool, found with a binary search, so only the steps past the ladder built so far and the last
+    ## partial step are computed.
+    ## @param zeroForOne The direction of the swap, true for token0 to token1, false for token1 to token0
+    ## @param amountSpecified The amount of the swap, which implicitly configures the swap as exact input (positive), or exact output (negative)
+    ## @param sqrtPriceLimitX96 The Q64.96 sqrt price limit. If zero for one, the price cannot be less than this
+    ## value after the swap. If one for zero, the price cannot be greater than this value after the swap
+    ## @return amount0 The delta of the balance of token0 of the pool, exact when negative, minimum when positive
+    ## @return amount1 The delta of the balance of token1 of the pool, exact when negative, minimum when positive
+    ## @return sqrtPriceX96 The price after the swap
+    ## @return liquidity The liquidity in range after the swap
+    ## @return tick The tick after the swap
+    ## @return ticksCrossed The initialized ticks crossed during the swap, in the order they are crossed
+    def quoteSwap(self, zeroForOne, amountSpecified, sqrtPriceLimitX96):
+        checkBoundaryInputTypes(
+            bool=(zeroForOne),
+            int256=(amountSpecified),
+            uint160=(sqrtPriceLimitX96),
+        )
+        self._startSwap(zeroForOne, amountSpecified, sqrtPriceLimitX96)
+
+        exactInput = amountSpecified > 0
+
+        (cache, state) = self._resumeSwapFromLadder(
+            zeroForOne, amountSpecified, sqrtPriceLimitX96
+        )
+        self._computeSwapSteps(
+            cache, state, zeroForOne, exactInput, sqrtPriceLimitX96, False
+        )
+
+        (amount0, amount1) = UniswapPool._getSwapAmounts(
+            state, zeroForOne, exactInput, amountSpecified
+        )
+
+        return (
+            amount0,
+            amount1,
+            state.sqrtPriceX96,
+            state.liquidity,
+            state.tick,
+            state.ticksCrossed,
+        )
+
+    ## @notice Computes the result of exact input swaps of many sizes in a single walk of the ticks
+    ## @dev The depth ladder of the pool is extended once, as far as the largest amount needs, and the amounts are then
+    ## resolved in increasing order in a single forward pass over its segments. Every amount resumes the swap from the
+    ## start of the last segment it fully completes, which usually takes a single #SwapMath.computeSwapStep, so the
+    ## results match #quoteSwap (and #swap) exactly.
+    ## The swaps run without a price limit, i.e. up to MIN_SQRT_RATIO + 1 or MAX_SQRT_RATIO - 1.
+    ## @param zeroForOne The direction of the swaps, true for token0 to token1, false for token1 to token0
+    ## @param amounts The exact input amounts to quote, all positive
+    ## @return List of (amount0, amount1, sqrtPriceX96, liquidity, tick) for every amount, as in #quoteSwap
+    def quoteCurve(self, zeroForOne, amounts):
+        checkBoundaryInputTypes(bool=(zeroForOne), int256=(*amounts,))
+        for amount in amounts:
+            require(amount > 0, "AS")
+        if len(amounts) == 0:
+            return []
+
+        sqrtPriceLimitX96 = (
+            TickMath.MIN_SQRT_RATIO + 1 if zeroForOne else TickMath.MAX_SQRT_RATIO - 1
+        )
+        self._startSwap(zeroForOne, max(amounts), sqrtPriceLimitX96)
+        ladder = self._getDepthLadder(zeroForOne)
+        self._extendDepthLadder(ladder, zeroForOne, max(amounts), sqrtPriceLimitX96)
+
+        results = [None] * len(amounts)
+        index = 0
+        for i in sorted(range(len(amounts)), key=amounts.__getitem__):
+            amount = amounts[i]
+            ## the last segment completed with some amount left, the ladder ends at the price limit
+            while (
+                index + 1 < len(ladder.amountsIn)
+                and ladder.amountsIn[index + 1] < amount
+            ):
+                index += 1
+            state = UniswapPool._getSegmentState(ladder, index, amount)
+            self._computeSwapSteps(
+                ladder.cache, state, zeroForOne, True, sqrtPriceLimitX96, False
+            )
+            (amount0, amount1) = UniswapPool._getSwapAmounts(
+                state, zeroForOne, True, amount
+            )
+            results[i] = (
+                amount0,
+                amount1,
+                state.sqrtPriceX96,
+                state.liquidity,
+                state.tick,
+            )
+
+        return results
+
+    ## @notice Computes the amounts of an exact input swap that moves the price to the target price
+    ## @dev Quoted like #quoteSwap, with an unlimited amount and the target as the price limit
+    ## @param sqrtPriceTargetX96 The price to move the pool to
+    ## @return amount0 The delta of the balance of token0 of the pool, the input including fees when positive
+    ## @return amount1 The delta of the balance of token1 of the pool, the input including fees when positive
+    def amountToReachPrice(self, sqrtPriceTargetX96):
+        checkBoundaryInputTypes(uint160=(sqrtPriceTargetX96))
+        if sqrtPriceTargetX96 == self.slot0.sqrtPriceX96:
+            return (0, 0)
+        zeroForOne = sqrtPriceTargetX96 < self.slot0.sqrtPriceX96
+        return self.quoteSwap(zeroForOne, MAX_INT256, sqrtPriceTargetX96)[:2]
+
+    ## @notice Gets the liquidity that is in range when the pool is at the given tick
+    ## @dev Adds the liquidityNet of the initialized ticks between the current tick and the given tick to the current
+    ## liquidity
+    ## @param tick The tick at which to get the liquidity
+    ## @return liquidity The liquidity in range at the tick
+    def liquidityAt(self, tick):
+        checkBoundaryInputTypes(int24=(tick))
+        require(tick >= TickMath.MIN_TICK and tick <= TickMath.MAX_TICK, "T")
+        liquidity = self.liquidity
+        if tick >= self.slot0.tick:
+            for initializedTick in self.ticks.ticksBetween(self.slot0.tick, tick):
+                liquidity = LiquidityMath.addDelta(
+                    liquidity, dict.get(self.ticks, initializedTick).liquidityNet
+                )
+        else:
+            for initializedTick in self.ticks.ticksBetween(tick, self.slot0.tick):
+                liquidity = LiquidityMath.addDelta(
+                    liquidity, -dict.get(self.ticks, initializedTick).liquidityNet
+                )
+        return liquidity
+
+    ## @notice Gets the amounts of the tokens held by the liquidity within a tick range, i.e. the token0 that can be
+    ## bought moving the price up to tickUpper and the token1 that can be bought moving the price down to tickLower
+    ## @dev The amounts of every range between initialized ticks are computed with SqrtPriceMath, rounding down
+    ## @param tickLower The lower tick of the range
+    ## @param tickUpper The upper tick of the range
+    ## @return amount0 The amount of token0 within the range, all of it above the current price
+    ## @return amount1 The amount of token1 within the range, all of it below the current price
+    def depthWithin(self, tickLower, tickUpper):
+        checkBoundaryInputTypes(int24=(tickLower, tickUpper))
+        UniswapPool.checkTicks(tickLower, tickUpper)
+        sqrtPriceCurrentX96 = self.slot0.sqrtPriceX96
+        amount0 = amount1 = 0
+
+        liquidity = self.liquidityAt(tickLower)
+        tickStart = tickLower
+        for tickEnd in self.ticks.ticksBetween(tickLower, tickUpper - 1) + [tickUpper]:
+            sqrtPriceStartX96 = Tick.getSqrtRatioAtTick(self.ticks, tickStart)
+            sqrtPriceEndX96 = Tick.getSqrtRatioAtTick(self.ticks, tickEnd)
+            ## token0 above the current price and token1 below it
+            if sqrtPriceCurrentX96 < sqrtPriceEndX96:
+                amount0 += SqrtPriceMath.getAmount0Delta(
+                    max(sqrtPriceStartX96, sqrtPriceCurrentX96),
+                    sqrtPriceEndX96,
+                    liquidity,
+                    False,
+                )
+            if sqrtPriceCurrentX96 > sqrtPriceStartX96:
+                amount1 += SqrtPriceMath.getAmount1Delta(
+                    sqrtPriceStartX96,
+                    min(sqrtPriceEndX96, sqrtPriceCurrentX96),
+                    liquidity,
+                    False,
+                )
+            if tickEnd != tickUpper:
+                liquidity = LiquidityMath.addDelta(
+                    liquidity, dict.get(self.ticks, tickEnd).liquidityNet
+                )
+            tickStart = tickEnd
+
+        return (amount0, amount1)
+
+    ## @dev Gets the depth ladder of the pool in the given direction, creating it if it isn't cached. The ladders are
+    ## cached until the pool state they are computed from changes, see #_invalidateDepthLadders
+    def _getDepthLadder(self, zeroForOne):
+        ladder = self.depthLadders.get(zeroForOne)
+        if ladder is None or ladder.useTickBitmap != self.useTickBitmap:
+            sqrtPriceLimitX96 = (
+                TickMath.MIN_SQRT_RATIO + 1
+                if zeroForOne
+                else TickMath.MAX_SQRT_RATIO - 1
+            )
+            (cache, state) = self._startSwap(zeroForOne, MAX_INT256, sqrtPriceLimitX96)
+            ladder = DepthLadder(
+                cache, state, [], [], [], [], [], sqrtPriceLimitX96, self.useTickBitmap
+            )
+            UniswapPool._addLadderSegment(ladder, zeroForOne)
+            self.depthLadders[zeroForOne] = ladder
+        return ladder
+
+    ## @dev Records the end of the ladder built so far as the start of a new segment
+    def _addLadderSegment(ladder, zeroForOne):
+        segmentState = copy.copy(ladder.state)
+        segmentState.ticksCrossed = []
+        ladder.segmentStates.append(segmentState)
+        ladder.amountsIn.append(MAX_INT256 - ladder.state.amountSpecifiedRemaining)
+        ladder.amountsOut.append(-ladder.state.amountCalculated)
+        ladder.sortedPrices.append(
+            -ladder.state.sqrtPriceX96 if zeroForOne else ladder.state.sqrtPriceX96
+        )
+        ladder.crossedCounts.append(len(ladder.state.ticksCrossed))
+
+    ## @dev Creates the swap state at the start of the last ladder segment that a swap fully completes, without
+    ## ending at it, extending the ladder if needed. Running the swap steps from there gives the same result as
+    ## running them from the current price, since the full steps don't depend on the amount specified.
+    ## @return cache The swap cache
+    ## @return state The swap state at the start of the segment
+    def _resumeSwapFromLadder(self, zeroForOne, amountSpecified, sqrtPriceLimitX96):
+        ladder = self._getDepthLadder(zeroForOne)
+        self._extendDepthLadder(ladder, zeroForOne, amountSpecified, sqrtPriceLimitX96)
+        amounts = ladder.amountsIn if amountSpecified > 0 else ladder.amountsOut
+        sortedPriceLimit = -sqrtPriceLimitX96 if zeroForOne else sqrtPriceLimitX96
+
+        ## the segments before the index are completed with some amount left and don't go past the price limit
+        index = (
+            min(
+                bisect.bisect_left(amounts, abs(amountSpecified)),
+                bisect.bisect_right(ladder.sortedPrices, sortedPriceLimit),
+            )
+            - 1
+        )
+
+        state = UniswapPool._getSegmentState(ladder, index, amountSpecified)
+        state.ticksCrossed = ladder.state.ticksCrossed[: ladder.crossedCounts[index]]
+        return (ladder.cache, state)
+
+    ## @dev Extends the ladder until it covers the amount or the price limit
+    def _extendDepthLadder(
+        self, ladder, zeroForOne, amountSpecified, sqrtPriceLimitX96
+    ):
+        amounts = ladder.amountsIn if amountSpecified > 0 else ladder.amountsOut
+        sortedPriceLimit = -sqrtPriceLimitX96 if zeroForOne else sqrtPriceLimitX96
+        while (
+            amounts[-1] < abs(amountSpecified)
+            and ladder.sortedPrices[-1] < sortedPriceLimit
+            and ladder.state.sqrtPriceX96 != ladder.sqrtPriceLimitX96
+        ):
+            self._computeSwapStep(
+                ladder.cache,
+                ladder.state,
+                zeroForOne,
+                True,
+                ladder.sqrtPriceLimitX96,
+                False,
+            )
+            UniswapPool._addLadderSegment(ladder, zeroForOne)
+
+    ## @dev Creates the swap state of a swap at the start of a ladder segment, without the ticks crossed
+    def _getSegmentState(ladder, index, amountSpecified):
+        state = copy.copy(ladder.segmentStates[index])
+        state.ticksCrossed = []
+        if amountSpecified > 0:
+            state.amountSpecifiedRemaining = amountSpecified - ladder.amountsIn[index]
+            state.amountCalculated = -ladder.amountsOut[index]
+        else:
+            state.amountSpecifiedRemaining = amountSpecified + ladder.amountsOut[index]
+            state.amountCalculated = ladder.amountsIn[index]
+        return state
+
+    ## @dev Clears the cached depth ladders. Called whenever the state they are computed from changes
+    def _invalidateDepthLadders(self):
+        self.depthLadders = {}
+
+    ## @dev Checks the swap parameters and creates the initial swap cache and state from the pool storage
+    def _startSwap(self, zeroForOne, amountSpecified, sqrtPriceLimitX96):
+        require(amountSpecified != 0, "AS")
 
         slot0Start = self.slot0
 
         if zeroForOne:
-            assert (
+            require(
                 sqrtPriceLimitX96 < slot0Start.sqrtPriceX96
-                and sqrtPriceLimitX96 > TickMath.MIN_SQRT_RATIO
-            ), "SPL"
+                and sqrtPriceLimitX96 > TickMath.MIN_SQRT_RATIO,
+                "SPL",
+            )
         else:
-            assert (
+            require(
                 sqrtPriceLimitX96 > slot0Start.sqrtPriceX96
-                and sqrtPriceLimitX96 < TickMath.MAX_SQRT_RATIO
-            ), "SPL"
+                and sqrtPriceLimitX96 < TickMath.MAX_SQRT_RATIO,
+                "SPL",
+            )
 
         feeProtocol = (
             (slot0Start.feeProtocol % 16)
@@ -399,8 +1051,6 @@ class UniswapPool(Account):
 
         cache = SwapCache(feeProtocol, self.liquidity)
 
-        exactInput = amountSpecified > 0
-
         state = SwapState(
             amountSpecified,
             0,
@@ -411,75 +1061,94 @@ class UniswapPool(Account):
             cache.liquidityStart,
             [],
         )
-
+        return (cache, state)
+
+    ## @dev Runs the swap steps until the amount specified is exhausted or the price limit is reached
+    ## @param cache The swap cache
+    ## @param state The swap state, updated with the result of every step
+    ## @param crossTicks Whether to run the tick transitions of the initialized ticks crossed, updating their fee
+    ## growth outside, or to only read their liquidityNet and leave the ticks untouched
+    def _computeSwapSteps(
+        self, cache, state, zeroForOne, exactInput, sqrtPriceLimitX96, crossTicks
+    ):
         while (
             state.amountSpecifiedRemaining != 0
             and state.sqrtPriceX96 != sqrtPriceLimitX96
         ):
-            step = StepComputations(0, 0, 0, 0, 0, 0, 0)
-            step.sqrtPriceStartX96 = state.sqrtPriceX96
+            self._computeSwapStep(
+                cache, state, zeroForOne, exactInput, sqrtPriceLimitX96, crossTicks
+            )
 
-            (step.tickNext, step.initialized) = self.nextTick(state.tick, zeroForOne)
+    ## @dev Runs a single swap step, up to the next initialized tick, the price limit or until the amount specified is
+    ## exhausted. See #_computeSwapSteps
+    def _computeSwapStep(
+        self, cache, state, zeroForOne, exactInput, sqrtPriceLimitX96, crossTicks
+    ):
+        step = StepComputations(0, 0, 0, 0, 0, 0, 0)
+        step.sqrtPriceStartX96 = state.sqrtPriceX96
 
-            ## get the price for the next tick
-            step.sqrtPriceNextX96 = TickMath.getSqrtRatioAtTick(step.tickNext)
+        (step.tickNext, step.initialized) = self._nextStepTick(state.tick, zeroForOne)
 
-            ## compute values to swap to the target tick, price limit, or point where input#output amount is exhausted
-            if zeroForOne:
-                sqrtRatioTargetX96 = (
-                    sqrtPriceLimitX96
-                    if step.sqrtPriceNextX96 < sqrtPriceLimitX96
-                    else step.sqrtPriceNextX96
-                )
-            else:
-                sqrtRatioTargetX96 = (
-                    sqrtPriceLimitX96
-                    if step.sqrtPriceNextX96 > sqrtPriceLimitX96
-                    else step.sqrtPriceNextX96
-                )
+        ## get the price for the next tick
+        step.sqrtPriceNextX96 = Tick.getSqrtRatioAtTick(self.ticks, step.tickNext)
 
-            (
-                state.sqrtPriceX96,
-                step.amountIn,
-                step.amountOut,
-                step.feeAmount,
-            ) = SwapMath.computeSwapStep(
-                state.sqrtPriceX96,
-                sqrtRatioTargetX96,
-                state.liquidity,
-                state.amountSpecifiedRemaining,
-                self.fee,
+        ## compute values to swap to the target tick, price limit, or point where input#output amount is exhausted
+        if zeroForOne:
+            sqrtRatioTargetX96 = (
+                sqrtPriceLimitX96
+                if step.sqrtPriceNextX96 < sqrtPriceLimitX96
+                else step.sqrtPriceNextX96
+            )
+        else:
+            sqrtRatioTargetX96 = (
+                sqrtPriceLimitX96
+                if step.sqrtPriceNextX96 > sqrtPriceLimitX96
+                else step.sqrtPriceNextX96
             )
-            if exactInput:
-                state.amountSpecifiedRemaining -= step.amountIn + step.feeAmount
-                state.amountCalculated = SafeMath.subInts(
-                    state.amountCalculated, step.amountOut
-                )
-            else:
-                state.amountSpecifiedRemaining += step.amountOut
-                state.amountCalculated = SafeMath.addInts(
-                    state.amountCalculated, step.amountIn + step.feeAmount
-                )
 
-            ## if the protocol fee is on, calculate how much is owed, decrement feeAmount, and increment protocolFee
-            if cache.feeProtocol > 0:
-                delta = abs(step.feeAmount // cache.feeProtocol)
-                step.feeAmount -= delta
-                state.protocolFee += delta & (2**128 - 1)
+        (
+            state.sqrtPriceX96,
+            step.amountIn,
+            step.amountOut,
+            step.feeAmount,
+        ) = SwapMath.computeSwapStep(
+            state.sqrtPriceX96,
+            sqrtRatioTargetX96,
+            state.liquidity,
+            state.amountSpecifiedRemaining,
+            self.fee,
+        )
+        if exactInput:
+            state.amountSpecifiedRemaining -= step.amountIn + step.feeAmount
+            state.amountCalculated = SafeMath.subInts(
+                state.amountCalculated, step.amountOut
+            )
+        else:
+            state.amountSpecifiedRemaining += step.amountOut
+            state.amountCalculated = SafeMath.addInts(
+                state.amountCalculated, step.amountIn + step.feeAmount
+            )
 
-            ## update global fee tracker
-            if state.liquidity > 0:
-                state.feeGrowthGlobalX128 += FullMath.mulDiv(
-                    step.feeAmount, FixedPoint128_Q128, state.liquidity
-                )
-                # Addition can overflow in Solidity - mimic it
-                state.feeGrowthGlobalX128 = toUint256(state.feeGrowthGlobalX128)
-
-            ## shift tick if we reached the next price
-            if state.sqrtPriceX96 == step.sqrtPriceNextX96:
-                ## if the tick is initialized, run the tick transition
-                ## @dev: here is where we should handle the case of an uninitialized boundary tick
-                if step.initialized:
+        ## if the protocol fee is on, calculate how much is owed, decrement feeAmount, and increment protocolFee
+        if cache.feeProtocol > 0:
+            delta = abs(step.feeAmount // cache.feeProtocol)
+            step.feeAmount -= delta
+            state.protocolFee += delta & (2**128 - 1)
+
+        ## update global fee tracker
+        if state.liquidity > 0:
+            state.feeGrowthGlobalX128 += FullMath.mulDiv(
+                step.feeAmount, FixedPoint128_Q128, state.liquidity
+            )
+            # Addition can overflow in Solidity - mimic it
+            state.feeGrowthGlobalX128 = toUint256(state.feeGrowthGlobalX128)
+
+        ## shift tick if we reached the next price
+        if state.sqrtPriceX96 == step.sqrtPriceNextX96:
+            ## if the tick is initialized, run the tick transition
+            ## @dev: here is where we should handle the case of an uninitialized boundary tick
+            if step.initialized:
+                if crossTicks:
                     liquidityNet = Tick.cross(
                         self.ticks,
                         step.tickNext,
@@ -490,46 +1159,32 @@ class UniswapPool(Account):
                         if zeroForOne
                         else state.feeGrowthGlobalX128,
                     )
-                    ## if we're moving leftward, we interpret liquidityNet as the opposite sign
-                    ## safe because liquidityNet cannot be type(int128).min
-                    if zeroForOne:
-                        liquidityNet = -liquidityNet
-
-                    state.liquidity = LiquidityMath.addDelta(
-                        state.liquidity, liquidityNet
-                    )
-
-                state.tick = (step.tickNext - 1) if zeroForOne else step.tickNext
-            elif state.sqrtPriceX96 != step.sqrtPriceStartX96:
-                ## recompute unless we're on a lower tick boundary (i.e. already transitioned ticks), and haven't moved
-                state.tick = TickMath.getTickAtSqrtRatio(state.sqrtPriceX96)
-
-        ## End of swap loop
-        ## update tick
-        if state.tick != slot0Start.tick:
-            self.slot0.sqrtPriceX96 = state.sqrtPriceX96
-            self.slot0.tick = state.tick
-        else:
-            ## otherwise just update the price
-            self.slot0.sqrtPriceX96 = state.sqrtPriceX96
-
-        ## update liquidity if it changed
-        if cache.liquidityStart != state.liquidity:
-            self.liquidity = state.liquidity
-
-        ## update fee growth global and, if necessary, protocol fees
-        ## overflow is acceptable, protocol has to withdraw before it hits type(uint128).max fees
-
-        if zeroForOne:
-            self.feeGrowthGlobal0X128 = state.feeGrowthGlobalX128
-            if state.protocolFee > 0:
-                self.protocolFees.token0 += state.protocolFee
-        else:
-            self.feeGrowthGlobal1X128 = state.feeGrowthGlobalX128
-            if state.protocolFee > 0:
-                self.protocolFees.token1 += state.protocolFee
+                else:
+                    # Read without copying the entry into a fork or journaling it, as the tick is not modified
+                    liquidityNet = dict.__getitem__(
+                        self.ticks, step.tickNext
+                    ).liquidityNet
+                state.ticksCrossed.append(step.tickNext)
+                ## if we're moving leftward, we interpret liquidityNet as the opposite sign
+                ## safe because liquidityNet cannot be type(int128).min
+                if zeroForOne:
+                    liquidityNet = -liquidityNet
+
+                state.liquidity = LiquidityMath.addDelta(state.liquidity, liquidityNet)
+
+            state.tick = (step.tickNext - 1) if zeroForOne else step.tickNext
+        elif state.sqrtPriceX96 != step.sqrtPriceStartX96:
+            ## recompute unless we're on a lower tick boundary (i.e. already transitioned ticks), and haven't moved
+            ## the price is between the start of the step and the next tick, so the tick is in that range
+            state.tick = TickMath.getTickAtSqrtRatioBounded(
+                state.sqrtPriceX96,
+                step.tickNext if zeroForOne else state.tick,
+                state.tick if zeroForOne else step.tickNext - 1,
+            )
 
-        (amount0, amount1) = (
+    ## @dev Gets the pool balance deltas from the final swap state
+    def _getSwapAmounts(state, zeroForOne, exactInput, amountSpecified):
+        return (
             (amountSpecified - state.amountSpecifiedRemaining, state.amountCalculated)
             if (zeroForOne == exactInput)
             else (
@@ -538,44 +1193,24 @@ class UniswapPool(Account):
             )
         )
 
-        ## do the transfers and collect payment
-        if zeroForOne:
-            if amount1 < 0:
-                self.ledger.transferToken(self, recipient, self.token1, abs(amount1))
-            balanceBefore = self.balances[self.token0]
-            self.ledger.transferToken(recipient, self, self.token0, abs(amount0))
-            assert balanceBefore + abs(amount0) == self.balances[self.token0], "IIA"
-        else:
-            if amount0 < 0:
-                self.ledger.transferToken(self, recipient, self.token0, abs(amount0))
-
-            balanceBefore = self.balances[self.token1]
-            self.ledger.transferToken(recipient, self, self.token1, abs(amount1))
-            assert balanceBefore + abs(amount1) == self.balances[self.token1], "IIA"
-
-        return (
-            recipient,
-            amount0,
-            amount1,
-            state.sqrtPriceX96,
-            state.liquidity,
-            state.tick,
-        )
-
     ### @notice Set the denominator of the protocol's % share of the fees
     ### @param feeProtocol0 new protocol fee for token0 of the pool
     ### @param feeProtocol1 new protocol fee for token1 of the pool
     def setFeeProtocol(self, feeProtocol0, feeProtocol1):
-        checkInputTypes(uint8=(feeProtocol0, feeProtocol1))
-        assert (feeProtocol0 == 0 or (feeProtocol0 >= 4 and feeProtocol0 <= 10)) and (
-            feeProtocol1 == 0 or (feeProtocol1 >= 4 and feeProtocol1 <= 10)
+        checkBoundaryInputTypes(uint8=(feeProtocol0, feeProtocol1))
+        require(
+            (feeProtocol0 == 0 or (feeProtocol0 >= 4 and feeProtocol0 <= 10))
+            and (feeProtocol1 == 0 or (feeProtocol1 >= 4 and feeProtocol1 <= 10))
         )
 
+        self._invalidateDepthLadders()
         feeProtocolOld = self.slot0.feeProtocol
         feeProtocolNew = feeProtocol0 + (feeProtocol1 << 4)
         # Health check
         checkUInt8(feeProtocolNew)
         self.slot0.feeProtocol = feeProtocolNew
+        if self.operationLog is not None:
+            self.operationLog.append("setFeeProtocol", [feeProtocol0, feeProtocol1])
         return (feeProtocolOld % 16, feeProtocolOld >> 4, feeProtocol0, feeProtocol1)
 
     ### @notice Collect the protocol fee accrued to the pool
@@ -585,7 +1220,7 @@ class UniswapPool(Account):
     ### @return amount0 The protocol fee collected in token0
     ### @return amount1 The protocol fee collected in token1
     def collectProtocol(self, recipient, amount0Requested, amount1Requested):
-        checkInputTypes(
+        checkBoundaryInputTypes(
             accounts=(recipient), uint128=(amount0Requested, amount1Requested)
         )
         amount0 = (
@@ -611,8 +1246,35 @@ class UniswapPool(Account):
             self.protocolFees.token1 -= amount1
             self.ledger.transferToken(self, recipient, self.token1, amount1)
 
+        if self.events.active:
+            self.events.emit(
+                Events.CollectProtocol(recipient, recipient, amount0, amount1)
+            )
+        if self.operationLog is not None:
+            self.operationLog.append(
+                "collectProtocol", [recipient, amount0Requested, amount1Requested]
+            )
         return recipient, amount0, amount1
 
+    ### @notice Returns the tick the next swap step should target, either the next initialized tick or, when walking
+    ### the tickBitmap, the next initialized tick within one word
+    ### @param tick The current tick
+    ### @param zeroForOne The direction of the swap
+    ### @return The next tick and whether it is initialized
+    def _nextStepTick(self, tick, zeroForOne):
+        if not self.useTickBitmap:
+            return self.nextTick(tick, zeroForOne)
+
+        (tickNext, initialized) = TickBitmap.nextInitializedTickWithinOneWord(
+            self.tickBitmap, tick, self.tickSpacing, zeroForOne
+        )
+        ## ensure that we do not overshoot the min/max tick, as the tick bitmap is not aware of these bounds
+        if tickNext < TickMath.MIN_TICK:
+            tickNext = TickMath.MIN_TICK
+        elif tickNext > TickMath.MAX_TICK:
+            tickNext = TickMath.MAX_TICK
+        return (tickNext, initialized)
+
     ### @notice It is assumed that the keys are within [MIN_TICK , MAX_TICK], which should always be the case.
     ### We don't run the risk of overshooting tickNext (out of boundaries) as long as ticks (keys) have been initialized
     ### within the boundaries. However, if there is no initialized tick to the left or right we will return the next boundary
@@ -624,30 +1286,17 @@ class UniswapPool(Account):
     def nextTick(self, tick, lte):
         checkInputTypes(int24=(tick), bool=(lte))
 
-        keyList = list(self.ticks.keys())
-
-        # If tick doesn't exist in the mapping we fake it (easier than searching for nearest value). This is probably not the
-        # best way, but it is a simple and intuitive way to reproduce the behaviour of the logic.
-        if not self.ticks.__contains__(tick):
-            keyList += [tick]
-        sortedKeyList = sorted(keyList)
-        indexCurrentTick = sortedKeyList.index(tick)
-
         if lte:
-            # If the current tick is initialized (not faked), we return the current tick
-            if self.ticks.__contains__(tick):
-                return tick, True
-            elif indexCurrentTick == 0:
+            # If the current tick is initialized, we return the current tick
+            nextTick = self.ticks.tickLte(tick)
+            if nextTick == None:
                 # No tick to the left
                 return TickMath.MIN_TICK, False
-            else:
-                nextTick = sortedKeyList[indexCurrentTick - 1]
         else:
-
-            if indexCurrentTick == len(sortedKeyList) - 1:
+            nextTick = self.ticks.tickGt(tick)
+            if nextTick == None:
                 # No tick to the right
                 return TickMath.MAX_TICK, False
-            nextTick = sortedKeyList[indexCurrentTick + 1]
 
         # Return tick within the boundaries
         return nextTick, True
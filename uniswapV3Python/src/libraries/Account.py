@@ -1,90 +1,437 @@
 from .Shared import *
-import secrets
+from collections.abc import Mapping, MutableMapping
+import contextlib, hashlib
 
-# This module is created to mimick blockchain accounts and their balances. For simplification purposess will only
-# support the tokens that are initialized in the constructor function. Transfering or receiving other tokens will
-# fail (token not in balances dict).
+# This module is created to mimick blockchain accounts and their balances. The ledger identifies every account by an
+# integer handle and every token by an integer id, and keeps the balances in one flat list per token (a column)
+# indexed by the account handle. Every account holds a balance of every token, which is 0 unless set. Forked ledgers
+# share the columns and keep the balances written afterwards in a sparse overlay (see Ledger#fork).
 
-# A random hex address will be assigned to every account when created. This is done to mimic the blockchain address
+# A hex address will be assigned to every account when created. This is done to mimic the blockchain address
 # and to not store the addressess as just pointers to the account instance. Otherwise issues arise when using
-# the account reference values or when we make copies of the Pool in testing.
-class Account:
-    def __init__(self, name, tokens, balances):
-        checkInputTypes(string=(name, *tokens), uint256=(*balances,))
-        assert len(tokens) == len(balances)
-        # Check uniquness of tokens list
-        assert len(set(tokens)) == len(tokens)
+# the account reference values or when we make copies of the Pool in testing. Addresses are derived from the ledger
+# seed and the account handle, so the same sequence of account creations gives the same addresses in every run and
+# process. The string address API is kept as a
+# thin layer over the handles, which can be used directly (e.g. #transferMany) to skip resolving the addresses.
 
-        self.name = name
 
-        self.address = secrets.token_hex(40)
-
-        self.tokens = tokens
-        self.balances = {}
+# View of an account of a ledger. It holds no balances itself, so it is cheap to create and always reflects the
+# balances of its ledger. The pool is an account of its ledger too.
+class Account:
+    def __init__(self, ledger, handle):
+        self.ledger = ledger
+        self.handle = handle
+        self.name = ledger.names[handle]
+        self.address = ledger.addresses[handle]
 
-        # Assign initial balances
-        for i in range(len(tokens)):
-            self.balances[tokens[i]] = balances[i]
+    # Balances of the account, token => balance
+    @property
+    def balances(self):
+        return AccountBalances(self.ledger, self.handle)
 
     def updateBalance(self, token, amount):
         checkInputTypes(string=(token), int256=(amount))
-        self.balances[token] += amount
+        self.ledger.setBalance(
+            self.address, token, self.ledger.balanceOf(self.address, token) + amount
+        )
+
+
+# Mutable view of the balances of an account. Copying it returns a plain dict with the current balances.
+class AccountBalances(MutableMapping):
+    def __init__(self, ledger, handle):
+        self.ledger = ledger
+        self.handle = handle
+
+    def __getitem__(self, token):
+        return self.ledger.getBalance(self.handle, self.ledger.tokenIds[token])
+
+    def __setitem__(self, token, amount):
+        self.ledger.setBalance(self.ledger.addresses[self.handle], token, amount)
+
+    def __delitem__(self, token):
+        raise TypeError("Balances can't be deleted")
+
+    def __iter__(self):
+        return iter(self.ledger.tokenIds)
 
-        # Check potential overflow/underflow that would happen in solidity
-        checkUInt256(self.balances[token])
+    def __len__(self):
+        return len(self.ledger.tokenIds)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return dict(self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+# Read only mapping address => Account of the accounts created through Ledger#createAccount
+class LedgerAccounts(Mapping):
+    def __init__(self, ledger):
+        self.ledger = ledger
+
+    def __getitem__(self, address):
+        return Account(self.ledger, self.ledger.accountHandles[address])
+
+    def __contains__(self, address):
+        return address in self.ledger.accountHandles
+
+    def __iter__(self):
+        return iter(self.ledger.accountHandles)
+
+    def __len__(self):
+        return len(self.ledger.accountHandles)
 
 
 # The ledger class is used to keep track of all accounts and their balances and to process the transfer of tokens
 # between them.
 class Ledger:
-    def __init__(self, initialAccounts):
-        self.accounts = dict()
+    def __init__(self, initialAccounts, seed=0):
+        # Seed of the account addresses, ledgers with different seeds get disjoint addresses
+        self.seed = seed
+        # token => token id, the index of the token balances column
+        self.tokenIds = {}
+        # token id => list of the balances of every account, indexed by handle
+        self.columns = []
+        # handle => address and name of every account, including the pools
+        self.addresses = []
+        self.names = []
+        # address => handle of every account
+        self.handles = {}
+        # address => handle of the accounts created with #createAccount, in creation order
+        self.accountHandles = {}
+        self.accounts = LedgerAccounts(self)
+        # (handle, token id) => balance written since the columns were shared with a fork, or None if they are not
+        # shared. A ledger sharing its columns never writes to them, so each fork only holds the balances it wrote.
+        self.overlay = None
+        # Whether the tokens and accounts indexes are shared with a fork and need to be copied before modifying them
+        self.indexesShared = False
+        # (handle, token id) => net balance delta of the transfers deferred in the open block, None if there is no
+        # open block
+        self.deferredDeltas = None
+        # Active journals recording the original balances touched
+        self.journals = []
+        # (handle, token id) => balance at the time of the fork of the balances written by this fork, and the number
+        # of accounts and tokens it was forked with. None if this ledger is not a fork.
+        self.forkBalances = None
+        self.forkSize = None
         for accountParams in initialAccounts:
             self.createAccount(accountParams[0], accountParams[1], accountParams[2])
 
+    ### @notice Creates an account with the given initial balances
+    ### @return The address of the account
     def createAccount(self, name, tokens, balances):
-        checkInputTypes(string=(name, *tokens), uint256=(balances))
-        account = Account(name, tokens, balances)
-        assert not self.accounts.__contains__(account.address)
-        self.accounts[account.address] = account
+        handle = self.registerAccount(name, tokens, balances)
+        self.accountHandles[self.addresses[handle]] = handle
+        return self.addresses[handle]
 
-    # Add transfer and receive tokens functions.
-    def transferToken(self, sender, recipient, token, amount):
-        checkInputTypes(account=(recipient), string=(token), uint256=(amount))
-        # Get the references to the Account recipient and sender
-        if type(recipient) == str:
-            recipient = self.getAccountWithAddress(recipient)
-        if type(sender) == str:
-            sender = self.getAccountWithAddress(sender)
+    ### @notice Creates an account that is not listed in #accounts, e.g. the account of a pool
+    ### @return The handle of the account
+    def registerAccount(self, name, tokens, balances):
+        checkBoundaryInputTypes(string=(name, *tokens), uint256=(balances))
+        assert len(tokens) == len(balances)
+        # Check uniquness of tokens list
+        assert len(set(tokens)) == len(tokens)
+        self._ownIndexes()
+
+        handle = len(self.addresses)
+        address = getAddress(self.seed, handle)
+        assert address not in self.handles
+        self.addresses.append(address)
+        self.names.append(name)
+        self.handles[address] = handle
+        if self.overlay is None:
+            for column in self.columns:
+                column.append(0)
+
+        # Assign initial balances
+        for (token, balance) in zip(tokens, balances):
+            self._writeBalance(handle, self.getTokenId(token), balance)
+        return handle
+
+    # Create a copy-on-write fork of the ledger. Balance columns are shared with this ledger, and from then on the
+    # balances written by either ledger are kept in its own overlay, entry by entry. A fork made within a block has no
+    # open block: its balances start as the ones read in the block, including the deferred deltas, which stay deferred
+    # in this ledger.
+    def fork(self):
+        if self.overlay is None:
+            self.overlay = {}
+        fork = Ledger.__new__(Ledger)
+        fork.__dict__.update(self.__dict__)
+        fork.columns = list(self.columns)
+        fork.overlay = dict(self.overlay)
+        fork.accounts = LedgerAccounts(fork)
+        self.indexesShared = True
+        fork.indexesShared = True
+        fork.journals = []
+        fork.deferredDeltas = None
+        for ((handle, tokenId), delta) in (self.deferredDeltas or {}).items():
+            fork._writeBalance(
+                handle, tokenId, fork._readBalance(handle, tokenId) + delta
+            )
+        fork.forkBalances = {}
+        fork.forkSize = (len(self.addresses), len(self.columns))
+        return fork
+
+    # Apply the balance changes and the new accounts and tokens of a fork of this ledger. Only the balances written by
+    # the fork are changed, by the same amount as in the fork, so transfers made on this ledger after forking (e.g. by
+    # other pools) are kept. The fork must be discarded afterwards.
+    def merge(self, fork):
+        require(fork.forkBalances is not None, "Not a fork")
+        require(fork.deferredDeltas is None, "Block open in the fork")
+        (numAccounts, numTokens) = fork.forkSize
+        require(
+            (len(self.addresses), len(self.columns)) == fork.forkSize
+            or (len(fork.addresses), len(fork.columns)) == fork.forkSize,
+            "Accounts created on both ledgers",
+        )
+        # Check every balance before writing any, so a failed merge changes nothing
+        balances = []
+        for ((handle, tokenId), forkBalance) in fork.forkBalances.items():
+            if handle < numAccounts and tokenId < numTokens:
+                delta = fork._readBalance(handle, tokenId) - forkBalance
+                balance = self._readBalance(handle, tokenId) + delta
+                # Including the deltas deferred in the open block, if any
+                require(
+                    self.getBalance(handle, tokenId) + delta >= 0,
+                    "Insufficient balance",
+                )
+                checkUInt256(self.getBalance(handle, tokenId) + delta)
+                balances.append((handle, tokenId, balance))
+        for (handle, tokenId, balance) in balances:
+            self._recordBalance(handle, tokenId)
+            self._writeBalance(handle, tokenId, balance)
 
-        balanceSenderBefore = sender.balances[token]
-        balanceReceiverBefore = recipient.balances[token]
+        if (len(fork.addresses), len(fork.columns)) != fork.forkSize:
+            self.tokenIds = fork.tokenIds
+            self.addresses = fork.addresses
+            self.names = fork.names
+            self.handles = fork.handles
+            self.accountHandles = fork.accountHandles
+            self.indexesShared = fork.indexesShared = True
+            if self.overlay is None:
+                for column in self.columns:
+                    column.extend([0] * (len(self.addresses) - numAccounts))
+            for tokenId in range(numTokens, len(fork.columns)):
+                self._addColumn()
+            # Balances of the new accounts, and of every account in the new tokens
+            for tokenId in range(len(self.columns)):
+                for handle in range(
+                    numAccounts if tokenId < numTokens else 0, len(self.addresses)
+                ):
+                    balance = fork._readBalance(handle, tokenId)
+                    if balance != 0:
+                        self._writeBalance(handle, tokenId, balance)
 
-        assert sender.balances[token] >= amount, "Insufficient balance"
+    ### @notice Gets the balance of an account at the time this ledger was forked, see #fork
+    def getForkBalance(self, handle, tokenId):
+        return self.forkBalances.get(
+            (handle, tokenId), self._readBalance(handle, tokenId)
+        )
 
-        sender.updateBalance(token, -amount)
+    ### @notice Gets the id of a token, adding a balances column for it if it is a new token
+    def getTokenId(self, token):
+        tokenId = self.tokenIds.get(token)
+        if tokenId is None:
+            self._ownIndexes()
+            tokenId = len(self.columns)
+            self.tokenIds[token] = tokenId
+            self._addColumn()
+        return tokenId
 
-        self.receiveToken(recipient, token, amount)
+    ### @notice Opens a block. Until it is closed, transfers are not written to the balances but netted per account
+    ### and token, and applied at once when the block closes.
+    ### @dev Balances read while the block is open, e.g. in the "IIA" check of the pool swap, include the deferred
+    ### deltas, and transfers still revert if the sender can't cover them at that point, so the results are the same
+    ### as without deferring. Blocks must not be opened or closed within a pool transaction.
+    def openBlock(self):
+        require(self.deferredDeltas is None, "Block already open")
+        self.deferredDeltas = {}
 
-        # Transfer health check
-        assert sender.balances[token] == balanceSenderBefore - amount
-        assert recipient.balances[token] == balanceReceiverBefore + amount
+    ### @notice Closes the open block, applying the net balance delta of every account and token
+    ### @return The number of (account, token) balances written
+    def closeBlock(self):
+        require(self.deferredDeltas is not None, "No open block")
+        deltas = self.deferredDeltas
+        self.deferredDeltas = None
+        written = 0
+        for ((handle, tokenId), delta) in deltas.items():
+            if delta != 0:
+                self._recordBalance(handle, tokenId)
+                self._writeBalance(
+                    handle, tokenId, self._readBalance(handle, tokenId) + delta
+                )
+                written += 1
+        return written
+
+    ### @notice Runs the calls made within the context in a block, see #openBlock
+    ### e.g. with ledger.block():
+    ###          pool.mint(...)
+    ###          pool.swap(...)
+    @contextlib.contextmanager
+    def block(self):
+        self.openBlock()
+        try:
+            yield
+        finally:
+            self.closeBlock()
+
+    ### @notice Gets the handle of the account with the given address
+    def getHandle(self, address):
+        return self.handles[address]
+
+    ### @notice Gets the balance of an account by handle and token id, including the deltas deferred in the open block
+    def getBalance(self, handle, tokenId):
+        balance = self._readBalance(handle, tokenId)
+        if self.deferredDeltas:
+            balance += self.deferredDeltas.get((handle, tokenId), 0)
+        return balance
+
+    # Add transfer and receive tokens functions.
+    def transferToken(self, sender, recipient, token, amount):
+        checkBoundaryInputTypes(account=(recipient), string=(token), uint256=(amount))
+        self._transfer(
+            self._resolveHandle(sender),
+            self._resolveHandle(recipient),
+            self.tokenIds[token],
+            amount,
+        )
+
+    ### @notice Applies a batch of transfers in order. Either all the transfers are applied or, if any of them
+    ### raises (a revert or any other exception, e.g. an invalid token id), none of them.
+    ### @param transfers List of (sender handle, recipient handle, token id, amount)
+    def transferMany(self, transfers):
+        applied = []
+        try:
+            for (sender, recipient, tokenId, amount) in transfers:
+                checkBoundaryInputTypes(uint256=(amount))
+                self._transfer(sender, recipient, tokenId, amount)
+                applied.append((sender, recipient, tokenId, amount))
+        except BaseException:
+            for (sender, recipient, tokenId, amount) in reversed(applied):
+                self._addDelta(recipient, tokenId, -amount)
+                self._addDelta(sender, tokenId, amount)
+            raise
 
     def receiveToken(self, recipient, token, amount):
-        if type(recipient) == str:
-            recipient = self.getAccountWithAddress(recipient)
+        checkBoundaryInputTypes(string=(token), uint256=(amount))
+        handle = self._resolveHandle(recipient)
+        tokenId = self.tokenIds[token]
+        self._recordBalance(handle, tokenId)
+        # Check potential overflow that would happen in solidity
+        checkUInt256(self.getBalance(handle, tokenId) + amount)
+        self._addDelta(handle, tokenId, amount)
+
+    # Apply the net balance deltas of a batch of transfers in a single pass. Deltas is a list of (account, token, delta)
+    # that must net out to zero for every token. Debits are applied before credits, so every account needs to cover
+    # its net payment.
+    def settle(self, deltas):
+        netDeltas = {}
+        for (account, token, delta) in deltas:
+            checkBoundaryInputTypes(string=(token), int256=(delta))
+            netDeltas[token] = netDeltas.get(token, 0) + delta
+        # Settlement health check
+        assert all(netDelta == 0 for netDelta in netDeltas.values())
 
-        checkInputTypes(string=(token), uint256=(amount))
-        recipient.updateBalance(token, amount)
+        for (account, token, delta) in sorted(deltas, key=lambda entry: entry[2]):
+            handle = self._resolveHandle(account)
+            tokenId = self.tokenIds[token]
+            self._recordBalance(handle, tokenId)
+            balance = self.getBalance(handle, tokenId) + delta
+            require(balance >= 0, "Insufficient balance")
+            checkUInt256(balance)
+            self._addDelta(handle, tokenId, delta)
 
     def getAccountWithAddress(self, address):
         return self.accounts[address]
 
     def balanceOf(self, address, token):
-        checkInputTypes(string=(address, token))
-        return self.accounts[address].balances[token]
+        checkBoundaryInputTypes(string=(address, token))
+        return self.getBalance(self.handles[address], self.tokenIds[token])
 
     # Force the balance of an account to ease the testing
     def setBalance(self, address, token, amount):
-        checkInputTypes(string=(address, token), uint256=amount)
-        self.accounts[address].balances[token] = amount
+        checkBoundaryInputTypes(string=(address, token), uint256=amount)
+        handle = self.handles[address]
+        tokenId = self.getTokenId(token)
+        self._recordBalance(handle, tokenId)
+        if self.deferredDeltas is not None:
+            self.deferredDeltas.pop((handle, tokenId), None)
+        self._writeBalance(handle, tokenId, amount)
+
+    def _transfer(self, sender, recipient, tokenId, amount):
+        self._recordBalance(sender, tokenId)
+        self._recordBalance(recipient, tokenId)
+        require(self.getBalance(sender, tokenId) >= amount, "Insufficient balance")
+        # Check potential overflow that would happen in solidity, before writing so a failed transfer changes nothing
+        checkUInt256(self.getBalance(recipient, tokenId) + amount)
+        self._addDelta(sender, tokenId, -amount)
+        self._addDelta(recipient, tokenId, amount)
+
+    # Adds a delta to a balance, or defers it to the close of the open block
+    def _addDelta(self, handle, tokenId, delta):
+        if self.deferredDeltas is None:
+            self._writeBalance(
+                handle, tokenId, self._readBalance(handle, tokenId) + delta
+            )
+        else:
+            key = (handle, tokenId)
+            self.deferredDeltas[key] = self.deferredDeltas.get(key, 0) + delta
+
+    # Accounts can be passed as handles, addresses or Account objects
+    def _resolveHandle(self, account):
+        if type(account) == int:
+            return account
+        if type(account) == str:
+            return self.handles[account]
+        return account.handle
+
+    # Raw balance, without the deferred deltas
+    def _readBalance(self, handle, tokenId):
+        if self.overlay is not None:
+            balance = self.overlay.get((handle, tokenId))
+            if balance is not None:
+                return balance
+            # Shared columns don't have the accounts created afterwards
+            column = self.columns[tokenId]
+            return column[handle] if handle < len(column) else 0
+        return self.columns[tokenId][handle]
+
+    def _writeBalance(self, handle, tokenId, amount):
+        if self.overlay is not None:
+            self.overlay[(handle, tokenId)] = amount
+        else:
+            self.columns[tokenId][handle] = amount
+
+    # Adds the balances column of a new token, all zero
+    def _addColumn(self):
+        self.columns.append(
+            [] if self.overlay is not None else [0] * len(self.addresses)
+        )
+
+    def _recordBalance(self, handle, tokenId):
+        if self.forkBalances is not None and (handle, tokenId) not in self.forkBalances:
+            self.forkBalances[(handle, tokenId)] = self._readBalance(handle, tokenId)
+        for journal in self.journals:
+            journal.recordBalance(self, handle, tokenId)
+            if self.deferredDeltas is not None:
+                journal.recordEntry(self.deferredDeltas, (handle, tokenId))
+
+    def _ownIndexes(self):
+        if self.indexesShared:
+            self.tokenIds = dict(self.tokenIds)
+            self.addresses = list(self.addresses)
+            self.names = list(self.names)
+            self.handles = dict(self.handles)
+            self.accountHandles = dict(self.accountHandles)
+            self.indexesShared = False
+
+
+### @notice Derives the address of the account with the given handle from the ledger seed
+### @return 80 hex characters address
+def getAddress(seed, handle):
+    return hashlib.blake2b(
+        "{}:{}".format(seed, handle).encode(), digest_size=40
+    ).hexdigest()
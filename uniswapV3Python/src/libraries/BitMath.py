@@ -0,0 +1,27 @@
+from .Shared import *
+
+### @title BitMath
+### @dev This library provides functionality for computing bit properties of an unsigned integer
+
+### @notice Returns the index of the most significant bit of the number,
+###     where the least significant bit is at index 0 and the most significant bit is at index 255
+### @dev The function satisfies the property:
+###     x >= 2**mostSignificantBit(x) and x < 2**(mostSignificantBit(x)+1)
+### @param x the value for which to compute the most significant bit, must be greater than 0
+### @return r the index of the most significant bit
+def mostSignificantBit(x):
+    checkUInt256(x)
+    require(x > 0)
+    return x.bit_length() - 1
+
+
+### @notice Returns the index of the least significant bit of the number,
+###     where the least significant bit is at index 0 and the most significant bit is at index 255
+### @dev The function satisfies the property:
+###     (x & 2**leastSignificantBit(x)) != 0 and (x & (2**(leastSignificantBit(x)) - 1)) == 0)
+### @param x the value for which to compute the least significant bit, must be greater than 0
+### @return r the index of the least significant bit
+def leastSignificantBit(x):
+    checkUInt256(x)
+    require(x > 0)
+    return (x & -x).bit_length() - 1
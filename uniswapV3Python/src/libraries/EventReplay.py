@@ -0,0 +1,237 @@
+from .Shared import *
+from . import TickMath
+import csv, dataclasses, gzip, json, time
+
+### @title Historical event replay
+### @notice Replays files of on-chain pool events through a pool, checking the amounts, prices and ticks it computes
+### against the recorded ones, to validate the model against mainnet.
+### @dev The replay is a pipeline of generators, so memory stays constant however large the input is:
+### readEvents (one record per line or CSV row) => parseEvents (typed fields) => replayEvents (pool calls and checks).
+### Only the accounts of the owners seen and the divergences reported (up to a limit) are kept.
+### Files are JSON lines or CSV with a header, optionally gzipped (.gz), with one event per record: an "event" field
+### with the event name and the event parameters under their Solidity names. Integers may be JSON numbers or strings.
+### Swaps are replayed as exact input swaps of the amount the pool received, limited to the recorded price. Exact
+### output swaps end at the same price, as the pool moves along the same curve. Flash events, which only add to the
+### fee growth, are not replayed and are counted as skipped, as are unknown events.
+
+# Balance of the accounts created for the owners and senders of the events, so they can pay for any call
+ACCOUNT_BALANCE = MAX_INT256 // 1000
+
+# Integer parameters of the replayed events
+INTEGER_FIELDS = {
+    "tickLower",
+    "tickUpper",
+    "amount",
+    "amount0",
+    "amount1",
+    "sqrtPriceX96",
+    "liquidity",
+    "tick",
+    "feeProtocol0New",
+    "feeProtocol1New",
+}
+
+
+## Difference between a recorded value and the value computed by the pool
+@dataclass
+class Divergence:
+    ## position of the event in the file
+    index: int
+    event: str
+    ## the mismatching field, or "revert" if the pool call reverted
+    field: str
+    expected: object
+    actual: object
+
+
+@dataclass
+class ReplayReport:
+    events: int = 0
+    skipped: int = 0
+    ## total number of divergences, including the ones not kept
+    divergenceCount: int = 0
+    ## the first divergences found
+    divergences: list = field(default_factory=list)
+    ## seconds
+    elapsed: float = 0.0
+
+    @property
+    def eventsPerSecond(self):
+        return self.events / self.elapsed if self.elapsed > 0 else 0.0
+
+
+### @notice Generator of the raw records of an event file, one dict per JSON line or CSV row
+def readEvents(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", newline="") as file:
+        if path.endswith(".csv") or path.endswith(".csv.gz"):
+            for row in csv.DictReader(file):
+                # Empty cells are parameters of other events
+                yield {key: value for (key, value) in row.items() if value != ""}
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+### @notice Generator of (name, fields) for every record, with the integer parameters converted to int
+def parseEvents(records):
+    for record in records:
+        fields = {
+            key: int(value) if key in INTEGER_FIELDS else value
+            for (key, value) in record.items()
+            if key != "event"
+        }
+        yield (record["event"], fields)
+
+
+### @notice Generator of (index, name, divergences) for every event, after replaying it on the pool
+### @param pool The pool replaying the events. Calls reverting are rolled back and reported as a divergence
+### @param events Iterable of (name, fields), see #parseEvents
+### @param accounts Mapping of on-chain addresses to ledger accounts, extended with the addresses seen
+def replayEvents(pool, events, accounts=None):
+    accounts = {} if accounts is None else accounts
+    tokens = [pool.token0, pool.token1]
+
+    def getAccount(address):
+        if address not in accounts:
+            accounts[address] = pool.ledger.createAccount(
+                address, tokens, [ACCOUNT_BALANCE, ACCOUNT_BALANCE]
+            )
+        return accounts[address]
+
+    for (index, (name, fields)) in enumerate(events):
+        handler = EVENT_HANDLERS.get(name)
+        if handler is None:
+            yield (index, name, None)
+            continue
+        try:
+            with pool.transaction():
+                actual = handler(pool, getAccount, fields)
+        except AssertionError as exception:
+            divergences = [Divergence(index, name, "revert", None, str(exception))]
+        else:
+            divergences = [
+                Divergence(index, name, key, fields[key], value)
+                for (key, value) in actual.items()
+                if key in fields and fields[key] != value
+            ]
+        yield (index, name, divergences)
+
+
+### @notice Replays an event file through a pool
+### @param pool The pool replaying the events, in the state before the first event, e.g. new for a full history
+### @param path The event file, see #readEvents
+### @param maxDivergences The number of divergences kept in the report
+### @return ReplayReport
+def replay(pool, path, maxDivergences=100):
+    report = ReplayReport()
+    start = time.perf_counter()
+    for (_, _, divergences) in replayEvents(pool, parseEvents(readEvents(path))):
+        report.events += 1
+        if divergences is None:
+            report.skipped += 1
+            continue
+        report.divergenceCount += len(divergences)
+        report.divergences.extend(
+            divergences[: maxDivergences - len(report.divergences)]
+        )
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+### @notice Writes pool events (see Events) to a JSON lines file that can be replayed, e.g. to record a simulation
+### @param sqrtPriceX96 The initial price of the pool, written as an Initialize event first, None to omit it
+def writeEvents(path, events, sqrtPriceX96=None):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt") as file:
+        if sqrtPriceX96 is not None:
+            tick = TickMath.getTickAtSqrtRatio(sqrtPriceX96)
+            record = {"event": "Initialize", "sqrtPriceX96": sqrtPriceX96, "tick": tick}
+            file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        for event in events:
+            record = {"event": type(event).__name__, **dataclasses.asdict(event)}
+            file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+# Every handler makes the pool call of an event and returns the values computed, by the name of the recorded field
+
+
+def replayInitialize(pool, getAccount, fields):
+    pool.initialize(fields["sqrtPriceX96"])
+    return {"tick": pool.slot0.tick}
+
+
+def replayMint(pool, getAccount, fields):
+    (amount0, amount1) = pool.mint(
+        getAccount(fields["owner"]),
+        fields["tickLower"],
+        fields["tickUpper"],
+        fields["amount"],
+    )
+    return {"amount0": amount0, "amount1": amount1}
+
+
+def replayBurn(pool, getAccount, fields):
+    (_, _, _, _, amount0, amount1) = pool.burn(
+        getAccount(fields["owner"]),
+        fields["tickLower"],
+        fields["tickUpper"],
+        fields["amount"],
+    )
+    return {"amount0": amount0, "amount1": amount1}
+
+
+def replayCollect(pool, getAccount, fields):
+    (_, _, _, amount0, amount1) = pool.collect(
+        getAccount(fields["owner"]),
+        fields["tickLower"],
+        fields["tickUpper"],
+        fields["amount0"],
+        fields["amount1"],
+    )
+    return {"amount0": amount0, "amount1": amount1}
+
+
+def replaySwap(pool, getAccount, fields):
+    zeroForOne = fields["amount0"] > 0
+    sqrtPriceLimitX96 = fields["sqrtPriceX96"]
+    # A swap too small to move the price ends at the current price, which is not a valid limit
+    if sqrtPriceLimitX96 == pool.slot0.sqrtPriceX96:
+        sqrtPriceLimitX96 = MIN_SQRT_RATIO + 1 if zeroForOne else MAX_SQRT_RATIO - 1
+    (_, amount0, amount1, sqrtPriceX96, liquidity, tick) = pool.swap(
+        getAccount(fields.get("sender", fields.get("recipient"))),
+        zeroForOne,
+        fields["amount0"] if zeroForOne else fields["amount1"],
+        sqrtPriceLimitX96,
+    )
+    return {
+        "amount0": amount0,
+        "amount1": amount1,
+        "sqrtPriceX96": sqrtPriceX96,
+        "liquidity": liquidity,
+        "tick": tick,
+    }
+
+
+def replaySetFeeProtocol(pool, getAccount, fields):
+    pool.setFeeProtocol(fields["feeProtocol0New"], fields["feeProtocol1New"])
+    return {}
+
+
+def replayCollectProtocol(pool, getAccount, fields):
+    (_, amount0, amount1) = pool.collectProtocol(
+        getAccount(fields["recipient"]), fields["amount0"], fields["amount1"]
+    )
+    return {"amount0": amount0, "amount1": amount1}
+
+
+EVENT_HANDLERS = {
+    "Initialize": replayInitialize,
+    "Mint": replayMint,
+    "Burn": replayBurn,
+    "Collect": replayCollect,
+    "Swap": replaySwap,
+    "SetFeeProtocol": replaySetFeeProtocol,
+    "CollectProtocol": replayCollectProtocol,
+}
@@ -0,0 +1,154 @@
+from .Shared import *
+import copy
+
+### @title Pool events
+### @notice Events emitted by the pool, with the same fields as the events of the Solidity contract. There is no
+### msg.sender in the Python pool, so the sender is the account passed to the call, the same as the owner or recipient.
+
+
+@dataclass
+class Mint:
+    sender: str
+    owner: str
+    tickLower: int
+    tickUpper: int
+    amount: int
+    amount0: int
+    amount1: int
+
+
+@dataclass
+class Collect:
+    owner: str
+    recipient: str
+    tickLower: int
+    tickUpper: int
+    amount0: int
+    amount1: int
+
+
+@dataclass
+class Burn:
+    owner: str
+    tickLower: int
+    tickUpper: int
+    amount: int
+    amount0: int
+    amount1: int
+
+
+@dataclass
+class Swap:
+    sender: str
+    recipient: str
+    amount0: int
+    amount1: int
+    sqrtPriceX96: int
+    liquidity: int
+    tick: int
+
+
+@dataclass
+class CollectProtocol:
+    sender: str
+    recipient: str
+    amount0: int
+    amount1: int
+
+
+### @title Event bus
+### @notice Keeps the last `capacity` events emitted in a preallocated ring buffer and calls the subscribers with every
+### event emitted. Every event gets a sequence number, its position in the stream of events emitted.
+### @dev The pool only builds the events when the bus is active, i.e. when the buffer has capacity or there are
+### subscribers, so emitting costs a single attribute check when nobody listens. Events emitted within a pool
+### transaction are held until the outermost transaction ends and dropped if it reverts, as in Solidity.
+class EventBus:
+    def __init__(self, capacity=0):
+        require(capacity >= 0, "Invalid capacity")
+        self.capacity = capacity
+        self.buffer = [None] * capacity
+        # Sequence number of the next event
+        self.sequence = 0
+        self.subscribers = []
+        # Events held by the transactions in progress, None if there is no transaction in progress
+        self.held = None
+        self.holdDepth = 0
+        self.active = capacity > 0
+
+    ### @notice Calls the callback with every event emitted from now on
+    ### @return The callback, to unsubscribe it
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+        self.active = True
+        return callback
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+        self.active = self.capacity > 0 or len(self.subscribers) > 0
+
+    ### @notice Resizes the ring buffer, keeping the latest events that fit
+    def setCapacity(self, capacity):
+        require(capacity >= 0, "Invalid capacity")
+        events = list(self.events())[-capacity:] if capacity > 0 else []
+        self.capacity = capacity
+        self.buffer = [None] * capacity
+        for (sequence, event) in events:
+            self.buffer[sequence % capacity] = event
+        self.active = capacity > 0 or len(self.subscribers) > 0
+
+    ### @notice Generator of the buffered events, oldest first
+    ### @param since The first sequence number to yield. Events already overwritten in the buffer are skipped
+    ### @return Generator of (sequence, event)
+    def events(self, since=0):
+        sequence = max(since, self.sequence - self.capacity)
+        while sequence < self.sequence:
+            # The buffer may have been overwritten while the caller consumed the previous events
+            sequence = max(sequence, self.sequence - self.capacity)
+            yield (sequence, self.buffer[sequence % self.capacity])
+            sequence += 1
+
+    def emit(self, event):
+        if self.held is not None:
+            self.held.append(event)
+        else:
+            self._publish(event)
+
+    ### @dev Starts holding the events emitted, see UniswapPool#transaction
+    ### @return Mark to discard the events held from this point on
+    def hold(self):
+        self.holdDepth += 1
+        if self.held is None:
+            self.held = []
+        return len(self.held)
+
+    ### @dev Drops the events held since the mark, emitted by a transaction that reverted
+    def discard(self, mark):
+        del self.held[mark:]
+
+    ### @dev Ends a hold, publishing the events held once the outermost transaction ends
+    def release(self):
+        self.holdDepth -= 1
+        if self.holdDepth == 0:
+            (held, self.held) = (self.held, None)
+            for event in held:
+                self._publish(event)
+
+    def _publish(self, event):
+        if self.capacity > 0:
+            self.buffer[self.sequence % self.capacity] = event
+        self.sequence += 1
+        for callback in self.subscribers:
+            callback(event)
+
+    ### @notice Copies of the bus, e.g. from a deepcopy, pickle or fork of the pool, keep the buffered events but not
+    ### the subscribers, which are not notified of what happens to the copies
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["subscribers"] = []
+        state["active"] = self.capacity > 0
+        return state
+
+    def __deepcopy__(self, memo):
+        bus = EventBus.__new__(EventBus)
+        bus.__dict__.update(copy.deepcopy(self.__getstate__(), memo))
+        return bus
@@ -1,4 +1,5 @@
-from .Shared import checkInputTypes
+from .Shared import checkBoundaryInputTypes, require, Revert
+from .PoolRegistry import PoolRegistry
 from ..UniswapPool import *
 
 ## @title Pool factory
@@ -6,7 +7,8 @@ from ..UniswapPool import *
 class Factory:
     def __init__(self):
         self.feeAmountTickSpacing = {500: 10, 3000: 60, 10000: 200}
-        self.getPool = []
+        # (token0, token1, fee) => pool, indexed by pair across fee tiers
+        self.pools = PoolRegistry()
 
     ## @notice Creates a pool for the given two tokens and fee
     ## @param tokenA One of the two tokens in the desired pool
@@ -16,38 +18,55 @@ class Factory:
     ## @dev tokenA and tokenB may be passed in either order: token0/token1 or token1/token0. tickSpacing is retrieved
     ## from the fee. The call will revert if the pool already exists, the fee is invalid, or the token arguments
     ## are invalid.
-    ## @return pool The address of the newly created pool
+    ## @return pool The newly created pool
     def createPool(self, tokenA, tokenB, fee, ledger):
-        checkInputTypes(string=(tokenA, tokenB), uint24=(fee))
-        assert tokenA != tokenB
+        checkBoundaryInputTypes(string=(tokenA, tokenB), uint24=(fee))
+        require(tokenA != tokenB)
 
         (token0, token1) = (tokenA, tokenB) if tokenA < tokenB else (tokenB, tokenA)
-        assert token0 != "0"
-        assert self.feeAmountTickSpacing.__contains__(fee), "Fee amount not supported"
-        assert self.feeAmountTickSpacing[fee] != 0
+        require(token0 != "0")
+        require(self.feeAmountTickSpacing.__contains__(fee), "Fee amount not supported")
+        require(self.feeAmountTickSpacing[fee] != 0)
         tickSpacing = self.feeAmountTickSpacing[fee]
 
-        if [token0, token1, fee] not in self.getPool:
-            self.getPool.append([token0, token1, fee])
-        else:
-            assert False, "Pool already exists"
+        require((token0, token1, fee) not in self.pools, "Pool already exists")
 
         pool = UniswapPool(token0, token1, fee, tickSpacing, ledger)
+        self.pools.register(pool)
 
         return pool
 
+    ## @notice Returns the pool for a given pair of tokens and a fee, or None if it does not exist
+    ## @dev tokenA and tokenB may be passed in either order: token0/token1 or token1/token0
+    ## @param tokenA The contract address of either token0 or token1
+    ## @param tokenB The contract address of the other token
+    ## @param fee The fee collected upon every swap in the pool, denominated in hundredths of a bip
+    ## @return pool The pool
+    def getPool(self, tokenA, tokenB, fee):
+        return self.pools.getPool(tokenA, tokenB, fee)
+
+    ## @notice Returns the pools for a given pair of tokens across all fee tiers
+    ## @dev tokenA and tokenB may be passed in either order
+    ## @return Dict fee => pool
+    def getPoolsForPair(self, tokenA, tokenB):
+        return self.pools.getPoolsForPair(tokenA, tokenB)
+
+    ## @notice Iterates over all the pools created by the factory, in creation order
+    def allPools(self):
+        return iter(self.pools)
+
     ## @notice Enables a fee amount with the given tickSpacing
     ## @dev Fee amounts may never be removed once enabled
     ## @param fee The fee amount to enable, denominated in hundredths of a bip (i.e. 1e-6)
     ## @param tickSpacing The spacing between ticks to be enforced for all pools created with the given fee amount
     def enableFeeAmount(self, fee, tickSpacing):
-        checkInputTypes(uint24=(fee), int24=(tickSpacing))
-        assert fee < 1000000
+        checkBoundaryInputTypes(uint24=(fee), int24=(tickSpacing))
+        require(fee < 1000000)
         ## tick spacing is capped at 16384 to prevent the situation where tickSpacing is so large that
         ## TickBitmap#nextInitializedTickWithinOneWord overflows int24 container from a valid tick
         ## 16384 ticks represents a >5x price change with ticks of 1 bips
-        assert tickSpacing > 0 and tickSpacing < 16384
-        assert (
+        require(tickSpacing > 0 and tickSpacing < 16384)
+        require(
             not self.feeAmountTickSpacing.__contains__(fee)
             or self.feeAmountTickSpacing[fee] == 0
         )
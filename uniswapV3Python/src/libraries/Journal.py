@@ -0,0 +1,63 @@
+import copy
+
+### @title Undo journal
+### @notice Records the original value of every piece of storage written during a transaction so it can be restored
+### if the transaction reverts. Only what is touched is recorded, so the cost is proportional to the writes made and
+### not to the size of the state.
+
+# Marker for storage entries that didn't exist before the transaction
+MISSING = object()
+
+
+class Journal:
+    def __init__(self):
+        # (mapping, key, original entry)
+        self.entries = []
+        self.recordedEntries = set()
+        # (ledger, account handle, token id, original balance)
+        self.balances = []
+        self.recordedBalances = set()
+        # (object, attribute name, original value)
+        self.fields = []
+
+    ### @notice Records the original entry of a storage mapping the first time the key is touched
+    def recordEntry(self, mapping, key):
+        recordKey = (id(mapping), key)
+        if recordKey in self.recordedEntries:
+            return
+        self.recordedEntries.add(recordKey)
+        # Entries are mutated in place, so keep a copy of the original
+        original = (
+            copy.copy(dict.__getitem__(mapping, key))
+            if dict.__contains__(mapping, key)
+            else MISSING
+        )
+        self.entries.append((mapping, key, original))
+
+    ### @notice Records the original balance of an account of a ledger the first time it is touched
+    def recordBalance(self, ledger, handle, tokenId):
+        recordKey = (id(ledger), handle, tokenId)
+        if recordKey in self.recordedBalances:
+            return
+        self.recordedBalances.add(recordKey)
+        self.balances.append(
+            (ledger, handle, tokenId, ledger._readBalance(handle, tokenId))
+        )
+
+    ### @notice Records the original value of some attributes of an object
+    def recordFields(self, obj, names):
+        for name in names:
+            self.fields.append((obj, name, copy.copy(getattr(obj, name))))
+
+    ### @notice Restores all the recorded storage to its original value
+    def rollback(self):
+        for (mapping, key, original) in reversed(self.entries):
+            if original is MISSING:
+                if dict.__contains__(mapping, key):
+                    del mapping[key]
+            else:
+                mapping[key] = original
+        for (ledger, handle, tokenId, balance) in reversed(self.balances):
+            ledger._writeBalance(handle, tokenId, balance)
+        for (obj, name, value) in reversed(self.fields):
+            setattr(obj, name, value)
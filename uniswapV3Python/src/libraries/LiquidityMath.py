@@ -1,4 +1,5 @@
 from . import TickMath
+from .Shared import require
 
 ### @title Math library for liquidity
 
@@ -10,9 +11,9 @@ def addDelta(x, y):
     if y < 0:
         z = x - abs(y)
         # Mimic solidity underflow
-        assert z >= 0, "LS"
+        require(z >= 0, "LS")
     else:
         z = x + abs(y)
         # Mimic solidity overflow check
-        assert z <= TickMath.MAX_UINT128, "LA"
+        require(z <= TickMath.MAX_UINT128, "LA")
     return z
@@ -0,0 +1,255 @@
+from .Shared import *
+from ..UniswapPool import UniswapPool
+import json, os
+
+### @title Operation log
+### @notice Appends every state-changing call of a pool, with its arguments, to a sequential log once the call has
+### succeeded, and periodically checkpoints the pool to a snapshot. After a crash, #restore loads the latest snapshot
+### and replays the log tail.
+### @dev The log directory holds the latest snapshot and the log segment started with it:
+### - snapshot-<sequence>.bin: pool snapshot (see PoolSnapshot) with every operation up to the sequence applied
+### - operations-<sequence>.log: one JSON line per operation logged after the snapshot, [sequence, operation, arguments]
+### Every checkpoint starts a new segment and then removes the previous snapshot and segment, so the log doesn't grow
+### beyond the operations since the last checkpoint, and restoring only reads those.
+### Operations are buffered and written in groups, which are fsynced once per group. Operations of a pool transaction
+### are held until the outermost transaction ends and dropped if it reverts, as they never happened.
+### Operations are appended after they have run, so a reverted call is never logged, but the operations not yet
+### written when the process crashes are lost: restoring recovers the pool as of the last fsynced group.
+### The hops of a Router swap (see Router#exactInput) are logged as swaps with the recipient of the route. Replaying a
+### hop has the recipient pay its input, so restoring the pools of a multi-hop route needs the recipient to hold the
+### intermediate tokens, or the pools restored on the same ledger in the order the route goes through them.
+
+LOG_PREFIX = "operations-"
+LOG_SUFFIX = ".log"
+SNAPSHOT_PREFIX = "snapshot-"
+SNAPSHOT_SUFFIX = ".bin"
+
+# Pool calls that change its state and are replayed
+OPERATIONS = {
+    "initialize",
+    "mint",
+    "burn",
+    "collect",
+    "swap",
+    "swapBatch",
+    "setFeeProtocol",
+    "collectProtocol",
+}
+
+
+class OperationLog:
+    ### @param directory The log directory, created if it doesn't exist
+    ### @param groupSize The number of operations written and fsynced together
+    ### @param checkpointInterval The number of operations between checkpoints, None to only checkpoint explicitly
+    def __init__(self, directory, groupSize=64, checkpointInterval=None):
+        require(groupSize > 0, "Invalid group size")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.groupSize = groupSize
+        self.checkpointInterval = checkpointInterval
+        self.pool = None
+        # Lines not written yet
+        self.buffer = []
+        # Operations held by the pool transactions in progress, None if there is no transaction in progress
+        self.held = None
+        self.holdDepth = 0
+
+        snapshot = getLatestSnapshot(directory)
+        self.lastCheckpoint = snapshot[0] if snapshot else None
+        path = getLogPath(directory, self.lastCheckpoint or 0)
+        (lastSequence, validSize) = scanRecords(path)
+        # Drop a partially written last line, left by a crash, so new records are not appended to it
+        if os.path.exists(path) and os.path.getsize(path) != validSize:
+            os.truncate(path, validSize)
+        # Sequence number of the last operation logged
+        self.sequence = max(lastSequence, self.lastCheckpoint or 0)
+        self.file = open(path, "a")
+
+    ### @notice Starts logging the operations of a pool. Checkpoints it first, so the log can be replayed from it.
+    def attach(self, pool):
+        require(pool.operationLog is None, "Pool already logged")
+        self.pool = pool
+        pool.operationLog = self
+        self.checkpoint()
+
+    def detach(self):
+        self.flush()
+        self.pool.operationLog = None
+        self.pool = None
+
+    ### @notice Appends an operation, called by the pool
+    def append(self, operation, args):
+        if self.held is not None:
+            self.held.append((operation, args))
+        else:
+            self._log(operation, args)
+
+    ### @notice Writes the buffered operations and fsyncs the log
+    def flush(self):
+        if self.buffer:
+            self.file.write("".join(self.buffer))
+            self.buffer = []
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    ### @notice Saves a snapshot of the pool with every operation logged so far applied and starts a new log segment,
+    ### removing the previous snapshot and segment
+    ### @dev The snapshot is complete before anything is removed: a crash at any point leaves either the previous
+    ### snapshot and segment or the new snapshot to restore from.
+    def checkpoint(self):
+        require(self.held is None, "Checkpoint within a transaction")
+        self.flush()
+        self.pool.save(getSnapshotPath(self.directory, self.sequence))
+        if self.lastCheckpoint != self.sequence:
+            self.file.close()
+            self.file = open(getLogPath(self.directory, self.sequence), "a")
+            self.removeBefore(self.sequence)
+        self.lastCheckpoint = self.sequence
+
+    ### @dev Removes the snapshots and log segments older than the checkpoint
+    def removeBefore(self, sequence):
+        for name in os.listdir(self.directory):
+            for (prefix, suffix) in [
+                (SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX),
+                (LOG_PREFIX, LOG_SUFFIX),
+            ]:
+                if (
+                    name.startswith(prefix)
+                    and name.endswith(suffix)
+                    and int(name[len(prefix) : -len(suffix)]) < sequence
+                ):
+                    os.remove(os.path.join(self.directory, name))
+
+    def close(self):
+        if self.pool is not None:
+            self.detach()
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    ### @dev Starts holding the operations logged, see UniswapPool#transaction
+    ### @return Mark to discard the operations held from this point on
+    def hold(self):
+        self.holdDepth += 1
+        if self.held is None:
+            self.held = []
+        return len(self.held)
+
+    ### @dev Drops the operations held since the mark, made by a transaction that reverted
+    def discard(self, mark):
+        del self.held[mark:]
+
+    ### @dev Ends a hold, logging the operations held once the outermost transaction ends
+    def release(self):
+        self.holdDepth -= 1
+        if self.holdDepth == 0:
+            (held, self.held) = (self.held, None)
+            for (operation, args) in held:
+                self._log(operation, args)
+
+    def _log(self, operation, args):
+        self.sequence += 1
+        self.buffer.append(
+            json.dumps([self.sequence, operation, args], separators=(",", ":")) + "\n"
+        )
+        if len(self.buffer) >= self.groupSize:
+            self.flush()
+        if (
+            self.checkpointInterval is not None
+            and self.sequence - self.lastCheckpoint >= self.checkpointInterval
+        ):
+            self.checkpoint()
+
+    # Copies and pickles of a logged pool are not logged
+    def __deepcopy__(self, memo):
+        return None
+
+    def __reduce__(self):
+        return (type(None), ())
+
+
+def getSnapshotPath(directory, sequence):
+    return os.path.join(directory, SNAPSHOT_PREFIX + str(sequence) + SNAPSHOT_SUFFIX)
+
+
+### @notice Path of the log segment with the operations logged after the snapshot of the sequence
+def getLogPath(directory, sequence):
+    return os.path.join(directory, LOG_PREFIX + str(sequence) + LOG_SUFFIX)
+
+
+### @notice Finds the latest snapshot of a log directory
+### @return (sequence, path) or None if there is no snapshot
+def getLatestSnapshot(directory):
+    snapshots = [
+        (int(name[len(SNAPSHOT_PREFIX) : -len(SNAPSHOT_SUFFIX)]), name)
+        for name in os.listdir(directory)
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX)
+    ]
+    if not snapshots:
+        return None
+    (sequence, name) = max(snapshots)
+    return (sequence, os.path.join(directory, name))
+
+
+### @notice Generator of the complete records of a log segment, [sequence, operation, arguments], streamed from the
+### file and ending at a partially written last line
+def readRecords(path):
+    for (record, _) in iterRecords(path):
+        yield record
+
+
+### @notice Finds the last complete record of a log segment without loading it
+### @return The sequence of the last record (0 if there is none) and the size in bytes of the complete records
+def scanRecords(path):
+    (lastSequence, validSize) = (0, 0)
+    for (record, size) in iterRecords(path):
+        (lastSequence, validSize) = (record[0], size)
+    return (lastSequence, validSize)
+
+
+def iterRecords(path):
+    if not os.path.exists(path):
+        return
+    size = 0
+    with open(path, "rb") as file:
+        for line in file:
+            if not line.endswith(b"\n"):
+                return
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return
+            size += len(line)
+            yield (record, size)
+
+
+### @notice Restores a pool from the latest snapshot of a log directory and the operations logged after it
+### @dev The operations are replayed against the ledger, whose accounts must be able to pay for them as they did
+### originally, e.g. a ledger rebuilt with the same accounts (see Ledger for deterministic addresses).
+### @param directory The log directory
+### @param ledger Reference to the ledger
+### @return The restored pool
+def restore(directory, ledger):
+    snapshot = getLatestSnapshot(directory)
+    require(snapshot is not None, "No snapshot")
+    (sequence, snapshotPath) = snapshot
+    pool = UniswapPool.load(snapshotPath, ledger)
+    for (recordSequence, operation, args) in readRecords(
+        getLogPath(directory, sequence)
+    ):
+        if recordSequence > sequence:
+            replay(pool, operation, args)
+    return pool
+
+
+### @notice Applies a logged operation to a pool
+def replay(pool, operation, args):
+    require(operation in OPERATIONS, "Unknown operation")
+    if operation == "swapBatch":
+        args = [[tuple(order) for order in args[0]]]
+    getattr(pool, operation)(*args)
@@ -0,0 +1,53 @@
+from .Shared import *
+
+## @title Pool registry
+## @notice Keeps track of pools by their tokens and fee, with an index of the pools of every token pair across fee tiers.
+## Registering and looking up pools are constant time operations.
+class PoolRegistry:
+    def __init__(self):
+        # (token0, token1, fee) => pool
+        self.pools = {}
+        # (token0, token1) => {fee => pool}
+        self.poolsByPair = {}
+        # token => list of the tokens it is paired with
+        self.pairedTokens = {}
+
+    ## @notice Registers a pool. Reverts if a pool with the same tokens and fee is already registered
+    def register(self, pool):
+        key = (pool.token0, pool.token1, pool.fee)
+        require(key not in self.pools, "Pool already exists")
+        self.pools[key] = pool
+        pair = (pool.token0, pool.token1)
+        if pair not in self.poolsByPair:
+            self.poolsByPair[pair] = {}
+            self.pairedTokens.setdefault(pool.token0, []).append(pool.token1)
+            self.pairedTokens.setdefault(pool.token1, []).append(pool.token0)
+        self.poolsByPair[pair][pool.fee] = pool
+
+    ## @notice Gets the pool of the two tokens, in either order, and fee
+    ## @return The pool or None if there is no such pool
+    def getPool(self, tokenA, tokenB, fee):
+        return self.pools.get(sortTokens(tokenA, tokenB) + (fee,))
+
+    ## @notice Gets the pools of the two tokens, in either order, across all fee tiers
+    ## @return Dict fee => pool
+    def getPoolsForPair(self, tokenA, tokenB):
+        return dict(self.poolsByPair.get(sortTokens(tokenA, tokenB), {}))
+
+    ## @notice Gets the tokens paired with the token in any pool
+    def getPairedTokens(self, token):
+        return list(self.pairedTokens.get(token, []))
+
+    def __contains__(self, key):
+        return key in self.pools
+
+    def __iter__(self):
+        return iter(self.pools.values())
+
+    def __len__(self):
+        return len(self.pools)
+
+
+## @notice Sorts two tokens as the token0 and token1 of their pool
+def sortTokens(tokenA, tokenB):
+    return (tokenA, tokenB) if tokenA < tokenB else (tokenB, tokenA)
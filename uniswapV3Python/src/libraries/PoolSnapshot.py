@@ -0,0 +1,255 @@
+from .Shared import *
+from .Position import PositionInfo
+import os, struct
+
+### @title Pool snapshot
+### @notice Compact binary format with the full state of a pool, to save it and load it much faster than replaying
+### the mints that built it.
+### @dev Layout, big-endian, with the integers wider than 64 bits as fixed-width byte strings:
+### - header: magic, version, fee, tick spacing and the number of strings, ticks, bitmap words and positions
+### - pool state: slot0, fee growth, protocol fees, liquidity, pool token balances and whether the bitmap is walked
+### - strings: token0, token1 and the position owners, each prefixed by its length in bytes
+### - ticks, sorted: tick, TickInfo fields and the cached sqrt price
+### - tickBitmap words: word position and word
+### - positions: owner index in the strings, tickLower, tickUpper and PositionInfo fields
+
+MAGIC = b"UV3POOL\x00"
+VERSION = 1
+# magic, version, fee, tickSpacing, numStrings, numTicks, numWords, numPositions
+HEADER = struct.Struct(">8sIIiIIII")
+# sqrtPriceX96, tick, feeProtocol, feeGrowthGlobal0X128, feeGrowthGlobal1X128, protocolFees.token0,
+# protocolFees.token1, liquidity, balance0, balance1, useTickBitmap
+STATE = struct.Struct(">20siB32s32s16s16s16s32s32s?")
+STRING_LENGTH = struct.Struct(">H")
+# tick, liquidityGross, liquidityNet, feeGrowthOutside0X128, feeGrowthOutside1X128, sqrtPriceX96
+TICK = struct.Struct(">i16s16s32s32s20s")
+# wordPos, word
+WORD = struct.Struct(">h32s")
+# owner, tickLower, tickUpper, liquidity, feeGrowthInside0LastX128, feeGrowthInside1LastX128, tokensOwed0,
+# tokensOwed1
+POSITION = struct.Struct(">Iii16s32s32s16s16s")
+
+
+## Full state of a pool, as written to and read from a snapshot file
+@dataclass
+class Snapshot:
+    token0: str
+    token1: str
+    fee: int
+    tickSpacing: int
+    ## (sqrtPriceX96, tick, feeProtocol)
+    slot0: tuple
+    feeGrowthGlobal0X128: int
+    feeGrowthGlobal1X128: int
+    ## (token0, token1)
+    protocolFees: tuple
+    liquidity: int
+    ## (balance0, balance1) of the pool
+    balances: tuple
+    useTickBitmap: bool
+    ## tick => TickInfo, sorted by tick
+    ticks: dict
+    ## wordPos => word
+    tickBitmap: dict
+    ## (owner, tickLower, tickUpper) => PositionInfo
+    positions: dict
+
+
+def toBytes(number, size, signed=False):
+    return number.to_bytes(size, "big", signed=signed)
+
+
+def fromBytes(data, signed=False):
+    return int.from_bytes(data, "big", signed=signed)
+
+
+### @notice Writes a snapshot to a file
+### @dev The file is written to a temporary path and renamed, so a partially written snapshot is never loaded
+def write(path, snapshot):
+    owners = {}
+    for (owner, _, _) in snapshot.positions:
+        owners.setdefault(owner, len(owners) + 2)
+    strings = [snapshot.token0, snapshot.token1] + list(owners)
+
+    chunks = [
+        HEADER.pack(
+            MAGIC,
+            VERSION,
+            snapshot.fee,
+            snapshot.tickSpacing,
+            len(strings),
+            len(snapshot.ticks),
+            len(snapshot.tickBitmap),
+            len(snapshot.positions),
+        ),
+        STATE.pack(
+            toBytes(snapshot.slot0[0], 20),
+            snapshot.slot0[1],
+            snapshot.slot0[2],
+            toBytes(snapshot.feeGrowthGlobal0X128, 32),
+            toBytes(snapshot.feeGrowthGlobal1X128, 32),
+            toBytes(snapshot.protocolFees[0], 16),
+            toBytes(snapshot.protocolFees[1], 16),
+            toBytes(snapshot.liquidity, 16),
+            toBytes(snapshot.balances[0], 32),
+            toBytes(snapshot.balances[1], 32),
+            snapshot.useTickBitmap,
+        ),
+    ]
+    for string in strings:
+        encoded = string.encode()
+        chunks.append(STRING_LENGTH.pack(len(encoded)))
+        chunks.append(encoded)
+    for tick in sorted(snapshot.ticks):
+        info = snapshot.ticks[tick]
+        chunks.append(
+            TICK.pack(
+                tick,
+                toBytes(info.liquidityGross, 16),
+                toBytes(info.liquidityNet, 16, signed=True),
+                toBytes(info.feeGrowthOutside0X128, 32),
+                toBytes(info.feeGrowthOutside1X128, 32),
+                toBytes(info.sqrtPriceX96, 20),
+            )
+        )
+    for (wordPos, word) in snapshot.tickBitmap.items():
+        chunks.append(WORD.pack(wordPos, toBytes(word, 32)))
+    for ((owner, tickLower, tickUpper), info) in snapshot.positions.items():
+        chunks.append(
+            POSITION.pack(
+                owners[owner],
+                tickLower,
+                tickUpper,
+                toBytes(info.liquidity, 16),
+                toBytes(info.feeGrowthInside0LastX128, 32),
+                toBytes(info.feeGrowthInside1LastX128, 32),
+                toBytes(info.tokensOwed0, 16),
+                toBytes(info.tokensOwed1, 16),
+            )
+        )
+
+    tmpPath = path + ".tmp"
+    with open(tmpPath, "wb") as file:
+        file.write(b"".join(chunks))
+    os.replace(tmpPath, path)
+
+
+### @notice Reads a snapshot written by #write in a single pass over the file
+### @dev Invalid files raise ValueError explicitly, not asserts, so they are rejected when running python with -O too
+def read(path):
+    with open(path, "rb") as file:
+        data = memoryview(file.read())
+    if len(data) < HEADER.size:
+        raise ValueError("Invalid pool snapshot")
+    (
+        magic,
+        version,
+        fee,
+        tickSpacing,
+        numStrings,
+        numTicks,
+        numWords,
+        numPositions,
+    ) = HEADER.unpack_from(data)
+    ## the tokens are the first two strings
+    if magic != MAGIC or version != VERSION or numStrings < 2:
+        raise ValueError("Invalid pool snapshot")
+    if len(data) < HEADER.size + STATE.size:
+        raise ValueError("Truncated pool snapshot")
+    (
+        sqrtPriceX96,
+        currentTick,
+        feeProtocol,
+        feeGrowthGlobal0X128,
+        feeGrowthGlobal1X128,
+        protocolFees0,
+        protocolFees1,
+        liquidity,
+        balance0,
+        balance1,
+        useTickBitmap,
+    ) = STATE.unpack_from(data, HEADER.size)
+    offset = HEADER.size + STATE.size
+
+    strings = []
+    for _ in range(numStrings):
+        if offset + STRING_LENGTH.size > len(data):
+            raise ValueError("Truncated pool snapshot")
+        (length,) = STRING_LENGTH.unpack_from(data, offset)
+        offset += STRING_LENGTH.size
+        strings.append(str(data[offset : offset + length], "utf-8"))
+        offset += length
+
+    sectionsEnd = (
+        offset
+        + numTicks * TICK.size
+        + numWords * WORD.size
+        + numPositions * POSITION.size
+    )
+    if len(data) != sectionsEnd:
+        raise ValueError("Truncated pool snapshot")
+
+    end = offset + numTicks * TICK.size
+    ticks = {
+        tick: TickInfo(
+            fromBytes(liquidityGross),
+            fromBytes(liquidityNet, signed=True),
+            fromBytes(feeGrowthOutside0X128),
+            fromBytes(feeGrowthOutside1X128),
+            fromBytes(tickSqrtPriceX96),
+        )
+        for (
+            tick,
+            liquidityGross,
+            liquidityNet,
+            feeGrowthOutside0X128,
+            feeGrowthOutside1X128,
+            tickSqrtPriceX96,
+        ) in TICK.iter_unpack(data[offset:end])
+    }
+    offset = end
+
+    end = offset + numWords * WORD.size
+    tickBitmap = {
+        wordPos: fromBytes(word)
+        for (wordPos, word) in WORD.iter_unpack(data[offset:end])
+    }
+    offset = end
+
+    positions = {}
+    for (
+        owner,
+        tickLower,
+        tickUpper,
+        positionLiquidity,
+        feeGrowthInside0LastX128,
+        feeGrowthInside1LastX128,
+        tokensOwed0,
+        tokensOwed1,
+    ) in POSITION.iter_unpack(data[offset:]):
+        if owner >= numStrings:
+            raise ValueError("Invalid pool snapshot")
+        positions[(strings[owner], tickLower, tickUpper)] = PositionInfo(
+            fromBytes(positionLiquidity),
+            fromBytes(feeGrowthInside0LastX128),
+            fromBytes(feeGrowthInside1LastX128),
+            fromBytes(tokensOwed0),
+            fromBytes(tokensOwed1),
+        )
+
+    return Snapshot(
+        strings[0],
+        strings[1],
+        fee,
+        tickSpacing,
+        (fromBytes(sqrtPriceX96), currentTick, feeProtocol),
+        fromBytes(feeGrowthGlobal0X128),
+        fromBytes(feeGrowthGlobal1X128),
+        (fromBytes(protocolFees0), fromBytes(protocolFees1)),
+        fromBytes(liquidity),
+        (fromBytes(balance0), fromBytes(balance1)),
+        useTickBitmap,
+        ticks,
+        tickBitmap,
+        positions,
+    )
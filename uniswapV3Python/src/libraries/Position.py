@@ -27,20 +27,28 @@ def get(self, owner, tickLower, tickUpper):
     checkInputTypes(account=owner, int24=(tickLower, tickUpper))
 
     # Need to handle non-existing positions in Python
-    key = hash((owner, tickLower, tickUpper))
+    key = getKey(owner, tickLower, tickUpper)
     if not self.__contains__(key):
         # We don't want to create a new position if it doesn't exist!
         # In the case of collect we add an assert after that so it reverts.
         # For mint there is an amount > 0 check so it is OK to initialize
         # In burn if the position is not initialized, when calling Position.update it will revert with "NP"
         self[key] = PositionInfo(0, 0, 0, 0, 0)
-    return self[key]
+    # The callers modify the position in place
+    return getMutable(self, key)
+
+
+### @notice Returns the key of a position in the positions mapping
+### @dev The key is the packed tuple itself rather than its hash, which Python salts per process for strings, so the
+### keys are the same in every process and run, and pickled pools can be shared between processes
+def getKey(owner, tickLower, tickUpper):
+    return (owner, tickLower, tickUpper)
 
 
 def assertPositionExists(self, owner, tickLower, tickUpper):
     checkInputTypes(account=owner, int24=(tickLower, tickLower))
     positionInfo = get(self, owner, tickLower, tickUpper)
-    assert positionInfo != PositionInfo(0, 0, 0, 0, 0), "Position doesn't exist"
+    require(positionInfo != PositionInfo(0, 0, 0, 0, 0), "Position doesn't exist")
     return positionInfo
 
 
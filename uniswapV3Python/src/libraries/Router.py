@@ -0,0 +1,247 @@
+from .Shared import *
+from . import TickMath
+import contextlib
+
+## @title Multi-hop router and quoter
+## @notice Quotes and executes exact input and exact output swaps along a path of pools found in a pool registry.
+## A path is a list alternating tokens and fee tiers, from the input to the output token,
+## e.g. [tokenIn, 3000, tokenMid, 500, tokenOut].
+## @dev Quotes use the read-only UniswapPool#quoteSwap, so quoting many candidate routes doesn't copy any pool. As in
+## the Solidity quoter, every hop of a multi-hop quote is quoted against the current state of its pool.
+## @param registry The pool registry to route through, e.g. Factory#pools
+class Router:
+    def __init__(self, registry):
+        self.registry = registry
+
+    ## @notice Quotes the amount received for swapping an exact input amount along a path
+    ## @param path The path of the swap, from the input to the output token
+    ## @param amountIn The amount of the input token to swap
+    ## @return amountOut The amount of the output token received
+    ## @return sqrtPriceX96AfterList The price of every pool after its swap
+    ## @return initializedTicksCrossedList The number of initialized ticks crossed in every pool
+    def quoteExactInput(self, path, amountIn):
+        checkBoundaryInputTypes(uint256=(amountIn))
+        hops = self.getHops(path)
+        sqrtPriceX96AfterList = []
+        initializedTicksCrossedList = []
+        ## the output of every hop is the input of the next one
+        amount = amountIn
+        for (pool, tokenIn, tokenOut) in hops:
+            (amount, sqrtPriceX96After, ticksCrossed) = Router._quoteHop(
+                pool, tokenIn, tokenOut, amount
+            )
+            sqrtPriceX96AfterList.append(sqrtPriceX96After)
+            initializedTicksCrossedList.append(len(ticksCrossed))
+        return (amount, sqrtPriceX96AfterList, initializedTicksCrossedList)
+
+    ## @notice Quotes the amount to pay to receive an exact output amount along a path
+    ## @dev The hops are quoted in reverse, from the output token to the input token
+    ## @param path The path of the swap, from the input to the output token
+    ## @param amountOut The amount of the output token to receive
+    ## @return amountIn The amount of the input token to pay
+    ## @return sqrtPriceX96AfterList The price of every pool after its swap, in path order
+    ## @return initializedTicksCrossedList The number of initialized ticks crossed in every pool, in path order
+    def quoteExactOutput(self, path, amountOut):
+        checkBoundaryInputTypes(uint256=(amountOut))
+        hops = self.getHops(path)
+        sqrtPriceX96AfterList = []
+        initializedTicksCrossedList = []
+        ## the input of every hop is the output of the previous one
+        amount = amountOut
+        for (pool, tokenIn, tokenOut) in reversed(hops):
+            (amount, sqrtPriceX96After, ticksCrossed) = Router._quoteHop(
+                pool, tokenIn, tokenOut, -amount
+            )
+            sqrtPriceX96AfterList.insert(0, sqrtPriceX96After)
+            initializedTicksCrossedList.insert(0, len(ticksCrossed))
+        return (amount, sqrtPriceX96AfterList, initializedTicksCrossedList)
+
+    ## @notice Swaps an exact input amount along a path. The recipient pays the input token and receives the output
+    ## token; the intermediate tokens go from pool to pool.
+    ## @dev The hops run as a transaction of all the pools of the path and the token transfers of all the hops are
+    ## netted and settled at the end, so the whole swap is reverted if any hop or the settlement reverts.
+    ## @param recipient The account paying the input and receiving the output
+    ## @param path The path of the swap, from the input to the output token
+    ## @param amountIn The amount of the input token to swap
+    ## @param amountOutMinimum The minimum amount of the output token to receive
+    ## @return amountOut The amount of the output token received
+    def exactInput(self, recipient, path, amountIn, amountOutMinimum):
+        checkBoundaryInputTypes(
+            accounts=(recipient), uint256=(amountIn, amountOutMinimum)
+        )
+        hops = self.getHops(path)
+        amount = amountIn
+        with Router._transaction(hops) as deltas:
+            for (pool, tokenIn, tokenOut) in hops:
+                amount = Router._swapHop(
+                    pool, tokenIn, tokenOut, amount, recipient, deltas
+                )
+            require(amount >= amountOutMinimum, "Too little received")
+            Router._settle(hops, recipient, deltas)
+        return amount
+
+    ## @notice Swaps along a path to receive an exact output amount. The recipient pays the input token and receives
+    ## the output token; the intermediate tokens go from pool to pool.
+    ## @dev The hops are executed in reverse, from the output token to the input token, as in the Solidity router.
+    ## See #exactInput for the settlement.
+    ## @param recipient The account paying the input and receiving the output
+    ## @param path The path of the swap, from the input to the output token
+    ## @param amountOut The amount of the output token to receive
+    ## @param amountInMaximum The maximum amount of the input token to pay
+    ## @return amountIn The amount of the input token paid
+    def exactOutput(self, recipient, path, amountOut, amountInMaximum):
+        checkBoundaryInputTypes(
+            accounts=(recipient), uint256=(amountOut, amountInMaximum)
+        )
+        hops = self.getHops(path)
+        amount = amountOut
+        with Router._transaction(hops) as deltas:
+            for (pool, tokenIn, tokenOut) in reversed(hops):
+                amount = Router._swapHop(
+                    pool, tokenIn, tokenOut, -amount, recipient, deltas
+                )
+            require(amount <= amountInMaximum, "Too much requested")
+            Router._settle(hops, recipient, deltas)
+        return amount
+
+    ## @notice Finds the path between two tokens that gives the most output for an exact input amount
+    ## @param maxHops The maximum number of pools in the path
+    ## @return path The best path, None if there is no path that can be quoted
+    ## @return amountOut The amount received along the best path
+    def quoteBestExactInput(self, tokenIn, tokenOut, amountIn, maxHops):
+        best = (None, 0)
+        for path in self.getPaths(tokenIn, tokenOut, maxHops):
+            try:
+                amountOut = self.quoteExactInput(path, amountIn)[0]
+            except AssertionError:
+                continue
+            if best[0] is None or amountOut > best[1]:
+                best = (path, amountOut)
+        return best
+
+    ## @notice Finds the path between two tokens that costs the least input for an exact output amount
+    ## @param maxHops The maximum number of pools in the path
+    ## @return path The best path, None if there is no path that can be quoted
+    ## @return amountIn The amount paid along the best path
+    def quoteBestExactOutput(self, tokenIn, tokenOut, amountOut, maxHops):
+        best = (None, 0)
+        for path in self.getPaths(tokenIn, tokenOut, maxHops):
+            try:
+                amountIn = self.quoteExactOutput(path, amountOut)[0]
+            except AssertionError:
+                continue
+            if best[0] is None or amountIn < best[1]:
+                best = (path, amountIn)
+        return best
+
+    ## @notice Gets all the paths of the registry from one token to another, without repeating tokens
+    ## @param maxHops The maximum number of pools in a path
+    ## @return List of paths
+    def getPaths(self, tokenIn, tokenOut, maxHops):
+        paths = []
+        ## depth first search over the tokens, extending each path with every fee tier of the pair
+        stack = [[tokenIn]]
+        while stack:
+            path = stack.pop()
+            token = path[-1]
+            for nextToken in self.registry.getPairedTokens(token):
+                if nextToken in path[::2]:
+                    continue
+                for fee in sorted(self.registry.getPoolsForPair(token, nextToken)):
+                    nextPath = path + [fee, nextToken]
+                    if nextToken == tokenOut:
+                        paths.append(nextPath)
+                    elif len(nextPath) // 2 < maxHops:
+                        stack.append(nextPath)
+        return paths
+
+    ## @notice Splits a path into its hops
+    ## @return List of (pool, tokenIn, tokenOut) for every hop
+    def getHops(self, path):
+        require(len(path) >= 3 and len(path) % 2 == 1, "Invalid path")
+        hops = []
+        for i in range(0, len(path) - 1, 2):
+            (tokenIn, fee, tokenOut) = path[i : i + 3]
+            pool = self.registry.getPool(tokenIn, tokenOut, fee)
+            require(pool is not None, "Pool doesn't exist")
+            hops.append((pool, tokenIn, tokenOut))
+        return hops
+
+    ## @dev Quotes a single hop without a price limit. Exact output hops must be fully filled.
+    ## @param amountSpecified Exact input when positive, exact output when negative
+    ## @return amountCalculated The output amount for exact input, the input amount for exact output
+    ## @return sqrtPriceX96After The price of the pool after the swap
+    ## @return ticksCrossed The initialized ticks crossed
+    def _quoteHop(pool, tokenIn, tokenOut, amountSpecified):
+        zeroForOne = tokenIn < tokenOut
+        (amount0, amount1, sqrtPriceX96After, _, _, ticksCrossed) = pool.quoteSwap(
+            zeroForOne, amountSpecified, Router._sqrtPriceLimit(zeroForOne)
+        )
+        amountCalculated = Router._getAmountCalculated(
+            zeroForOne, amountSpecified, amount0, amount1
+        )
+        return (amountCalculated, sqrtPriceX96After, ticksCrossed)
+
+    ## @dev Executes the swap of a single hop on the pool curve, adding the token transfers owed to the deltas. The
+    ## Swap event of every hop has the recipient of the route as sender and recipient.
+    ## A logged pool logs the hop as a swap with the recipient of the route, which replays to the same pool state and
+    ## balances, with the recipient paying the input and receiving the output of the hop (see OperationLog)
+    ## @return amountCalculated The output amount for exact input, the input amount for exact output
+    def _swapHop(pool, tokenIn, tokenOut, amountSpecified, recipient, deltas):
+        zeroForOne = tokenIn < tokenOut
+        sqrtPriceLimitX96 = Router._sqrtPriceLimit(zeroForOne)
+        (amount0, amount1, state) = pool._executeSwap(
+            zeroForOne, amountSpecified, sqrtPriceLimitX96
+        )
+        pool._emitSwap(recipient, amount0, amount1, state)
+        if pool.operationLog is not None:
+            pool.operationLog.append(
+                "swap", [recipient, zeroForOne, amountSpecified, sqrtPriceLimitX96]
+            )
+        for (token, amount) in ((pool.token0, amount0), (pool.token1, amount1)):
+            key = (pool.address, token)
+            deltas[key] = deltas.get(key, 0) + amount
+        return Router._getAmountCalculated(
+            zeroForOne, amountSpecified, amount0, amount1
+        )
+
+    ## @dev Gets the output amount of an exact input swap or the input amount of an exact output swap
+    def _getAmountCalculated(zeroForOne, amountSpecified, amount0, amount1):
+        (amountIn, amountOut) = (
+            (amount0, -amount1) if zeroForOne else (amount1, -amount0)
+        )
+        if amountSpecified > 0:
+            return amountOut
+        ## the output of an exact output hop is the input of the next hop, so it must be fully received
+        require(amountOut == -amountSpecified, "Insufficient liquidity")
+        return amountIn
+
+    def _sqrtPriceLimit(zeroForOne):
+        return (
+            TickMath.MIN_SQRT_RATIO + 1 if zeroForOne else TickMath.MAX_SQRT_RATIO - 1
+        )
+
+    ## @dev Runs the hops within a transaction of every pool of the path. Yields the dict (address, token) => delta of
+    ## the balance of every pool. The hops logged by a pool are held by its transaction and dropped if the route reverts
+    @contextlib.contextmanager
+    def _transaction(hops):
+        pools = {id(pool): pool for (pool, _, _) in hops}.values()
+        with contextlib.ExitStack() as stack:
+            for pool in pools:
+                stack.enter_context(pool.transaction())
+            yield {}
+
+    ## @dev Settles the balance deltas of the pools, which net out to what the recipient pays and receives
+    def _settle(hops, recipient, deltas):
+        ledger = hops[0][0].ledger
+        pools = {pool.address: pool for (pool, _, _) in hops}
+        settlement = []
+        recipientDeltas = {}
+        for ((address, token), delta) in deltas.items():
+            if delta != 0:
+                settlement.append((pools[address], token, delta))
+                recipientDeltas[token] = recipientDeltas.get(token, 0) - delta
+        for (token, delta) in recipientDeltas.items():
+            if delta != 0:
+                settlement.append((recipient, token, delta))
+        ledger.settle(settlement)
@@ -11,7 +11,7 @@ from . import TickMath
 def add(x, y):
     checkInputTypes(uint256=(x, y))
     z = x + y
-    assert z <= TickMath.MAX_UINT256
+    require(z <= TickMath.MAX_UINT256)
     return z
 
 
@@ -22,7 +22,7 @@ def add(x, y):
 def sub(x, y):
     checkInputTypes(uint256=(x, y))
     z = x - y
-    assert z >= 0
+    require(z >= 0)
     return z
 
 
@@ -33,7 +33,7 @@ def sub(x, y):
 def mul(x, y):
     checkInputTypes(uint256=(x, y))
     z = x * y
-    assert z <= TickMath.MAX_UINT256
+    require(z <= TickMath.MAX_UINT256)
     return z
 
 
@@ -44,7 +44,7 @@ def mul(x, y):
 def addInts(x, y):
     checkInputTypes(int256=(x, y))
     z = x + y
-    assert z >= TickMath.MIN_INT256 and z <= TickMath.MAX_UINT256
+    require(z >= TickMath.MIN_INT256 and z <= TickMath.MAX_UINT256)
     return z
 
 
@@ -55,5 +55,5 @@ def addInts(x, y):
 def subInts(x, y):
     checkInputTypes(int256=(x, y))
     z = x - y
-    assert z >= TickMath.MIN_INT256 and z <= TickMath.MAX_UINT256
+    require(z >= TickMath.MIN_INT256 and z <= TickMath.MAX_UINT256)
     return z
@@ -1,5 +1,6 @@
 from decimal import *
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import bisect, copy
 
 # ------------------ Constants ------------------ #
 
@@ -45,43 +46,187 @@ class TickInfo:
     ## only has relative meaning, not absolute — the value depends on when the tick is initialized
     feeGrowthOutside0X128: int
     feeGrowthOutside1X128: int
+    ## sqrt(price) at the tick, cached when the tick is created since it never changes. 0 if not cached
+    sqrtPriceX96: int = field(default=0, compare=False)
+
+
+# ------------------ Shared mappings ------------------ #
+
+# Storage mapping whose entries can be shared with forks of it. Forking copies the mapping itself (only pointers),
+# and from then on both mappings copy an entry the first time it is accessed, so writes to the entries (which are
+# mutated in place, e.g. a TickInfo in Tick.cross) never leak from one mapping into the other. Entries that are
+# never accessed are never copied. Values obtained by iterating (values(), items()) are shared and must only be read.
+# Active journals (see Journal.py) record the original entries touched, so they can be restored on revert.
+class StorageMapping(dict):
+    def __init__(self, *args):
+        super().__init__(*args)
+        # Keys of the entries owned by this mapping, or None if no entry is shared with a fork
+        self.ownedKeys = None
+        self.journals = []
+
+    # Reads return the entry as stored, which may be shared with a fork. Entries modified in place must be got with
+    # #getMutable instead, so reading never copies or journals anything.
+
+    ### @notice Gets an entry to modify it in place. The entry is recorded in the active journals and, if it is shared
+    ### with a fork, copied first.
+    def getMutable(self, key):
+        if self.journals:
+            self._recordEntry(key)
+        value = dict.__getitem__(self, key)
+        if self.ownedKeys is not None and key not in self.ownedKeys:
+            value = copy.copy(value)
+            dict.__setitem__(self, key, value)
+            self.ownedKeys.add(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if self.journals:
+            self._recordEntry(key)
+        dict.__setitem__(self, key, value)
+        if self.ownedKeys is not None:
+            self.ownedKeys.add(key)
+
+    def __delitem__(self, key):
+        if self.journals:
+            self._recordEntry(key)
+        dict.__delitem__(self, key)
+        if self.ownedKeys is not None:
+            self.ownedKeys.discard(key)
+
+    def pop(self, key, *default):
+        if dict.__contains__(self, key):
+            value = dict.__getitem__(self, key)
+            del self[key]
+            return value
+        return dict.pop(self, key, *default)
+
+    def clear(self):
+        for key in list(self.keys()):
+            del self[key]
+
+    def __reduce__(self):
+        # Copies and pickles own all their entries
+        return (self.__class__, (dict(self),))
+
+    ### @notice Creates a mapping sharing all the entries with this one. Entries are copied when first modified.
+    ### @return The forked mapping
+    def fork(self):
+        fork = self.__class__.__new__(self.__class__)
+        dict.update(fork, self)
+        fork.__dict__.update(self.__dict__)
+        self.ownedKeys = set()
+        fork.ownedKeys = set()
+        fork.journals = []
+        return fork
+
+    def _recordEntry(self, key):
+        for journal in self.journals:
+            journal.recordEntry(self, key)
+
+
+# Mapping of initialized ticks (int24 => TickInfo) that keeps a sorted list of its keys, so the next initialized tick
+# can be found with a binary search instead of sorting all the keys on every swap step. The index is kept in sync on
+# every insertion and deletion (e.g. Tick.update and Tick.clear), so it behaves like a normal dict for everything else.
+class TickMapping(StorageMapping):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.sortedTicks = sorted(dict.keys(self))
+        # Whether the sorted index is shared with a fork and needs to be copied before modifying it
+        self.sortedTicksShared = False
+
+    def __setitem__(self, key, value):
+        if not dict.__contains__(self, key):
+            self._ownSortedTicks()
+            bisect.insort(self.sortedTicks, key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._ownSortedTicks()
+        del self.sortedTicks[bisect.bisect_left(self.sortedTicks, key)]
+
+    def fork(self):
+        fork = super().fork()
+        self.sortedTicksShared = True
+        fork.sortedTicksShared = True
+        return fork
+
+    def _ownSortedTicks(self):
+        if self.sortedTicksShared:
+            self.sortedTicks = list(self.sortedTicks)
+            self.sortedTicksShared = False
+
+    ### @notice Returns the closest initialized tick to the left of (or equal to) the given tick
+    ### @return The tick or None if there is no initialized tick to the left
+    def tickLte(self, tick):
+        index = bisect.bisect_right(self.sortedTicks, tick)
+        return self.sortedTicks[index - 1] if index > 0 else None
+
+    ### @notice Returns the closest initialized tick to the right of (strictly greater than) the given tick
+    ### @return The tick or None if there is no initialized tick to the right
+    def tickGt(self, tick):
+        index = bisect.bisect_right(self.sortedTicks, tick)
+        return self.sortedTicks[index] if index < len(self.sortedTicks) else None
+
+    ### @notice Returns the initialized ticks greater than tickLower and lower than or equal to tickUpper, in order
+    def ticksBetween(self, tickLower, tickUpper):
+        return self.sortedTicks[
+            bisect.bisect_right(self.sortedTicks, tickLower) : bisect.bisect_right(
+                self.sortedTicks, tickUpper
+            )
+        ]
+
+
+# ------------------ Reverts ------------------ #
+
+# Emulates a Solidity revert. It subclasses AssertionError so reverts can still be handled as failed asserts, but it
+# is raised explicitly so, unlike an assert statement, it is not stripped when running python with -O. Plain asserts
+# are only used for health checks and input type checks, which can safely be stripped.
+class Revert(AssertionError):
+    pass
+
+
+### @notice Reverts with the given code if the condition doesn't hold, as Solidity's require
+def require(condition, code=""):
+    if not condition:
+        raise Revert(code)
 
 
 # ------------------ Shared typechecking ------------------ #
 
 
 def checkUInt128(number):
-    assert number >= 0 and number <= MAX_UINT128, "OF or UF of UINT128"
+    require(number >= 0 and number <= MAX_UINT128, "OF or UF of UINT128")
     assert type(number) == int, "Not an integer"
 
 
 def checkInt128(number):
-    assert number >= MIN_INT128 and number <= MAX_INT128, "OF or UF of INT128"
+    require(number >= MIN_INT128 and number <= MAX_INT128, "OF or UF of INT128")
     assert type(number) == int, "Not an integer"
 
 
 def checkInt256(number):
-    assert number >= MIN_INT256 and number <= MAX_INT256, "OF or UF of INT256"
+    require(number >= MIN_INT256 and number <= MAX_INT256, "OF or UF of INT256")
     assert type(number) == int, "Not an integer"
 
 
 def checkUInt160(number):
-    assert number >= 0 and number <= MAX_UINT160, "OF or UF of UINT160"
+    require(number >= 0 and number <= MAX_UINT160, "OF or UF of UINT160")
     assert type(number) == int, "Not an integer"
 
 
 def checkUInt256(number):
-    assert number >= 0 and number <= MAX_UINT256, "OF or UF of UINT256"
+    require(number >= 0 and number <= MAX_UINT256, "OF or UF of UINT256")
     assert type(number) == int, "Not an integer"
 
 
 def checkUInt8(number):
-    assert number >= 0 and number <= MAX_UINT8, "OF or UF of UINT8"
+    require(number >= 0 and number <= MAX_UINT8, "OF or UF of UINT8")
     assert type(number) == int, "Not an integer"
 
 
 def checkInt24(number):
-    assert number >= MIN_INT24 and number <= MAX_INT24, "OF or UF of INT24"
+    require(number >= MIN_INT24 and number <= MAX_INT24, "OF or UF of INT24")
     assert type(number) == int, "Not an integer"
 
 
@@ -98,7 +243,7 @@ def checkDecimal(input):
 
 
 def checkDict(input):
-    assert type(input) == dict
+    assert isinstance(input, dict)
 
 
 def checkAccount(address):
@@ -124,8 +269,48 @@ def toUint128(number):
     return number
 
 
+# ------------------ Validation level ------------------ #
+
+# Input type checks run on every call of every function, including the math libraries in the inner swap loop, where
+# the inputs have already been validated by the pool entry points. The validation level sets which checks run:
+# - strict: all functions validate their inputs (default)
+# - boundary: only the public entry points of the pool, ledger and factory validate their inputs
+# - off: no input validation at all
+# Checks that emulate Solidity reverts (e.g. overflows or "SPL") are part of the logic and always run.
+VALIDATION_STRICT = "strict"
+VALIDATION_BOUNDARY = "boundary"
+VALIDATION_OFF = "off"
+
+validationLevel = VALIDATION_STRICT
+
+
+### @notice Sets the global validation level
+### @return The previous validation level
+def setValidationLevel(level):
+    global validationLevel
+    assert level in (VALIDATION_STRICT, VALIDATION_BOUNDARY, VALIDATION_OFF)
+    previousLevel = validationLevel
+    validationLevel = level
+    return previousLevel
+
+
+def getValidationLevel():
+    return validationLevel
+
+
 # General checkInput function for all functions that take input parameters
 def checkInputTypes(**kwargs):
+    if validationLevel == VALIDATION_STRICT:
+        checkTypes(kwargs)
+
+
+# Same as checkInputTypes for the public entry points, which also validate their inputs in the boundary level
+def checkBoundaryInputTypes(**kwargs):
+    if validationLevel != VALIDATION_OFF:
+        checkTypes(kwargs)
+
+
+def checkTypes(kwargs):
     if "string" in kwargs:
         loopChecking(kwargs.get("string"), checkString)
     if "decimal" in kwargs:
@@ -151,6 +336,10 @@ def checkInputTypes(**kwargs):
 
 
 def loopChecking(tuple, fcn):
+    # Strings are checked as a whole, not character by character
+    if type(tuple) == str:
+        fcn(tuple)
+        return
     try:
         iter(tuple)
     except TypeError:
@@ -165,22 +354,31 @@ def loopChecking(tuple, fcn):
 # ------------------ Shared utility functions ------------------ #
 
 
+# Packed tuple key of a limit position, deterministic across processes like Position.getKey
 def getHashLimit(owner, tick, isToken0):
     checkInputTypes(account=owner, int24=tick, bool=isToken0)
-    return hash((owner, tick, isToken0))
+    return (owner, tick, isToken0)
 
 
 def assertLimitPositionExists(self, owner, tick, isToken0):
     checkInputTypes(account=owner, int24=(tick), bool=isToken0)
     key = getHashLimit(owner, tick, isToken0)
-    assert self.__contains__(key), "Position doesn't exist"
+    require(self.__contains__(key), "Position doesn't exist")
     return key
 
 
 def assertLimitPositionIsBurnt(self, owner, tick, isToken0):
     checkInputTypes(account=owner, int24=(tick), bool=isToken0)
     key = getHashLimit(owner, tick, isToken0)
-    assert not self.__contains__(key), "Position exists"
+    require(not self.__contains__(key), "Position exists")
+
+
+# Gets an entry of a mapping to modify it in place, see StorageMapping#getMutable. Plain dicts, as used in the library
+# tests, return the entry itself.
+def getMutable(mapping, key):
+    if isinstance(mapping, StorageMapping):
+        return mapping.getMutable(key)
+    return mapping[key]
 
 
 # Mimic Solidity uninitialized ticks in Python - inserting keys to an empty value in a map
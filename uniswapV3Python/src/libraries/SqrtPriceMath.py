@@ -39,17 +39,17 @@ def getNextSqrtPriceFromAmount0RoundingUp(sqrtPX96, liquidity, amount, add):
                 return result
         result = math.ceil(numerator1 / SafeMath.add((numerator1 // sqrtPX96), amount))
         # Adding assert to detect wrong behaviour
-        assert result <= MAX_UINT160, "Overflow when casting to UINT160"
+        require(result <= MAX_UINT160, "Overflow when casting to UINT160")
         return result
 
     else:
         ## if the product overflows, we know the denominator underflows
         ## in addition, we must check that the denominator does not underflow
         product = amount * sqrtPX96
-        assert product < MAX_UINT256 and numerator1 > product
+        require(product < MAX_UINT256 and numerator1 > product)
         denominator = numerator1 - product
         result = FullMath.mulDivRoundingUp(numerator1, sqrtPX96, denominator)
-        assert result <= MAX_UINT160, "Overflow when casting to UINT160"
+        require(result <= MAX_UINT160, "Overflow when casting to UINT160")
         return result
 
 
@@ -85,7 +85,7 @@ def getNextSqrtPriceFromAmount1RoundingDown(sqrtPX96, liquidity, amount, add):
             else FullMath.mulDivRoundingUp(amount, FixedPoint96_Q96, liquidity)
         )
 
-        assert sqrtPX96 > quotient
+        require(sqrtPX96 > quotient)
         ## always fits 160 bits
         result = sqrtPX96 - quotient
 
@@ -104,8 +104,8 @@ def getNextSqrtPriceFromInput(sqrtPX96, liquidity, amountIn, zeroForOne):
     checkInputTypes(
         uint160=sqrtPX96, uint128=liquidity, uint256=amountIn, bool=zeroForOne
     )
-    assert sqrtPX96 > 0
-    assert liquidity > 0
+    require(sqrtPX96 > 0)
+    require(liquidity > 0)
 
     ## round to make sure that we don't pass the target price
     return (
@@ -128,8 +128,8 @@ def getNextSqrtPriceFromOutput(sqrtPX96, liquidity, amountOut, zeroForOne):
     checkInputTypes(
         uint160=sqrtPX96, uint128=liquidity, uint256=amountOut, bool=zeroForOne
     )
-    assert sqrtPX96 > 0
-    assert liquidity > 0
+    require(sqrtPX96 > 0)
+    require(liquidity > 0)
 
     ## round to make sure that we pass the target price
     return (
@@ -159,7 +159,7 @@ def getAmount0Delta(sqrtRatioAX96, sqrtRatioBX96, liquidity, roundUp):
     numerator2 = sqrtRatioBX96 - sqrtRatioAX96
     assert numerator2 >= 0
 
-    assert sqrtRatioAX96 > 0
+    require(sqrtRatioAX96 > 0)
     if roundUp:
         return FullMath.divRoundingUp(
             FullMath.mulDivRoundingUp(numerator1, numerator2, sqrtRatioBX96),
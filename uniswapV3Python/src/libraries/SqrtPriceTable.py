@@ -0,0 +1,116 @@
+from . import TickMath
+from .Shared import *
+import mmap, os, struct, sys
+
+### @title Precomputed sqrt price table
+### @notice Binary file with the result of TickMath.getSqrtRatioAtTick for a contiguous range of ticks, by default every
+### tick from MIN_TICK to MAX_TICK (1,774,545 entries, ~35.5MB). The file is memory mapped when loaded, so every
+### process using the same table shares a single copy in the page cache.
+### @dev Layout: a header with the magic, the format version and the first and last ticks of the table, followed by
+### one big-endian unsigned 160-bit integer (ENTRY_SIZE bytes) per tick, in increasing tick order.
+
+MAGIC = b"SQRTPX96"
+VERSION = 1
+# magic, version, minTick, maxTick
+HEADER = struct.Struct(">8sIii")
+ENTRY_SIZE = 20
+
+# Number of ticks computed and written at once when generating a table
+CHUNK_SIZE = 2**16
+
+
+class SqrtPriceTable:
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        # Raised explicitly, not asserted, so a corrupt table is never used when running python with -O
+        try:
+            if len(self.mmap) < HEADER.size:
+                raise ValueError("Invalid sqrt price table")
+            (magic, version, self.minTick, self.maxTick) = HEADER.unpack_from(self.mmap)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("Invalid sqrt price table")
+            if (
+                len(self.mmap)
+                != HEADER.size + (self.maxTick - self.minTick + 1) * ENTRY_SIZE
+            ):
+                raise ValueError("Truncated sqrt price table")
+        except ValueError:
+            self.mmap.close()
+            raise
+        self.path = path
+
+    ### @notice Looks up the sqrt price at a tick
+    ### @return The sqrt price, or None if the tick is not in the table
+    def lookup(self, tick):
+        if tick < self.minTick or tick > self.maxTick:
+            return None
+        offset = HEADER.size + (tick - self.minTick) * ENTRY_SIZE
+        return int.from_bytes(self.mmap[offset : offset + ENTRY_SIZE], "big")
+
+    def close(self):
+        self.mmap.close()
+
+
+### @notice Writes a table with the sqrt price of every tick in [minTick, maxTick], computed with the formula
+### @dev The file is written to a temporary path and renamed, so a partially written table is never loaded
+def generate(path, minTick=MIN_TICK, maxTick=MAX_TICK):
+    checkInputTypes(int24=(minTick, maxTick))
+    require(MIN_TICK <= minTick and minTick <= maxTick and maxTick <= MAX_TICK, "T")
+    tmpPath = path + ".tmp"
+    with open(tmpPath, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, minTick, maxTick))
+        for chunkStart in range(minTick, maxTick + 1, CHUNK_SIZE):
+            chunkEnd = min(chunkStart + CHUNK_SIZE, maxTick + 1)
+            file.write(
+                b"".join(
+                    TickMath.computeSqrtRatioAtTick(tick).to_bytes(ENTRY_SIZE, "big")
+                    for tick in range(chunkStart, chunkEnd)
+                )
+            )
+    os.replace(tmpPath, path)
+
+
+### @notice Memory maps a table generated by #generate
+### @return The table, or None if there is no table at the path
+def load(path):
+    if not os.path.exists(path):
+        return None
+    return SqrtPriceTable(path)
+
+
+### @notice Loads a table and makes TickMath.getSqrtRatioAtTick read from it. If the table is absent the formula
+### keeps being used.
+### @return Whether the table was installed
+def install(path):
+    table = load(path)
+    if table is None:
+        return False
+    TickMath.setSqrtPriceTable(table)
+    return True
+
+
+### @notice Checks every entry of a table against the formula
+### @return The ticks whose entry doesn't match the formula
+def verify(table):
+    mismatches = []
+    for tick in range(table.minTick, table.maxTick + 1):
+        if table.lookup(tick) != TickMath.computeSqrtRatioAtTick(tick):
+            mismatches.append(tick)
+    return mismatches
+
+
+# Usage: python -m uniswapV3Python.src.libraries.SqrtPriceTable generate|verify <path>
+if __name__ == "__main__":
+    (command, path) = sys.argv[1:3]
+    if command == "generate":
+        generate(path)
+    elif command == "verify":
+        table = load(path)
+        if table is None:
+            sys.exit("No table at " + path)
+        mismatches = verify(table)
+        print("{} mismatching ticks".format(len(mismatches)))
+        sys.exit(1 if mismatches else 0)
+    else:
+        sys.exit("Unknown command " + command)
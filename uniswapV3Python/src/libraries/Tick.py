@@ -9,7 +9,7 @@ from .Shared import *
 ###     e.g., a tickSpacing of 3 requires ticks to be initialized every 3rd tick i.e., ..., -6, -3, 0, 3, 6, ...
 ### @return The max liquidity per tick
 def tickSpacingToMaxLiquidityPerTick(tickSpacing):
-    checkInt24(tickSpacing)
+    checkInputTypes(int24=tickSpacing)
     minTick = math.ceil(TickMath.MIN_TICK / tickSpacing) * tickSpacing
     maxTick = math.floor(TickMath.MAX_TICK / tickSpacing) * tickSpacing
     assert abs(maxTick) >= abs(minTick)  # Health check
@@ -18,6 +18,22 @@ def tickSpacingToMaxLiquidityPerTick(tickSpacing):
     return TickMath.MAX_UINT128 // numTicks
 
 
+### @notice Gets the sqrt price at a tick, reading the price cached in the tick info when the tick is initialized
+### @dev The boundary ticks are precomputed constants. Reading doesn't copy the tick info of a forked mapping
+### @param self The mapping containing all tick information for initialized ticks
+### @param tick The tick for which to compute the sqrt price
+### @return The sqrt price at the tick, as TickMath.getSqrtRatioAtTick
+def getSqrtRatioAtTick(self, tick):
+    info = dict.get(self, tick)
+    if info is not None and info.sqrtPriceX96 != 0:
+        return info.sqrtPriceX96
+    if tick == TickMath.MIN_TICK:
+        return TickMath.MIN_SQRT_RATIO
+    if tick == TickMath.MAX_TICK:
+        return TickMath.MAX_SQRT_RATIO
+    return TickMath.getSqrtRatioAtTick(tick)
+
+
 ### @notice Retrieves fee growth data
 ### @param self The mapping containing all tick information for initialized ticks
 ### @param tickLower The lower tick boundary of the position
@@ -100,13 +116,14 @@ def update(
     if not self.__contains__(tick):
         assert liquidityDelta > 0, "Avoid creating empty tick"
         insertUninitializedTickstoMapping(self, [tick])
+        self[tick].sqrtPriceX96 = TickMath.getSqrtRatioAtTick(tick)
 
-    info = self[tick]
+    info = getMutable(self, tick)
 
     liquidityGrossBefore = info.liquidityGross
     liquidityGrossAfter = LiquidityMath.addDelta(liquidityGrossBefore, liquidityDelta)
 
-    assert liquidityGrossAfter <= maxLiquidity, "LO"
+    require(liquidityGrossAfter <= maxLiquidity, "LO")
 
     flipped = (liquidityGrossAfter == 0) != (liquidityGrossBefore == 0)
 
@@ -135,7 +152,7 @@ def update(
 ### @param tick The tick that will be cleared
 def clear(self, tick):
     checkInputTypes(dict=self, int24=tick)
-    # Assumption that the key (tick) exists (it should)
+    # Assumption that the key (tick) exists (it should). Deleting it also removes it from the sorted index of a TickMapping
     del self[tick]
 
 
@@ -160,7 +177,7 @@ def cross(
     )
     ## TickBitMap is passed by reference so all changes will be applied to the original dict
     ## TickBitMap = dict(uint256 tick => TickInfo)
-    info = tickBitmap[tick]
+    info = getMutable(tickBitmap, tick)
     info.feeGrowthOutside0X128 = feeGrowthGlobal0X128 - info.feeGrowthOutside0X128
     info.feeGrowthOutside1X128 = feeGrowthGlobal1X128 - info.feeGrowthOutside1X128
     liquidityNet = info.liquidityNet
@@ -0,0 +1,80 @@
+from . import BitMath
+from .Shared import *
+
+### @title Packed tick initialized state library
+### @notice Stores a packed mapping of tick index to its initialized state
+### @dev The mapping uses int16 for keys since ticks are represented as int24 and there are 256 (2^8) values per word.
+
+### @notice Computes the position in the mapping where the initialized bit for a tick lives
+### @param tick The tick for which to compute the position
+### @return wordPos The key in the mapping containing the word in which the bit is stored
+### @return bitPos The bit position in the word where the flag is stored
+def position(tick):
+    wordPos = tick >> 8
+    bitPos = tick & 0xFF
+    return (wordPos, bitPos)
+
+
+### @notice Flips the initialized state for a given tick from false to true, or vice versa
+### @param self The mapping in which to flip the tick
+### @param tick The tick to flip
+### @param tickSpacing The spacing between usable ticks
+def flipTick(self, tick, tickSpacing):
+    checkInputTypes(dict=self, int24=(tick, tickSpacing))
+    require(tick % tickSpacing == 0)  ## ensure that the tick is spaced
+    (wordPos, bitPos) = position(tick // tickSpacing)
+    mask = 1 << bitPos
+    # Mimic Solidity uninitialized words in the mapping
+    word = self.get(wordPos, 0) ^ mask
+    if word == 0:
+        # Remove empty words so the mapping only holds words with initialized ticks
+        self.pop(wordPos, None)
+    else:
+        self[wordPos] = word
+
+
+### @notice Returns the next initialized tick contained in the same word (or adjacent word) as the tick that is either
+### to the left (less than or equal to) or right (greater than) of the given tick
+### @param self The mapping in which to compute the next initialized tick
+### @param tick The starting tick
+### @param tickSpacing The spacing between usable ticks
+### @param lte Whether to search for the next initialized tick to the left (less than or equal to the starting tick)
+### @return next The next initialized or uninitialized tick up to 256 ticks away from the current tick
+### @return initialized Whether the next tick is initialized, as the function only searches within up to 256 ticks
+def nextInitializedTickWithinOneWord(self, tick, tickSpacing, lte):
+    checkInputTypes(dict=self, int24=(tick, tickSpacing))
+    ## floor division rounds towards negative infinity, as the Solidity code does explicitly for negative ticks
+    compressed = tick // tickSpacing
+
+    if lte:
+        (wordPos, bitPos) = position(compressed)
+        ## all the 1s at or to the right of the current bitPos
+        mask = (1 << bitPos) - 1 + (1 << bitPos)
+        masked = self.get(wordPos, 0) & mask
+
+        ## if there are no initialized ticks to the right of or at the current tick, return rightmost in the word
+        initialized = masked != 0
+        ## overflow/underflow is possible, but prevented externally by limiting both tickSpacing and tick
+        next = (
+            (compressed - (bitPos - BitMath.mostSignificantBit(masked))) * tickSpacing
+            if initialized
+            else (compressed - bitPos) * tickSpacing
+        )
+    else:
+        ## start from the word of the next tick, since the current tick state doesn't matter
+        (wordPos, bitPos) = position(compressed + 1)
+        ## all the 1s at or to the left of the bitPos
+        mask = ~((1 << bitPos) - 1) & MAX_UINT256
+        masked = self.get(wordPos, 0) & mask
+
+        ## if there are no initialized ticks to the left of the current tick, return leftmost in the word
+        initialized = masked != 0
+        ## overflow/underflow is possible, but prevented externally by limiting both tickSpacing and tick
+        next = (
+            (compressed + 1 + (BitMath.leastSignificantBit(masked) - bitPos))
+            * tickSpacing
+            if initialized
+            else (compressed + 1 + (MAX_UINT8 - bitPos)) * tickSpacing
+        )
+
+    return (next, initialized)
@@ -1,4 +1,26 @@
 from .Shared import *
+import math
+
+# Natural logarithms used to estimate the tick at a sqrt price
+LOG_Q96 = 96 * math.log(2)
+LOG_SQRT10001 = math.log(1.0001) / 2
+# Distance, in ticks, from a tick boundary under which the float estimate of the tick is checked exactly. The float
+# error is ~1e-9 ticks and the rounding of the prices at the lowest ticks ~5e-6 ticks.
+TICK_ESTIMATE_MARGIN = 1e-3
+
+# Precomputed sqrt price table (see SqrtPriceTable.py) that #getSqrtRatioAtTick reads from when set. The formula is
+# used for the ticks outside of the table or if no table is set.
+sqrtPriceTable = None
+
+
+### @notice Sets the sqrt price table read by #getSqrtRatioAtTick, None to always use the formula
+### @return The previous table
+def setSqrtPriceTable(table):
+    global sqrtPriceTable
+    previousTable = sqrtPriceTable
+    sqrtPriceTable = table
+    return previousTable
+
 
 ### @notice Calculates sqrt(1.0001^tick) * 2^96
 ### @dev Throws if |tick| > max tick
@@ -6,9 +28,21 @@ from .Shared import *
 ### @return sqrtPriceX96 A Fixed point Q64.96 number representing the sqrt of the ratio of the two assets (token1/token0)
 ### at the given tick
 def getSqrtRatioAtTick(tick):
-    checkInt24(tick)
+    checkInputTypes(int24=tick)
+    require(abs(tick) <= MAX_TICK, "T")
+
+    if sqrtPriceTable is not None:
+        sqrtPriceX96 = sqrtPriceTable.lookup(tick)
+        if sqrtPriceX96 is not None:
+            return sqrtPriceX96
+
+    return computeSqrtRatioAtTick(tick)
+
+
+### @notice Calculates sqrt(1.0001^tick) * 2^96 with the bit by bit formula, without reading the sqrt price table
+### @dev The tick is expected to be valid, see #getSqrtRatioAtTick
+def computeSqrtRatioAtTick(tick):
     absTick = abs(tick)
-    assert absTick <= MAX_TICK, "T"
 
     ratio = (
         0xFFFCB933BD6FAD37AA2D162D1A594001
@@ -75,9 +109,9 @@ def getSqrtRatioAtTick(tick):
 ### @param sqrtPriceX96 The sqrt ratio for which to compute the tick as a Q64.96
 ### @return tick The greatest tick for which the ratio is less than or equal to the input ratio
 def getTickAtSqrtRatio(sqrtPriceX96):
-    checkUInt160(sqrtPriceX96)
+    checkInputTypes(uint160=sqrtPriceX96)
     ## second inequality must be < because the price can never reach the price at the max tick
-    assert sqrtPriceX96 >= MIN_SQRT_RATIO and sqrtPriceX96 < MAX_SQRT_RATIO, "R"
+    require(sqrtPriceX96 >= MIN_SQRT_RATIO and sqrtPriceX96 < MAX_SQRT_RATIO, "R")
     ratio = sqrtPriceX96 << 32
 
     r = ratio
@@ -133,6 +167,41 @@ def getTickAtSqrtRatio(sqrtPriceX96):
     return tick
 
 
+### @notice Calculates the greatest tick value such that getRatioAtTick(tick) <= ratio, knowing a range of ticks the
+### result lies in
+### @dev Same result as #getTickAtSqrtRatio. The tick is estimated with a float logarithm, whose error (including the
+### rounding of #getSqrtRatioAtTick) is far below TICK_ESTIMATE_MARGIN ticks. If the estimate is not that close to a
+### tick boundary it is exact, otherwise it is corrected with one or two exact #getSqrtRatioAtTick checks. An estimate
+### outside the range is not trusted and the tick is computed with #getTickAtSqrtRatio instead, so a wrong range only
+### costs the exact computation.
+### @param sqrtPriceX96 The sqrt ratio for which to compute the tick as a Q64.96
+### @param tickLower The lowest tick the result can be
+### @param tickUpper The highest tick the result can be
+### @return tick The greatest tick for which the ratio is less than or equal to the input ratio
+def getTickAtSqrtRatioBounded(sqrtPriceX96, tickLower, tickUpper):
+    checkInputTypes(uint160=sqrtPriceX96, int24=(tickLower, tickUpper))
+    require(sqrtPriceX96 >= MIN_SQRT_RATIO and sqrtPriceX96 < MAX_SQRT_RATIO, "R")
+
+    tickEstimate = (math.log(sqrtPriceX96) - LOG_Q96) / LOG_SQRT10001
+    tick = math.floor(tickEstimate)
+    if tick < tickLower or tick > tickUpper:
+        return getTickAtSqrtRatio(sqrtPriceX96)
+    if (
+        tickEstimate - tick > TICK_ESTIMATE_MARGIN
+        and tick + 1 - tickEstimate > TICK_ESTIMATE_MARGIN
+    ):
+        return tick
+
+    # Correct the estimate, which is at most one tick away from the result
+    tick = min(max(tick, MIN_TICK), MAX_TICK - 1)
+    while getSqrtRatioAtTick(tick) > sqrtPriceX96:
+        tick -= 1
+    while getSqrtRatioAtTick(tick + 1) <= sqrtPriceX96:
+        tick += 1
+
+    return tick
+
+
 # Need to return r and msb since ints are passed by value and not by reference
 def add_bit_to_log_2(r, msb, lower_bit_mask, bit):
     gt = 1 if r > lower_bit_mask else 0
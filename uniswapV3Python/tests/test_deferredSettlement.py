@@ -0,0 +1,100 @@
+from .utilities import *
+from .test_uniswapPool import ledger, accounts
+from .test_fork import pool, poolState
+
+from ..src.UniswapPool import *
+from ..src.libraries.Account import Ledger
+
+
+def runBlock(pool, accounts):
+    pool.mint(accounts[2], -120, 120, expandTo18Decimals(1))
+    pool.swap(accounts[3], True, expandTo18Decimals(1) // 10, encodePriceSqrt(1, 2))
+    pool.swap(accounts[3], False, expandTo18Decimals(1) // 10, encodePriceSqrt(2, 1))
+    pool.burn(accounts[2], -120, 120, expandTo18Decimals(1))
+    pool.collect(accounts[2], -120, 120, MAX_UINT128, MAX_UINT128)
+
+
+def test_block_matchesImmediateTransfers(pool, accounts):
+    print("ends in the same state as transferring immediately")
+    poolCopy = copy.deepcopy(pool)
+    runBlock(poolCopy, accounts)
+
+    with pool.ledger.block():
+        runBlock(pool, accounts)
+        # Balances read within the block include the deferred transfers
+        assert poolState(pool, accounts) == poolState(poolCopy, accounts)
+    assert pool.ledger.deferredDeltas == None
+    assert poolState(pool, accounts) == poolState(poolCopy, accounts)
+
+
+def test_block_netsTransfers(pool, accounts):
+    print("writes each balance once when the block closes")
+    balanceBefore = pool.ledger.balanceOf(accounts[3], TEST_TOKENS[0])
+    handle = pool.ledger.getHandle(accounts[3])
+    pool.ledger.openBlock()
+    for i in range(3):
+        pool.swap(accounts[3], True, 1000, encodePriceSqrt(1, 2))
+        pool.swap(accounts[3], False, 1000, encodePriceSqrt(2, 1))
+    assert pool.ledger._readBalance(handle, 0) == balanceBefore
+    # The trader and the pool balances of both tokens
+    assert pool.ledger.closeBlock() == 4
+    assert pool.ledger.balanceOf(accounts[3], TEST_TOKENS[0]) != balanceBefore
+
+
+def test_block_revertsDeferredTransfers(pool, accounts):
+    print("reverted transactions restore the deferred transfers")
+    with pool.ledger.block():
+        pool.swap(accounts[3], True, 1000, encodePriceSqrt(1, 2))
+        stateBefore = poolState(pool, accounts)
+        deltasBefore = dict(pool.ledger.deferredDeltas)
+
+        pool.ledger.setBalance(accounts[2], TEST_TOKENS[0], 10)
+        with pytest.raises(AssertionError, match="Insufficient balance"):
+            pool.swapBatch([(accounts[2], True, 5, encodePriceSqrt(1, 2))] * 3)
+        pool.ledger.setBalance(accounts[2], TEST_TOKENS[0], MAX_INT256 // 1000)
+        assert poolState(pool, accounts) == stateBefore
+        assert pool.ledger.deferredDeltas == deltasBefore
+
+        # Senders must still cover every transfer
+        pool.ledger.setBalance(accounts[3], TEST_TOKENS[1], 0)
+        tryExceptHandler(
+            pool.swap,
+            "Insufficient balance",
+            accounts[3],
+            False,
+            1000,
+            encodePriceSqrt(2, 1),
+        )
+
+
+def test_block_fork(pool, accounts):
+    print("a fork made within a block starts from the balances read in the block")
+    poolCopy = copy.deepcopy(pool)
+    for p in [pool, poolCopy]:
+        p.swap(accounts[3], True, 1000, encodePriceSqrt(1, 2))
+    with pool.ledger.block():
+        pool.swap(accounts[3], True, 1000, encodePriceSqrt(1, 2))
+        fork = pool.fork()
+        assert fork.ledger.deferredDeltas is None
+        assert poolState(fork, accounts) == poolState(pool, accounts)
+
+        fork.swap(accounts[2], False, 1000, encodePriceSqrt(2, 1))
+        pool.merge(fork)
+        # The deltas deferred before forking are applied once, when the block closes
+        assert pool.ledger.deferredDeltas != {}
+    poolCopy.swap(accounts[3], True, 1000, encodePriceSqrt(1, 2))
+    poolCopy.swap(accounts[2], False, 1000, encodePriceSqrt(2, 1))
+    assert poolState(pool, accounts) == poolState(poolCopy, accounts)
+
+
+def test_block_ledgerFork():
+    ledger = Ledger([["ALICE", TEST_TOKENS, [100, 100]], ["BOB", TEST_TOKENS, [0, 0]]])
+    accounts = list(ledger.accounts.keys())
+    with ledger.block():
+        ledger.transferToken(accounts[0], accounts[1], TEST_TOKENS[0], 10)
+        fork = ledger.fork()
+        assert fork.balanceOf(accounts[0], TEST_TOKENS[0]) == 90
+        fork.transferToken(accounts[1], accounts[0], TEST_TOKENS[0], 5)
+        ledger.merge(fork)
+    assert ledger.balanceOf(accounts[0], TEST_TOKENS[0]) == 95
+    assert ledger.balanceOf(accounts[1], TEST_TOKENS[0]) == 5
@@ -0,0 +1,100 @@
+from .utilities import *
+from .test_uniswapPool import ledger, accounts
+from .test_fork import pool
+
+from ..src.UniswapPool import *
+
+
+@pytest.fixture
+def deepPool(pool, accounts):
+    for i in range(20):
+        pool.mint(accounts[1], -2400 + i * 180, -2040 + i * 240, expandTo18Decimals(1))
+    pool.swap(accounts[2], True, expandTo18Decimals(1) // 3, encodePriceSqrt(1, 2))
+    return pool
+
+
+# amountToReachPrice
+
+
+def test_amountToReachPrice_movesPriceToTarget(deepPool, accounts):
+    print("swapping the amount moves the price to the target")
+    for sqrtPriceTargetX96 in [
+        encodePriceSqrt(1, 2),
+        TickMath.getSqrtRatioAtTick(-1260),
+        encodePriceSqrt(3, 2),
+        TickMath.getSqrtRatioAtTick(deepPool.slot0.tick + 1),
+    ]:
+        (amount0, amount1) = deepPool.amountToReachPrice(sqrtPriceTargetX96)
+        zeroForOne = amount0 > 0
+        fork = deepPool.fork()
+        (_, swapAmount0, swapAmount1, sqrtPriceX96, _, _) = fork.swap(
+            accounts[2], zeroForOne, MAX_INT128, sqrtPriceTargetX96
+        )
+        assert (swapAmount0, swapAmount1) == (amount0, amount1)
+        assert sqrtPriceX96 == sqrtPriceTargetX96
+
+
+def test_amountToReachPrice_currentPrice(deepPool):
+    print("returns zero amounts for the current price")
+    assert deepPool.amountToReachPrice(deepPool.slot0.sqrtPriceX96) == (0, 0)
+
+
+# liquidityAt
+
+
+def test_liquidityAt_sumsLiquidityNet(deepPool):
+    print("equals the liquidityNet of all the initialized ticks at or below the tick")
+    assert deepPool.liquidityAt(deepPool.slot0.tick) == deepPool.liquidity
+    for tick in range(-3000, 3000, 37):
+        expected = sum(
+            info.liquidityNet
+            for (initializedTick, info) in deepPool.ticks.items()
+            if initializedTick <= tick
+        )
+        assert deepPool.liquidityAt(tick) == expected
+    assert deepPool.liquidityAt(MIN_TICK) == 0
+    assert deepPool.liquidityAt(MAX_TICK) == 0
+
+
+def test_liquidityAt_matchesSwap(deepPool, accounts):
+    print("equals the pool liquidity after swapping to the tick")
+    for tick in [-1500, -181, 359, 1900]:
+        fork = deepPool.fork()
+        sqrtPriceX96 = TickMath.getSqrtRatioAtTick(tick) + 1
+        fork.swap(
+            accounts[2],
+            sqrtPriceX96 < fork.slot0.sqrtPriceX96,
+            MAX_INT128,
+            sqrtPriceX96,
+        )
+        assert fork.slot0.tick == tick
+        assert deepPool.liquidityAt(tick) == fork.liquidity
+
+
+# depthWithin
+
+
+def test_depthWithin_matchesSwapOutput(deepPool):
+    print("the depth on each side is the output of swapping to the range boundary")
+    tick = deepPool.slot0.tick
+    for (tickLower, tickUpper) in [(-1200, 1200), (-2400, 2700), (tick - 60, tick + 1)]:
+        (amount0, amount1) = deepPool.depthWithin(tickLower, tickUpper)
+        assert amount0 > 0 and amount1 > 0
+        assert (
+            -deepPool.amountToReachPrice(TickMath.getSqrtRatioAtTick(tickLower))[1]
+            == amount1
+        )
+        assert (
+            -deepPool.amountToReachPrice(TickMath.getSqrtRatioAtTick(tickUpper))[0]
+            == amount0
+        )
+
+
+def test_depthWithin_rangeOutsidePrice(deepPool):
+    print("only holds one of the tokens if the range is on one side of the price")
+    tick = deepPool.slot0.tick
+    assert deepPool.depthWithin(tick + 1, tick + 600)[1] == 0
+    assert deepPool.depthWithin(tick + 1, tick + 600)[0] > 0
+    assert deepPool.depthWithin(tick - 600, tick)[0] == 0
+    assert deepPool.depthWithin(tick - 600, tick)[1] > 0
+    tryExceptHandler(deepPool.depthWithin, "TLU", 600, 600)
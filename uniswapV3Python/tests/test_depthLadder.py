@@ -0,0 +1,93 @@
+from .utilities import *
+from .test_uniswapPool import ledger, accounts
+from .test_fork import pool
+
+from ..src.UniswapPool import *
+
+
+# Quote by running every swap step from the current price
+def quoteSteps(pool, zeroForOne, amountSpecified, sqrtPriceLimitX96):
+    (cache, state) = pool._startSwap(zeroForOne, amountSpecified, sqrtPriceLimitX96)
+    exactInput = amountSpecified > 0
+    pool._computeSwapSteps(
+        cache, state, zeroForOne, exactInput, sqrtPriceLimitX96, False
+    )
+    return (
+        *UniswapPool._getSwapAmounts(state, zeroForOne, exactInput, amountSpecified),
+        state.sqrtPriceX96,
+        state.liquidity,
+        state.tick,
+        state.ticksCrossed,
+    )
+
+
+def getQuoteCases():
+    return [
+        (True, expandTo18Decimals(1), encodePriceSqrt(1, 100)),
+        (True, expandTo18Decimals(1) // 3, encodePriceSqrt(1, 100)),
+        (True, -expandTo18Decimals(1) // 2, encodePriceSqrt(1, 100)),
+        (True, 2**200, encodePriceSqrt(1, 1000)),
+        (False, expandTo18Decimals(1), encodePriceSqrt(100, 1)),
+        (False, -expandTo18Decimals(1) // 2, encodePriceSqrt(100, 1)),
+        (False, 2**200, MAX_SQRT_RATIO - 1),
+    ]
+
+
+def test_ladder_builtLazily(pool):
+    print("extends the ladder only as far as the quotes need and reuses it")
+    pool.quoteSwap(True, 1000, MIN_SQRT_RATIO + 1)
+    ladder = pool.depthLadders[True]
+    segments = len(ladder.segmentStates)
+
+    pool.quoteSwap(True, 10, MIN_SQRT_RATIO + 1)
+    assert pool.depthLadders[True] is ladder
+    assert len(ladder.segmentStates) == segments
+
+    pool.quoteSwap(True, 2**200, MIN_SQRT_RATIO + 1)
+    assert len(ladder.segmentStates) > segments
+    assert ladder.state.sqrtPriceX96 == MIN_SQRT_RATIO + 1
+
+
+def test_ladder_matchesSteps(pool, accounts):
+    print("quotes from the ladder match running every step, over many ticks")
+    for i in range(40):
+        pool.mint(accounts[1], -2400 + i * 120, -2280 + i * 120, expandTo18Decimals(1))
+    for (zeroForOne, amountSpecified, sqrtPriceLimitX96) in getQuoteCases():
+        assert pool.quoteSwap(
+            zeroForOne, amountSpecified, sqrtPriceLimitX96
+        ) == quoteSteps(pool, zeroForOne, amountSpecified, sqrtPriceLimitX96)
+
+
+def test_ladder_invalidatedOnStateChanges(pool, accounts):
+    print("invalidates the ladder when the pool state changes")
+    calls = [
+        lambda: pool.mint(accounts[2], -120, 1200, expandTo18Decimals(1)),
+        lambda: pool.swap(
+            accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2)
+        ),
+        lambda: pool.burn(accounts[1], -1200, 120, expandTo18Decimals(1) // 2),
+        lambda: pool.setFeeProtocol(4, 4),
+        lambda: pool.swap(
+            accounts[2], False, expandTo18Decimals(1), encodePriceSqrt(2, 1)
+        ),
+    ]
+    for call in calls:
+        for case in getQuoteCases():
+            pool.quoteSwap(*case)
+        call()
+        assert pool.depthLadders == {}
+        for case in getQuoteCases():
+            assert pool.quoteSwap(*case) == quoteSteps(pool, *case)
+
+
+def test_ladder_restoredOnRevert(pool, accounts):
+    print("quotes the pre-transaction state after a revert")
+    quotes = [pool.quoteSwap(*case) for case in getQuoteCases()]
+    with pytest.raises(AssertionError, match="SPL"):
+        with pool.transaction():
+            pool.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+            [pool.quoteSwap(*case) for case in getQuoteCases()]
+            pool.swap(accounts[2], False, expandTo18Decimals(1), encodePriceSqrt(1, 4))
+
+    assert [pool.quoteSwap(*case) for case in getQuoteCases()] == quotes
+    assert [quoteSteps(pool, *case) for case in getQuoteCases()] == quotes
@@ -0,0 +1,112 @@
+from .utilities import *
+from .test_uniswapPool import ledger, accounts, createLedger
+
+from ..src.UniswapPool import *
+from ..src.libraries import EventReplay
+import csv, dataclasses, gzip, json
+
+
+def createPool(ledger):
+    return UniswapPool(TEST_TOKENS[0], TEST_TOKENS[1], FeeAmount.MEDIUM, 60, ledger)
+
+
+# Events of a simulated history, with the Initialize and SetFeeProtocol events the pool doesn't emit
+@pytest.fixture
+def history(ledger, accounts):
+    pool = createPool(ledger)
+    events = []
+    pool.events.subscribe(events.append)
+    sqrtPriceX96 = encodePriceSqrt(1, 1)
+    pool.initialize(sqrtPriceX96)
+    pool.setFeeProtocol(4, 4)
+    pool.mint(accounts[0], getMinTick(60), getMaxTick(60), expandTo18Decimals(1))
+    pool.mint(accounts[1], -600, 120, expandTo18Decimals(2))
+    pool.swap(accounts[2], True, expandTo18Decimals(1) // 10, encodePriceSqrt(1, 2))
+    pool.swap(accounts[3], False, -expandTo18Decimals(1) // 20, encodePriceSqrt(2, 1))
+    pool.burn(accounts[1], -600, 120, expandTo18Decimals(1))
+    pool.collect(accounts[1], -600, 120, MAX_UINT128, MAX_UINT128)
+    pool.collectProtocol(accounts[0], MAX_UINT128, MAX_UINT128)
+    initialize = [
+        {"event": "Initialize", "sqrtPriceX96": sqrtPriceX96, "tick": 0},
+        {"event": "SetFeeProtocol", "feeProtocol0New": 4, "feeProtocol1New": 4},
+    ]
+    return (pool, initialize, events)
+
+
+def writeHistory(path, history):
+    (_, initialize, events) = history
+    EventReplay.writeEvents(path, events)
+    with open(path) as file:
+        lines = file.readlines()
+    with open(path, "w") as file:
+        file.writelines(json.dumps(record) + "\n" for record in initialize)
+        file.writelines(lines)
+
+
+def test_replay_jsonl(history, tmp_path):
+    print("replays a recorded history without divergences")
+    path = str(tmp_path / "events.jsonl")
+    writeHistory(path, history)
+
+    pool = createPool(createLedger())
+    report = EventReplay.replay(pool, path)
+
+    assert report.events == 9 and report.skipped == 0
+    assert report.divergenceCount == 0 and report.divergences == []
+    assert report.eventsPerSecond > 0
+    original = history[0]
+    assert (pool.slot0, pool.liquidity, pool.ticks) == (
+        original.slot0,
+        original.liquidity,
+        original.ticks,
+    )
+    assert (pool.feeGrowthGlobal0X128, pool.protocolFees) == (
+        original.feeGrowthGlobal0X128,
+        original.protocolFees,
+    )
+
+
+def test_replay_csv(history, tmp_path):
+    print("reads gzipped CSV files with the integers as strings")
+    jsonPath = str(tmp_path / "events.jsonl")
+    writeHistory(jsonPath, history)
+    records = list(EventReplay.readEvents(jsonPath))
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    path = str(tmp_path / "events.csv.gz")
+    with gzip.open(path, "wt", newline="") as file:
+        writer = csv.DictWriter(file, columns)
+        writer.writeheader()
+        writer.writerows(
+            {key: str(value) for (key, value) in record.items()} for record in records
+        )
+
+    report = EventReplay.replay(createPool(createLedger()), path)
+    assert report.events == 9 and report.divergenceCount == 0
+
+
+def test_replay_reportsDivergences(history, tmp_path):
+    print("reports mismatching values, reverts and skipped events")
+    (_, initialize, events) = history
+    records = initialize + [
+        {"event": type(event).__name__, **dataclasses.asdict(event)} for event in events
+    ]
+    # The second swap computes a different output than recorded
+    swap = records[5]
+    swap["amount0"] -= 1
+    # Burning more than minted reverts
+    records[6]["amount"] *= 10
+    records.insert(1, {"event": "Flash", "amount0": 1, "amount1": 1})
+    path = str(tmp_path / "events.jsonl")
+    with open(path, "w") as file:
+        file.writelines(json.dumps(record) + "\n" for record in records)
+
+    report = EventReplay.replay(createPool(createLedger()), path, maxDivergences=2)
+
+    assert report.events == 10 and report.skipped == 1
+    assert report.divergences[0] == EventReplay.Divergence(
+        6, "Swap", "amount0", swap["amount0"], swap["amount0"] + 1
+    )
+    assert report.divergences[1].field == "revert"
+    assert report.divergences[1].index == 7
+    # Later events diverge as the state does, but only the first are kept
+    assert report.divergenceCount > len(report.divergences) == 2
@@ -0,0 +1,89 @@
+from .utilities import *
+from .test_uniswapPool import ledger, accounts
+from .test_fork import pool
+
+from ..src.UniswapPool import *
+from ..src.libraries.Events import *
+
+
+def test_inactiveByDefault(pool, accounts):
+    print("doesn't record events when nobody listens")
+    pool.swap(accounts[2], True, 1000, encodePriceSqrt(1, 2))
+    assert not pool.events.active
+    assert pool.events.sequence == 0 and list(pool.events.events()) == []
+
+
+def test_emitsPoolEvents(pool, accounts):
+    print("emits the events with the fields of the Solidity contract")
+    received = []
+    pool.events.subscribe(received.append)
+    pool.setFeeProtocol(4, 4)
+
+    (amount0, amount1) = pool.mint(accounts[2], -120, 120, 1000)
+    (_, swapAmount0, swapAmount1, sqrtPriceX96, liquidity, tick) = pool.swap(
+        accounts[3], True, expandTo18Decimals(1) // 10, encodePriceSqrt(1, 2)
+    )
+    (_, _, _, _, burnAmount0, burnAmount1) = pool.burn(accounts[2], -120, 120, 1000)
+    (_, _, _, collected0, collected1) = pool.collect(
+        accounts[2], -120, 120, MAX_UINT128, MAX_UINT128
+    )
+    (_, protocol0, protocol1) = pool.collectProtocol(
+        accounts[0], MAX_UINT128, MAX_UINT128
+    )
+
+    assert received == [
+        Mint(accounts[2], accounts[2], -120, 120, 1000, amount0, amount1),
+        Swap(
+            accounts[3],
+            accounts[3],
+            swapAmount0,
+            swapAmount1,
+            sqrtPriceX96,
+            liquidity,
+            tick,
+        ),
+        Burn(accounts[2], -120, 120, 1000, burnAmount0, burnAmount1),
+        Collect(accounts[2], accounts[2], -120, 120, collected0, collected1),
+        CollectProtocol(accounts[0], accounts[0], protocol0, protocol1),
+    ]
+    assert pool.events.sequence == 5
+
+
+def test_ringBuffer(pool, accounts):
+    print("keeps the latest events in the ring buffer")
+    pool.events.setCapacity(3)
+    for i in range(5):
+        pool.swap(
+            accounts[2],
+            i % 2 == 0,
+            1000,
+            encodePriceSqrt(1, 2) if i % 2 == 0 else encodePriceSqrt(2, 1),
+        )
+
+    events = list(pool.events.events())
+    assert [sequence for (sequence, _) in events] == [2, 3, 4]
+    assert [event.amount0 > 0 for (_, event) in events] == [True, False, True]
+    assert [sequence for (sequence, _) in pool.events.events(since=4)] == [4]
+
+    pool.events.setCapacity(2)
+    assert [sequence for (sequence, _) in pool.events.events()] == [3, 4]
+
+
+def test_revertedTransactionsEmitNothing(pool, accounts):
+    print("drops the events of reverted transactions")
+    received = []
+    pool.events.subscribe(received.append)
+    orders = [
+        (accounts[2], True, 1000, encodePriceSqrt(1, 2)),
+        (accounts[2], True, 1000, encodePriceSqrt(2, 1)),
+    ]
+    with pytest.raises(AssertionError, match="SPL"):
+        pool.swapBatch(orders)
+    assert received == []
+
+    with pool.transaction():
+        pool.swapBatch(orders[:1])
+        pool.swap(accounts[2], True, 1000, encodePriceSqrt(1, 2))
+        # Held until the outermost transaction ends
+        assert received == []
+    assert [type(event) for event in received] == [Swap, Swap]
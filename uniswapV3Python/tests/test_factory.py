@@ -142,3 +142,36 @@ def test_enablePoolCreation(ledger):
     factory = Factory()
     factory.enableFeeAmount(250, 15)
     createAndCheck_pool(factory, TEST_ADDRESSES, 250, 15, ledger)
+
+
+def test_revertsAreRevertExceptions(ledger):
+    factory = Factory()
+    factory.createPool(TEST_ADDRESSES[0], TEST_ADDRESSES[1], FeeAmount.MEDIUM, ledger)
+    with pytest.raises(Revert, match="Pool already exists"):
+        factory.createPool(
+            TEST_ADDRESSES[1], TEST_ADDRESSES[0], FeeAmount.MEDIUM, ledger
+        )
+    # Reverts are still AssertionErrors
+    with pytest.raises(AssertionError, match="Fee amount not supported"):
+        factory.createPool(TEST_ADDRESSES[0], TEST_ADDRESSES[1], 250, ledger)
+
+
+def test_getPool(ledger):
+    print("keeps the created pools indexed by tokens and fee")
+    factory = Factory()
+    assert factory.getPool(TEST_ADDRESSES[0], TEST_ADDRESSES[1], FeeAmount.LOW) == None
+    pools = [
+        factory.createPool(TEST_ADDRESSES[1], TEST_ADDRESSES[0], fee, ledger)
+        for fee in [FeeAmount.LOW, FeeAmount.MEDIUM]
+    ]
+    other = factory.createPool(TEST_ADDRESSES[0], "0x3", FeeAmount.LOW, ledger)
+
+    for pool in pools:
+        assert factory.getPool(TEST_ADDRESSES[0], TEST_ADDRESSES[1], pool.fee) is pool
+        assert factory.getPool(TEST_ADDRESSES[1], TEST_ADDRESSES[0], pool.fee) is pool
+    assert factory.getPool(TEST_ADDRESSES[0], TEST_ADDRESSES[1], FeeAmount.HIGH) == None
+    assert factory.getPoolsForPair(TEST_ADDRESSES[1], TEST_ADDRESSES[0]) == {
+        FeeAmount.LOW: pools[0],
+        FeeAmount.MEDIUM: pools[1],
+    }
+    assert list(factory.allPools()) == pools + [other]
@@ -0,0 +1,153 @@
+from .utilities import *
+from .test_uniswapPool import ledger, accounts
+
+from ..src.UniswapPool import *
+import pickle
+
+
+@pytest.fixture
+def pool(ledger, accounts):
+    pool = UniswapPool(TEST_TOKENS[0], TEST_TOKENS[1], FeeAmount.MEDIUM, 60, ledger)
+    pool.initialize(encodePriceSqrt(1, 1))
+    pool.mint(accounts[0], getMinTick(60), getMaxTick(60), expandTo18Decimals(1))
+    pool.mint(accounts[0], -600, 600, expandTo18Decimals(1))
+    pool.mint(accounts[1], -1200, 120, expandTo18Decimals(1))
+    return pool
+
+
+def poolState(pool, accounts):
+    return copy.deepcopy(
+        (
+            pool.slot0,
+            pool.liquidity,
+            pool.feeGrowthGlobal0X128,
+            pool.feeGrowthGlobal1X128,
+            pool.protocolFees,
+            dict(pool.ticks),
+            pool.tickBitmap,
+            dict(pool.positions),
+            pool.balances,
+            [pool.ledger.accounts[account].balances for account in accounts],
+        )
+    )
+
+
+def test_fork_sharesEntries(pool):
+    print("shares the ticks and positions with the parent until they are accessed")
+    fork = pool.fork()
+    for tick in pool.ticks.keys():
+        assert dict.__getitem__(fork.ticks, tick) is dict.__getitem__(pool.ticks, tick)
+
+    # Reading an entry doesn't copy it, getting it to modify it does
+    assert fork.ticks[-600] is dict.__getitem__(pool.ticks, -600)
+    tickInfo = fork.ticks.getMutable(-600)
+    assert tickInfo == dict.__getitem__(pool.ticks, -600)
+    assert tickInfo is not dict.__getitem__(pool.ticks, -600)
+    assert fork.ticks.ownedKeys == {-600}
+    assert dict.__getitem__(fork.ticks, 600) is dict.__getitem__(pool.ticks, 600)
+
+
+def test_fork_quoteDoesNotCopyEntries(pool, accounts):
+    print("quoting a swap on a fork doesn't copy the ticks crossed")
+    fork = pool.fork()
+    quote = fork.quoteSwap(True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+    assert quote[3] < TickMath.getSqrtRatioAtTick(-600)
+    with fork.transaction():
+        assert (
+            fork.quoteSwap(True, expandTo18Decimals(1), encodePriceSqrt(1, 2)) == quote
+        )
+    assert fork.ticks.ownedKeys == set()
+    for tick in pool.ticks.keys():
+        assert dict.__getitem__(fork.ticks, tick) is dict.__getitem__(pool.ticks, tick)
+
+
+def test_fork_doesNotModifyParent(pool, accounts):
+    print("changes to the fork are not applied to the parent")
+    stateBefore = poolState(pool, accounts)
+    fork = pool.fork()
+
+    fork.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+    fork.burn(accounts[1], -1200, 120, expandTo18Decimals(1))
+    fork.mint(accounts[2], -120, 1200, expandTo18Decimals(1))
+    fork.collect(accounts[1], -1200, 120, MAX_UINT128, MAX_UINT128)
+
+    assert poolState(pool, accounts) == stateBefore
+    assert poolState(fork, accounts) != stateBefore
+    assert fork.ticks.sortedTicks != pool.ticks.sortedTicks
+    assert sorted(pool.ticks.keys()) == pool.ticks.sortedTicks
+    assert sorted(fork.ticks.keys()) == fork.ticks.sortedTicks
+
+
+def test_fork_notModifiedByParent(pool, accounts):
+    print("changes to the parent are not applied to the fork")
+    fork = pool.fork()
+    forkStateBefore = poolState(fork, accounts)
+
+    pool.swap(accounts[2], False, expandTo18Decimals(1), encodePriceSqrt(2, 1))
+    pool.burn(accounts[0], -600, 600, expandTo18Decimals(1))
+
+    assert poolState(fork, accounts) == forkStateBefore
+
+
+def test_fork_merge(pool, accounts):
+    print("the parent adopts the state of the fork when merging")
+    poolCopy = copy.deepcopy(pool)
+    fork = pool.fork()
+
+    for p in [fork, poolCopy]:
+        p.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+        p.burn(accounts[1], -1200, 120, expandTo18Decimals(1))
+        p.collect(accounts[1], -1200, 120, MAX_UINT128, MAX_UINT128)
+
+    pool.merge(fork)
+    assert poolState(pool, accounts) == poolState(poolCopy, accounts)
+
+    # The merged pool can keep being used and forked
+    pool.swap(accounts[2], False, expandTo18Decimals(1), encodePriceSqrt(2, 1))
+    poolCopy.swap(accounts[2], False, expandTo18Decimals(1), encodePriceSqrt(2, 1))
+    assert poolState(pool, accounts) == poolState(poolCopy, accounts)
+
+
+def test_fork_mergeKeepsParentTransfers(pool, ledger, accounts):
+    print("merging keeps the transfers made on the parent ledger after forking")
+    otherPool = UniswapPool(TEST_TOKENS[0], TEST_TOKENS[1], FeeAmount.LOW, 10, ledger)
+    otherPool.initialize(encodePriceSqrt(1, 1))
+    otherPool.mint(accounts[0], -100, 100, expandTo18Decimals(1))
+    (poolCopy, otherPoolCopy) = copy.deepcopy((pool, otherPool))
+    fork = pool.fork()
+
+    for (p, other) in [(fork, otherPool), (poolCopy, otherPoolCopy)]:
+        p.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+        other.swap(accounts[2], False, expandTo18Decimals(1) // 10, MAX_SQRT_RATIO - 1)
+        other.mint(accounts[1], -50, 50, expandTo18Decimals(1))
+
+    pool.merge(fork)
+    assert poolState(pool, accounts) == poolState(poolCopy, accounts)
+    assert poolState(otherPool, accounts) == poolState(otherPoolCopy, accounts)
+
+
+def test_fork_mergeChangedPool(pool, accounts):
+    print("fails to merge a fork if the pool balances changed after forking")
+    fork = pool.fork()
+    fork.swap(accounts[2], True, 1000, encodePriceSqrt(1, 2))
+    pool.swap(accounts[3], False, 1000, encodePriceSqrt(2, 1))
+    tryExceptHandler(pool.merge, "Pool changed since fork", fork)
+
+
+def test_fork_mergeOtherPool(pool, ledger):
+    print("fails to merge a pool that is not a fork")
+    otherPool = UniswapPool(
+        TEST_TOKENS[0], TEST_TOKENS[1], FeeAmount.MEDIUM, 60, ledger
+    )
+    tryExceptHandler(pool.merge, "Not a fork of this pool", otherPool)
+
+
+def test_pickle_sameState(pool, accounts):
+    print("pickled pools keep their position keys and addresses")
+    unpickled = pickle.loads(pickle.dumps(pool))
+    assert poolState(unpickled, accounts) == poolState(pool, accounts)
+    assert getPositionKey(accounts[1], -1200, 120) in unpickled.positions
+
+    unpickled.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+    pool.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+    assert poolState(unpickled, accounts) == poolState(pool, accounts)
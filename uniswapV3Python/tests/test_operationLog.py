@@ -0,0 +1,156 @@
+from .utilities import *
+import os
+from .test_uniswapPool import ledger, accounts, createLedger
+from .test_fork import pool, poolState
+
+from ..src.UniswapPool import *
+from ..src.libraries import OperationLog
+from ..src.libraries.PoolRegistry import PoolRegistry
+from ..src.libraries.Router import Router
+
+
+@pytest.fixture
+def logDirectory(tmp_path):
+    return str(tmp_path / "log")
+
+
+def runOperations(pool, accounts):
+    pool.setFeeProtocol(4, 4)
+    pool.mint(accounts[2], -120, 120, expandTo18Decimals(1))
+    pool.swap(accounts[3], True, expandTo18Decimals(1) // 10, encodePriceSqrt(1, 2))
+    pool.swapBatch(
+        [
+            (accounts[3], False, expandTo18Decimals(1) // 5, encodePriceSqrt(2, 1)),
+            (accounts[2], True, -expandTo18Decimals(1) // 20, encodePriceSqrt(1, 2)),
+        ]
+    )
+    pool.burn(accounts[2], -120, 120, expandTo18Decimals(1) // 2)
+    pool.collect(accounts[2], -120, 120, MAX_UINT128, MAX_UINT128)
+    pool.collectProtocol(accounts[0], MAX_UINT128, MAX_UINT128)
+
+
+def loggedSequences(logDirectory, checkpoint):
+    path = OperationLog.getLogPath(logDirectory, checkpoint)
+    return [record[0] for record in OperationLog.readRecords(path)]
+
+
+def restoredState(logDirectory, accounts):
+    pool = OperationLog.restore(logDirectory, createLedger())
+    return poolState(pool, accounts)[:-1]
+
+
+def test_restore_replaysLogTail(pool, accounts, logDirectory):
+    print("restores the state from the snapshot and the operations logged after it")
+    log = OperationLog.OperationLog(logDirectory)
+    log.attach(pool)
+    runOperations(pool, accounts)
+    log.flush()
+
+    assert log.sequence == 7
+    assert restoredState(logDirectory, accounts) == poolState(pool, accounts)[:-1]
+    log.close()
+
+
+def test_operationsWrittenPerGroup(pool, accounts, logDirectory):
+    print("writes the operations in groups")
+    log = OperationLog.OperationLog(logDirectory, groupSize=4)
+    log.attach(pool)
+
+    runOperations(pool, accounts)
+    assert loggedSequences(logDirectory, 0) == [1, 2, 3, 4]
+    assert len(log.buffer) == 3
+    log.close()
+    assert loggedSequences(logDirectory, 0) == list(range(1, 8))
+
+
+def test_checkpoints(pool, accounts, logDirectory):
+    print("periodically replaces the snapshot and the log with new ones")
+    log = OperationLog.OperationLog(logDirectory, groupSize=2, checkpointInterval=3)
+    log.attach(pool)
+    runOperations(pool, accounts)
+    pool.swap(accounts[3], True, 1000, encodePriceSqrt(1, 2))
+
+    assert OperationLog.getLatestSnapshot(logDirectory)[0] == 6
+    assert sorted(os.listdir(logDirectory)) == ["operations-6.log", "snapshot-6.bin"]
+    log.flush()
+    # Only the operations after the snapshot are kept
+    assert loggedSequences(logDirectory, 6) == [7, 8]
+    assert restoredState(logDirectory, accounts) == poolState(pool, accounts)[:-1]
+    log.close()
+
+
+def test_revertedOperationsNotLogged(pool, accounts, logDirectory):
+    print("doesn't log the operations of reverted transactions")
+    log = OperationLog.OperationLog(logDirectory)
+    log.attach(pool)
+    orders = [
+        (accounts[2], True, 1000, encodePriceSqrt(1, 2)),
+        (accounts[2], True, 1000, encodePriceSqrt(2, 1)),
+    ]
+    with pytest.raises(AssertionError, match="SPL"):
+        pool.swapBatch(orders)
+    with pool.transaction():
+        pool.swap(*orders[0])
+        pool.mint(accounts[2], -60, 60, 1000)
+    assert log.sequence == 2
+    log.close()
+
+
+def test_reopen_dropsTornRecord(pool, accounts, logDirectory):
+    print("drops a partially written record and continues the sequence")
+    log = OperationLog.OperationLog(logDirectory)
+    log.attach(pool)
+    runOperations(pool, accounts)
+    log.close()
+    with open(OperationLog.getLogPath(logDirectory, 0), "a") as file:
+        file.write('[8,"swap",["')
+
+    log = OperationLog.OperationLog(logDirectory)
+    assert log.sequence == 7
+    restored = OperationLog.restore(logDirectory, createLedger())
+    assert poolState(restored, accounts)[:-1] == poolState(pool, accounts)[:-1]
+
+    log.attach(restored)
+    restored.swap(accounts[3], True, 1000, encodePriceSqrt(1, 2))
+    state = poolState(restored, accounts)[:-1]
+    log.close()
+    # Attaching the restored pool checkpointed it, starting a new log
+    assert sorted(os.listdir(logDirectory)) == ["operations-7.log", "snapshot-7.bin"]
+    assert loggedSequences(logDirectory, 7) == [8]
+    assert restoredState(logDirectory, accounts) == state
+
+
+def test_restore_previousCheckpoint(pool, accounts, logDirectory):
+    print("restores from the snapshot alone if the checkpoint didn't start its log")
+    log = OperationLog.OperationLog(logDirectory, checkpointInterval=7)
+    log.attach(pool)
+    runOperations(pool, accounts)
+    log.close()
+    # Crash between saving the snapshot and starting its log
+    os.remove(OperationLog.getLogPath(logDirectory, 7))
+    assert OperationLog.OperationLog(logDirectory).sequence == 7
+    assert restoredState(logDirectory, accounts) == poolState(pool, accounts)[:-1]
+
+
+def test_router_logsHops(pool, accounts, logDirectory):
+    print("logs the hops of routed swaps, dropping the reverted routes")
+    registry = PoolRegistry()
+    registry.register(pool)
+    router = Router(registry)
+    path = [TEST_TOKENS[0], FeeAmount.MEDIUM, TEST_TOKENS[1]]
+    log = OperationLog.OperationLog(logDirectory)
+    log.attach(pool)
+    pool.mint(accounts[2], -120, 120, expandTo18Decimals(1))
+
+    quote = router.quoteExactInput(path, 1000)[0]
+    # Not through tryExceptHandler, whose copy of the router would not be logged
+    with pytest.raises(Revert, match="Too little received"):
+        router.exactInput(accounts[2], path, 1000, quote + 1)
+    assert log.sequence == 1
+    assert router.exactInput(accounts[2], path, 1000, 0) == quote
+    router.exactOutput(accounts[2], list(reversed(path)), 10, 1000)
+    assert log.sequence == 3
+    log.flush()
+
+    assert restoredState(logDirectory, accounts) == poolState(pool, accounts)[:-1]
+    log.close()
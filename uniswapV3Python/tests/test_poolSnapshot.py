@@ -0,0 +1,92 @@
+from .utilities import *
+from .test_uniswapPool import ledger, accounts
+from .test_fork import pool, poolState
+
+from ..src.UniswapPool import *
+from ..src.libraries import PoolSnapshot
+
+
+@pytest.fixture
+def snapshotPath(tmp_path):
+    return str(tmp_path / "pool.bin")
+
+
+def test_saveLoad_sameState(pool, accounts, snapshotPath):
+    print("loads the same state that was saved")
+    pool.setFeeProtocol(4, 5)
+    pool.swap(accounts[2], True, expandTo18Decimals(1) // 10, encodePriceSqrt(1, 2))
+    pool.swap(accounts[2], False, expandTo18Decimals(1) // 5, encodePriceSqrt(2, 1))
+    pool.burn(accounts[1], -1200, 120, expandTo18Decimals(1) // 2)
+
+    pool.save(snapshotPath)
+    loaded = UniswapPool.load(snapshotPath, pool.ledger)
+
+    assert loaded.address != pool.address
+    assert poolState(loaded, accounts)[:-2] == poolState(pool, accounts)[:-2]
+    assert loaded.balances == pool.balances
+    assert loaded.ticks.sortedTicks == pool.ticks.sortedTicks
+    for tick in loaded.ticks:
+        assert loaded.ticks[tick].sqrtPriceX96 == TickMath.getSqrtRatioAtTick(tick)
+
+    # Both pools behave the same from then on
+    for p in [pool, loaded]:
+        p.swap(accounts[3], True, expandTo18Decimals(1), encodePriceSqrt(1, 3))
+        p.collect(accounts[1], -1200, 120, MAX_UINT128, MAX_UINT128)
+    assert poolState(loaded, accounts)[:-2] == poolState(pool, accounts)[:-2]
+
+
+def test_save_forkedPool(pool, accounts, snapshotPath):
+    print("saves a fork without copying its shared entries")
+    fork = pool.fork()
+    fork.swap(accounts[2], True, 1000, encodePriceSqrt(1, 2))
+    fork.save(snapshotPath)
+    assert fork.ticks.ownedKeys == set()
+
+    loaded = UniswapPool.load(snapshotPath, fork.ledger)
+    assert poolState(loaded, accounts)[:-2] == poolState(fork, accounts)[:-2]
+
+
+def test_load_rejectsInvalidSnapshots(pool, snapshotPath):
+    print("rejects files that are not complete snapshots")
+    pool.save(snapshotPath)
+    with open(snapshotPath, "rb") as file:
+        data = file.read()
+
+    # Truncated anywhere, including within the header, the state and the strings
+    for size in range(PoolSnapshot.HEADER.size, len(data)):
+        with open(snapshotPath, "wb") as file:
+            file.write(data[:size])
+        with pytest.raises(ValueError, match="Truncated pool snapshot"):
+            UniswapPool.load(snapshotPath, pool.ledger)
+
+    for invalid in [b"", b"NOTAPOOL" + data[8:], data[: PoolSnapshot.HEADER.size - 1]]:
+        with open(snapshotPath, "wb") as file:
+            file.write(invalid)
+        with pytest.raises(ValueError, match="Invalid pool snapshot"):
+            UniswapPool.load(snapshotPath, pool.ledger)
+
+
+def test_load_rejectsInvalidStringTable(pool, snapshotPath):
+    print("rejects snapshots without the token strings or with unknown position owners")
+    pool.save(snapshotPath)
+    with open(snapshotPath, "rb") as file:
+        data = file.read()
+    numStrings = PoolSnapshot.HEADER.unpack_from(data)[4]
+    # numStrings is after the magic, version, fee and tick spacing
+    numStringsOffset = 20
+    # The owner index starts the last position
+    ownerOffset = len(data) - PoolSnapshot.POSITION.size
+
+    for invalid in [
+        data[:numStringsOffset]
+        + PoolSnapshot.toBytes(count, 4)
+        + data[numStringsOffset + 4 :]
+        for count in [0, 1]
+    ] + [
+        data[:ownerOffset] + PoolSnapshot.toBytes(owner, 4) + data[ownerOffset + 4 :]
+        for owner in [numStrings, 2**32 - 1]
+    ]:
+        with open(snapshotPath, "wb") as file:
+            file.write(invalid)
+        with pytest.raises(ValueError, match="Invalid pool snapshot"):
+            UniswapPool.load(snapshotPath, pool.ledger)
@@ -0,0 +1,203 @@
+from .utilities import *
+
+from ..src.UniswapPool import *
+from ..src.libraries.Account import Ledger
+from ..src.libraries.PoolRegistry import PoolRegistry
+from ..src.libraries.Router import Router
+
+TOKENS = ["Token0", "Token1", "Token2"]
+
+
+@pytest.fixture
+def ledger():
+    accounts = [
+        [name, TOKENS, [MAX_INT256 // 1000] * len(TOKENS)]
+        for name in ["ALICE", "BOB", "CHARLIE"]
+    ]
+    return Ledger(accounts)
+
+
+@pytest.fixture
+def accounts(ledger):
+    return list(ledger.accounts.keys())
+
+
+def createPool(ledger, provider, tokenA, tokenB, fee, tickSpacing, price, liquidity):
+    pool = UniswapPool(tokenA, tokenB, fee, tickSpacing, ledger)
+    pool.initialize(price)
+    pool.mint(provider, getMinTick(tickSpacing), getMaxTick(tickSpacing), liquidity)
+    pool.mint(provider, -10 * tickSpacing, 10 * tickSpacing, liquidity)
+    return pool
+
+
+@pytest.fixture
+def registry(ledger, accounts):
+    registry = PoolRegistry()
+    liquidity = expandTo18Decimals(10)
+    registry.register(
+        createPool(
+            ledger,
+            accounts[0],
+            TOKENS[0],
+            TOKENS[1],
+            FeeAmount.MEDIUM,
+            60,
+            encodePriceSqrt(1, 1),
+            liquidity,
+        )
+    )
+    registry.register(
+        createPool(
+            ledger,
+            accounts[0],
+            TOKENS[1],
+            TOKENS[2],
+            FeeAmount.LOW,
+            10,
+            encodePriceSqrt(2, 1),
+            liquidity,
+        )
+    )
+    # Direct pool with a worse price than the route through Token1
+    registry.register(
+        createPool(
+            ledger,
+            accounts[0],
+            TOKENS[0],
+            TOKENS[2],
+            FeeAmount.HIGH,
+            200,
+            encodePriceSqrt(1, 1),
+            liquidity,
+        )
+    )
+    return registry
+
+
+@pytest.fixture
+def router(registry):
+    return Router(registry)
+
+
+PATH = [TOKENS[0], FeeAmount.MEDIUM, TOKENS[1], FeeAmount.LOW, TOKENS[2]]
+
+
+def test_registry_lookups(registry):
+    print("finds pools in either token order and indexes them by pair")
+    pool = registry.getPool(TOKENS[1], TOKENS[0], FeeAmount.MEDIUM)
+    assert (pool.token0, pool.token1) == (TOKENS[0], TOKENS[1])
+    assert registry.getPool(TOKENS[0], TOKENS[1], FeeAmount.LOW) == None
+    assert list(registry.getPoolsForPair(TOKENS[2], TOKENS[1])) == [FeeAmount.LOW]
+    assert sorted(registry.getPairedTokens(TOKENS[0])) == [TOKENS[1], TOKENS[2]]
+    assert len(registry) == 3
+    tryExceptHandler(registry.register, "Pool already exists", pool)
+
+
+def test_quoteExactInput_matchesSequentialSwaps(router, registry, accounts):
+    print("quotes the same output as swapping through every pool")
+    amountIn = expandTo18Decimals(1)
+    (amountOut, sqrtPrices, ticksCrossed) = router.quoteExactInput(PATH, amountIn)
+
+    pool01 = copy.deepcopy(registry.getPool(TOKENS[0], TOKENS[1], FeeAmount.MEDIUM))
+    pool12 = copy.deepcopy(registry.getPool(TOKENS[1], TOKENS[2], FeeAmount.LOW))
+    amount1 = pool01.swap(accounts[1], True, amountIn, MIN_SQRT_RATIO + 1)[2]
+    amount2 = pool12.swap(accounts[1], True, -amount1, MIN_SQRT_RATIO + 1)[2]
+
+    assert amountOut == -amount2
+    assert sqrtPrices == [pool01.slot0.sqrtPriceX96, pool12.slot0.sqrtPriceX96]
+    assert len(ticksCrossed) == 2
+
+
+def test_exactInput(router, registry, ledger, accounts):
+    print("swaps along the path and settles only the input and output tokens")
+    amountIn = expandTo18Decimals(1)
+    balancesBefore = dict(ledger.accounts[accounts[1]].balances)
+    quote = router.quoteExactInput(PATH, amountIn)[0]
+
+    amountOut = router.exactInput(accounts[1], PATH, amountIn, quote)
+
+    assert amountOut == quote
+    balances = ledger.accounts[accounts[1]].balances
+    assert balances[TOKENS[0]] == balancesBefore[TOKENS[0]] - amountIn
+    assert balances[TOKENS[1]] == balancesBefore[TOKENS[1]]
+    assert balances[TOKENS[2]] == balancesBefore[TOKENS[2]] + amountOut
+    for pool in registry:
+        assert pool.ticks.journals == [] and pool.ledger.journals == []
+
+
+def test_exactOutput(router, ledger, accounts):
+    print("swaps in reverse along the path to receive the exact output")
+    amountOut = expandTo18Decimals(1)
+    balancesBefore = dict(ledger.accounts[accounts[1]].balances)
+    quote = router.quoteExactOutput(PATH, amountOut)[0]
+
+    amountIn = router.exactOutput(accounts[1], PATH, amountOut, quote)
+
+    assert amountIn == quote
+    balances = ledger.accounts[accounts[1]].balances
+    assert balances[TOKENS[0]] == balancesBefore[TOKENS[0]] - amountIn
+    assert balances[TOKENS[1]] == balancesBefore[TOKENS[1]]
+    assert balances[TOKENS[2]] == balancesBefore[TOKENS[2]] + amountOut
+
+
+def test_slippageChecks_revertAllHops(router, registry, ledger, accounts):
+    print("reverts every hop if the amounts are outside of the limits")
+    stateBefore = copy.deepcopy(
+        ([pool.slot0 for pool in registry], ledger.accounts[accounts[1]].balances)
+    )
+    amount = expandTo18Decimals(1)
+    quoteOut = router.quoteExactInput(PATH, amount)[0]
+    quoteIn = router.quoteExactOutput(PATH, amount)[0]
+
+    tryExceptHandler(
+        router.exactInput,
+        "Too little received",
+        accounts[1],
+        PATH,
+        amount,
+        quoteOut + 1,
+    )
+    tryExceptHandler(
+        router.exactOutput,
+        "Too much requested",
+        accounts[1],
+        PATH,
+        amount,
+        quoteIn - 1,
+    )
+    assert stateBefore == (
+        [pool.slot0 for pool in registry],
+        ledger.accounts[accounts[1]].balances,
+    )
+
+
+def test_quoteBest_picksBestPath(router):
+    print("finds every path and picks the one with the best quote")
+    paths = router.getPaths(TOKENS[0], TOKENS[2], 2)
+    assert sorted(paths, key=len) == [
+        [TOKENS[0], FeeAmount.HIGH, TOKENS[2]],
+        PATH,
+    ]
+    assert router.getPaths(TOKENS[0], TOKENS[2], 1) == [
+        [TOKENS[0], FeeAmount.HIGH, TOKENS[2]]
+    ]
+
+    amount = expandTo18Decimals(1)
+    (path, amountOut) = router.quoteBestExactInput(TOKENS[0], TOKENS[2], amount, 2)
+    assert path == PATH and amountOut == router.quoteExactInput(PATH, amount)[0]
+    (path, amountIn) = router.quoteBestExactOutput(TOKENS[0], TOKENS[2], amount, 2)
+    assert path == PATH and amountIn == router.quoteExactOutput(PATH, amount)[0]
+
+
+def test_invalidPaths(router):
+    print("reverts on malformed paths and missing pools")
+    tryExceptHandler(router.quoteExactInput, "Invalid path", [TOKENS[0]], 1)
+    tryExceptHandler(
+        router.quoteExactInput, "Invalid path", [TOKENS[0], FeeAmount.LOW], 1
+    )
+    tryExceptHandler(
+        router.quoteExactInput,
+        "Pool doesn't exist",
+        [TOKENS[0], FeeAmount.LOW, TOKENS[1]],
+        1,
+    )
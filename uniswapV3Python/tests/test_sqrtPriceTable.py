@@ -0,0 +1,80 @@
+from ..src.libraries import SqrtPriceTable, TickMath
+from .utilities import *
+
+
+@pytest.fixture
+def tablePath(tmp_path):
+    path = str(tmp_path / "sqrtPrices.bin")
+    SqrtPriceTable.generate(path, -1000, 1000)
+    return path
+
+
+@pytest.fixture
+def installedTable(tablePath):
+    assert SqrtPriceTable.install(tablePath)
+    yield TickMath.sqrtPriceTable
+    TickMath.setSqrtPriceTable(None).close()
+
+
+def test_table_matchesFormula(tablePath):
+    print("stores the formula result of every tick")
+    table = SqrtPriceTable.load(tablePath)
+    assert (table.minTick, table.maxTick) == (-1000, 1000)
+    assert SqrtPriceTable.verify(table) == []
+    assert table.lookup(-1001) == None and table.lookup(1001) == None
+    table.close()
+
+
+def test_table_fullRangeBoundaries(tmp_path):
+    print("stores the boundary ticks of the full range")
+    path = str(tmp_path / "sqrtPrices.bin")
+    SqrtPriceTable.generate(path, MIN_TICK, MIN_TICK + 10)
+    table = SqrtPriceTable.load(path)
+    assert table.lookup(MIN_TICK) == MIN_SQRT_RATIO
+    assert SqrtPriceTable.verify(table) == []
+    table.close()
+
+
+def test_getSqrtRatioAtTick_readsTable(installedTable):
+    print("reads the installed table and falls back to the formula outside of it")
+    for tick in [-1000, -1, 0, 1, 999, 1000, -1001, 1001, MIN_TICK, MAX_TICK]:
+        assert TickMath.getSqrtRatioAtTick(tick) == TickMath.computeSqrtRatioAtTick(
+            tick
+        )
+    tryExceptHandler(TickMath.getSqrtRatioAtTick, "T", MAX_TICK + 1)
+
+
+def test_verify_detectsCorruption(tablePath):
+    print("verification reports the entries that don't match the formula")
+    with open(tablePath, "r+b") as file:
+        file.seek(SqrtPriceTable.HEADER.size + 10 * SqrtPriceTable.ENTRY_SIZE)
+        file.write(b"\x01")
+    table = SqrtPriceTable.load(tablePath)
+    assert SqrtPriceTable.verify(table) == [-990]
+    table.close()
+
+
+def test_install_absentTable(tmp_path):
+    print("keeps using the formula if the table doesn't exist")
+    assert not SqrtPriceTable.install(str(tmp_path / "missing.bin"))
+    assert TickMath.sqrtPriceTable == None
+
+
+def test_load_rejectsTruncatedTable(tablePath):
+    print("rejects a truncated table")
+    with open(tablePath, "r+b") as file:
+        file.truncate(SqrtPriceTable.HEADER.size + 5)
+    with pytest.raises(ValueError, match="Truncated sqrt price table"):
+        SqrtPriceTable.load(tablePath)
+
+
+def test_load_rejectsInvalidHeader(tablePath):
+    print("rejects a table with another magic")
+    with open(tablePath, "r+b") as file:
+        file.write(b"NOTATABL")
+    with pytest.raises(ValueError, match="Invalid sqrt price table"):
+        SqrtPriceTable.load(tablePath)
+    with open(tablePath, "r+b") as file:
+        file.truncate(SqrtPriceTable.HEADER.size - 1)
+    with pytest.raises(ValueError, match="Invalid sqrt price table"):
+        SqrtPriceTable.load(tablePath)
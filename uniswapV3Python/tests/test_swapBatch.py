@@ -0,0 +1,65 @@
+from .utilities import *
+from .test_uniswapPool import ledger, accounts
+from .test_fork import pool, poolState
+
+from ..src.UniswapPool import *
+
+
+def getOrders(accounts):
+    return [
+        (accounts[2], True, expandTo18Decimals(1) // 10, encodePriceSqrt(1, 2)),
+        (accounts[3], False, expandTo18Decimals(1) // 5, encodePriceSqrt(2, 1)),
+        (accounts[2], False, -expandTo18Decimals(1) // 20, encodePriceSqrt(2, 1)),
+        (accounts[3], True, -expandTo18Decimals(1) // 4, encodePriceSqrt(1, 2)),
+        (accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2)),
+    ]
+
+
+def test_swapBatch_matchesSequentialSwaps(pool, accounts):
+    print("ends in the same state as executing the swaps one by one")
+    poolCopy = copy.deepcopy(pool)
+    orders = getOrders(accounts)
+
+    results = pool.swapBatch(orders)
+    expected = [poolCopy.swap(*order) for order in orders]
+
+    assert results == expected
+    assert poolState(pool, accounts) == poolState(poolCopy, accounts)
+    assert pool.ticks.journals == [] and pool.ledger.journals == []
+
+
+def test_swapBatch_nettedSettlement(pool, accounts):
+    print("recipients only need to cover their net payment")
+    pool.ledger.setBalance(accounts[2], TEST_TOKENS[1], 0)
+    poolCopy = copy.deepcopy(pool)
+    # Sell token1 before buying it back within the batch
+    orders = [
+        (accounts[2], False, expandTo18Decimals(1) // 10, encodePriceSqrt(2, 1)),
+        (accounts[2], True, -expandTo18Decimals(1) // 10, encodePriceSqrt(1, 2)),
+    ]
+
+    pool.swapBatch(orders)
+    assert pool.ledger.balanceOf(accounts[2], TEST_TOKENS[1]) == 0
+
+    tryExceptHandler(poolCopy.swap, "Insufficient balance", *orders[0])
+
+
+def test_swapBatch_revertsWholeBatch(pool, accounts):
+    print("reverts all the swaps if one of them reverts")
+    stateBefore = poolState(pool, accounts)
+    orders = getOrders(accounts)
+    orders.append((accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(2, 1)))
+
+    with pytest.raises(AssertionError, match="SPL"):
+        pool.swapBatch(orders)
+    assert poolState(pool, accounts) == stateBefore
+
+
+def test_swapBatch_revertsOnInsufficientBalance(pool, accounts):
+    print("reverts the batch if a recipient can't cover its net payment")
+    pool.ledger.setBalance(accounts[2], TEST_TOKENS[0], 1)
+    stateBefore = poolState(pool, accounts)
+
+    with pytest.raises(AssertionError, match="Insufficient balance"):
+        pool.swapBatch(getOrders(accounts))
+    assert poolState(pool, accounts) == stateBefore
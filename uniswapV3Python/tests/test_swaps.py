@@ -144,6 +144,115 @@ def test_uniswap_swaps(TEST_POOLS):
         assert float(dict["tickBefore"]) == slot0.tick
 
 
+# Read-only quotes
+
+
+def test_quoteSwap_matchesSwap(TEST_POOLS):
+    (_, _, pool, _, _, recipient, poolFixture) = TEST_POOLS
+    print("quotes the same result as the swap without modifying the pool")
+    swapTests = (
+        DEFAULT_POOL_SWAP_TESTS
+        if poolFixture.swapTests == None
+        else poolFixture.swapTests
+    )
+    poolBefore = copy.deepcopy(pool)
+
+    for testCase in swapTests:
+        (zeroForOne, amountSpecified, sqrtPriceLimitX96) = swapCaseToParams(testCase)
+        poolInstance = copy.deepcopy(pool)
+        try:
+            (_, amount0, amount1, sqrtPriceX96, liquidity, tick) = poolInstance.swap(
+                recipient, zeroForOne, amountSpecified, sqrtPriceLimitX96
+            )
+        except AssertionError as msg:
+            tryExceptHandler(
+                pool.quoteSwap,
+                str(msg),
+                zeroForOne,
+                amountSpecified,
+                sqrtPriceLimitX96,
+            )
+            continue
+
+        quote = pool.quoteSwap(zeroForOne, amountSpecified, sqrtPriceLimitX96)
+        assert quote[:5] == (amount0, amount1, sqrtPriceX96, liquidity, tick)
+        # The crossed ticks are initialized ticks, crossed in the direction of the swap
+        assert all(pool.ticks.__contains__(tick) for tick in quote[5])
+        assert quote[5] == sorted(quote[5], reverse=zeroForOne)
+
+    assert pool.slot0 == poolBefore.slot0
+    assert pool.ticks == poolBefore.ticks
+    assert pool.positions == poolBefore.positions
+    assert pool.balances == poolBefore.balances
+    assert pool.feeGrowthGlobal0X128 == poolBefore.feeGrowthGlobal0X128
+    assert pool.feeGrowthGlobal1X128 == poolBefore.feeGrowthGlobal1X128
+
+
+# Quote curve
+
+
+@pytest.mark.parametrize("zeroForOne", [True, False])
+def test_quoteCurve_matchesQuoteSwap(TEST_POOLS, zeroForOne):
+    (_, _, pool, _, _, _, _) = TEST_POOLS
+    print("quotes every amount of the curve exactly as a single quoteSwap")
+    sqrtPriceLimitX96 = (
+        TickMath.MIN_SQRT_RATIO + 1 if zeroForOne else TickMath.MAX_SQRT_RATIO - 1
+    )
+    try:
+        pool.quoteSwap(zeroForOne, 1, sqrtPriceLimitX96)
+    except AssertionError as msg:
+        # The price is already at the limit
+        tryExceptHandler(pool.quoteCurve, str(msg), zeroForOne, [1])
+        return
+
+    amounts = [1, 1000, expandTo18Decimals(1), 2**127] + [
+        expandTo18Decimals(1) * i // 7 for i in range(1, 30)
+    ]
+    # Amounts that end exactly at the initialized ticks crossed, and right around them
+    for tick in pool.quoteSwap(zeroForOne, 2**127, sqrtPriceLimitX96)[5][:5]:
+        tickPrice = TickMath.getSqrtRatioAtTick(tick)
+        if tickPrice == pool.slot0.sqrtPriceX96:
+            continue
+        amountIn = pool.quoteSwap(zeroForOne, 2**127, tickPrice)[
+            0 if zeroForOne else 1
+        ]
+        amounts += [amountIn - 1, amountIn, amountIn + 1]
+    amounts = [amount for amount in amounts if amount > 0]
+
+    curve = pool.quoteCurve(zeroForOne, amounts)
+
+    for (amount, quote) in zip(amounts, curve):
+        assert quote == pool.quoteSwap(zeroForOne, amount, sqrtPriceLimitX96)[:5]
+
+
+# Validation levels
+
+
+@pytest.mark.parametrize("level", [VALIDATION_BOUNDARY, VALIDATION_OFF])
+def test_validationLevels_identicalResults(TEST_POOLS, level):
+    (_, _, pool, _, _, recipient, poolFixture) = TEST_POOLS
+    print("gives the same swap results with reduced validation")
+    swapTests = (
+        DEFAULT_POOL_SWAP_TESTS
+        if poolFixture.swapTests == None
+        else poolFixture.swapTests
+    )
+    for testCase in swapTests:
+        swapParams = swapCaseToParams(testCase)
+        results = []
+        for validationLevel in [VALIDATION_STRICT, level]:
+            previousLevel = setValidationLevel(validationLevel)
+            poolInstance = pool.fork()
+            try:
+                result = poolInstance.swap(recipient, *swapParams)
+            except AssertionError as msg:
+                result = str(msg)
+            finally:
+                setValidationLevel(previousLevel)
+            results.append((result, poolInstance.slot0, dict(poolInstance.ticks)))
+        assert results[0] == results[1]
+
+
 def executeSwap(pool, testCase, recipient):
     sqrtPriceLimit = (
         None
@@ -242,6 +242,24 @@ def test_noGrowing_ifTickGtCurrentTick():
     assert tickMapping[2].feeGrowthOutside1X128 == 0
 
 
+def test_cachesSqrtPrice_onCreation():
+    print("caches the sqrt price of the tick when it is created")
+    tickMapping = {}
+    Tick.update(tickMapping, -120, 1, 1, 1, 2, False, MAX_UINT128)
+
+    assert tickMapping[-120].sqrtPriceX96 == TickMath.getSqrtRatioAtTick(-120)
+    assert Tick.getSqrtRatioAtTick(tickMapping, -120) == tickMapping[-120].sqrtPriceX96
+
+
+def test_getSqrtRatioAtTick_uncachedTicks():
+    print("computes the sqrt price of ticks without a cached price")
+    tickMapping = {2: TickInfo(3, 4, 1, 2)}
+    for tick in [2, 5, MIN_TICK, MAX_TICK]:
+        assert Tick.getSqrtRatioAtTick(
+            tickMapping, tick
+        ) == TickMath.getSqrtRatioAtTick(tick)
+
+
 # Clear
 
 
@@ -0,0 +1,225 @@
+from .utilities import *
+from .test_uniswapPool import ledger, accounts
+
+from ..src.UniswapPool import *
+from ..src.libraries import TickBitmap
+
+
+def isInitialized(tickBitmap, tick):
+    (next, initialized) = TickBitmap.nextInitializedTickWithinOneWord(
+        tickBitmap, tick, 1, True
+    )
+    return next == tick if initialized else False
+
+
+def flipTicks(tickBitmap, ticks):
+    for tick in ticks:
+        TickBitmap.flipTick(tickBitmap, tick, 1)
+
+
+# isInitialized
+
+
+def test_isFalseAtFirst():
+    print("is false at first")
+    assert isInitialized({}, 1) == False
+
+
+def test_isTrueIfSet():
+    print("is flipped by #flipTick")
+    tickBitmap = {}
+    flipTicks(tickBitmap, [1])
+    assert isInitialized(tickBitmap, 1) == True
+
+
+def test_isFalseIfFlippedBack():
+    print("is flipped back by #flipTick")
+    tickBitmap = {}
+    flipTicks(tickBitmap, [1, 1])
+    assert isInitialized(tickBitmap, 1) == False
+    assert tickBitmap == {}
+
+
+def test_isNotChangedByAnotherFlip():
+    print("is not changed by another flip to a different tick")
+    tickBitmap = {}
+    flipTicks(tickBitmap, [2])
+    assert isInitialized(tickBitmap, 1) == False
+
+
+def test_isNotChangedByAnotherFlipOnAnotherWord():
+    print("is not changed by another flip to a different tick on another word")
+    tickBitmap = {}
+    flipTicks(tickBitmap, [1 + 256])
+    assert isInitialized(tickBitmap, 257) == True
+    assert isInitialized(tickBitmap, 1) == False
+
+
+# flipTick
+
+
+def test_flipsOnlyTheSpecifiedTick():
+    print("flips only the specified tick")
+    tickBitmap = {}
+    flipTicks(tickBitmap, [-230])
+    assert isInitialized(tickBitmap, -230) == True
+    assert isInitialized(tickBitmap, -231) == False
+    assert isInitialized(tickBitmap, -229) == False
+    assert isInitialized(tickBitmap, -230 + 256) == False
+    assert isInitialized(tickBitmap, -230 - 256) == False
+    flipTicks(tickBitmap, [-230])
+    assert isInitialized(tickBitmap, -230) == False
+
+
+def test_revertsOnlyItself():
+    print("reverts only itself")
+    tickBitmap = {}
+    flipTicks(tickBitmap, [-230, -259, -229, 500, -259, -229, -259])
+    assert isInitialized(tickBitmap, -259) == True
+    assert isInitialized(tickBitmap, -229) == False
+
+
+def test_flipTick_notSpaced():
+    print("reverts if the tick is not spaced")
+    tryExceptHandler(TickBitmap.flipTick, "", {}, 5, 10)
+
+
+# nextInitializedTickWithinOneWord
+
+
+def mockTickBitmap():
+    tickBitmap = {}
+    ## word boundaries are at multiples of 256
+    flipTicks(tickBitmap, [-200, -55, -4, 70, 78, 84, 139, 240, 535])
+    return tickBitmap
+
+
+@pytest.mark.parametrize(
+    "tick,expectedNext,expectedInitialized",
+    [
+        (78, 84, True),  ## returns tick to right if at initialized tick
+        (-55, -4, True),  ## returns tick to right if at initialized tick
+        (77, 78, True),  ## returns the tick directly to the right
+        (-56, -55, True),  ## returns the tick directly to the right
+        (
+            255,
+            511,
+            False,
+        ),  ## returns the next words initialized tick if on the right boundary
+        (
+            -257,
+            -200,
+            True,
+        ),  ## returns the next words initialized tick if on the right boundary
+        (508, 511, False),  ## does not exceed boundary
+        (255, 511, False),  ## skips entire word
+        (383, 511, False),  ## skips half word
+    ],
+)
+def test_nextInitializedTick_notLte(tick, expectedNext, expectedInitialized):
+    (next, initialized) = TickBitmap.nextInitializedTickWithinOneWord(
+        mockTickBitmap(), tick, 1, False
+    )
+    assert next == expectedNext
+    assert initialized == expectedInitialized
+
+
+def test_nextInitializedTick_nextWord_notLte():
+    print("returns the next initialized tick from the next word")
+    tickBitmap = mockTickBitmap()
+    flipTicks(tickBitmap, [340])
+    (next, initialized) = TickBitmap.nextInitializedTickWithinOneWord(
+        tickBitmap, 328, 1, False
+    )
+    assert next == 340
+    assert initialized == True
+
+
+@pytest.mark.parametrize(
+    "tick,expectedNext,expectedInitialized",
+    [
+        (78, 78, True),  ## returns same tick if initialized
+        (
+            79,
+            78,
+            True,
+        ),  ## returns tick directly to the left of input tick if not initialized
+        (258, 256, False),  ## will not exceed the word boundary
+        (256, 256, False),  ## at the word boundary
+        (72, 70, True),  ## word boundary less 1 (next initialized tick in next word)
+        (-257, -512, False),  ## word boundary
+        (1023, 768, False),  ## entire empty word
+        (900, 768, False),  ## halfway through empty word
+    ],
+)
+def test_nextInitializedTick_lte(tick, expectedNext, expectedInitialized):
+    (next, initialized) = TickBitmap.nextInitializedTickWithinOneWord(
+        mockTickBitmap(), tick, 1, True
+    )
+    assert next == expectedNext
+    assert initialized == expectedInitialized
+
+
+def test_nextInitializedTick_boundaryInitialized_lte():
+    print("boundary is initialized")
+    tickBitmap = mockTickBitmap()
+    flipTicks(tickBitmap, [329])
+    (next, initialized) = TickBitmap.nextInitializedTickWithinOneWord(
+        tickBitmap, 456, 1, True
+    )
+    assert next == 329
+    assert initialized == True
+
+
+# UniswapPool tickBitmap
+
+
+def createPoolWithPositions(ledger, accounts):
+    pool = UniswapPool(TEST_TOKENS[0], TEST_TOKENS[1], FeeAmount.MEDIUM, 60, ledger)
+    pool.initialize(encodePriceSqrt(1, 1))
+    pool.mint(accounts[0], getMinTick(60), getMaxTick(60), expandTo18Decimals(1))
+    pool.mint(accounts[0], -600, 60 * 300, expandTo18Decimals(1))
+    pool.mint(accounts[0], -60 * 300, 600, expandTo18Decimals(1))
+    return pool
+
+
+def test_poolTickBitmap_mintAndBurn(ledger, accounts):
+    print("flips the initialized ticks in the pool bitmap on mint and burn")
+    pool = createPoolWithPositions(ledger, accounts)
+    for tick in pool.ticks.keys():
+        assert isInitialized(pool.tickBitmap, tick // 60)
+        (next, initialized) = TickBitmap.nextInitializedTickWithinOneWord(
+            pool.tickBitmap, tick, 60, True
+        )
+        assert next == tick and initialized
+
+    pool.burn(accounts[0], -600, 60 * 300, expandTo18Decimals(1))
+    assert not isInitialized(pool.tickBitmap, -600 // 60)
+    assert not isInitialized(pool.tickBitmap, 300)
+
+
+def test_poolTickBitmap_swap(ledger, accounts):
+    print("swapping through the tick bitmap ends in the same tick as through the ticks")
+    pool = createPoolWithPositions(ledger, accounts)
+    poolBitmap = copy.deepcopy(pool)
+    poolBitmap.useTickBitmap = True
+    sqrtPriceLimit = TickMath.getSqrtRatioAtTick(-60 * 400)
+
+    (_, amount0, amount1, sqrtPriceX96, liquidity, tick) = pool.swap(
+        accounts[1], True, expandTo18Decimals(2), sqrtPriceLimit
+    )
+    (
+        _,
+        amount0Bitmap,
+        amount1Bitmap,
+        sqrtPriceX96Bitmap,
+        liquidityBitmap,
+        tickBitmap,
+    ) = poolBitmap.swap(accounts[1], True, expandTo18Decimals(2), sqrtPriceLimit)
+
+    assert amount0 == amount0Bitmap
+    assert tick == tickBitmap
+    assert liquidity == liquidityBitmap
+    ## Only the rounding of the extra steps at the word boundaries can differ
+    assert abs(amount1 - amount1Bitmap) <= 10
+    assert abs(sqrtPriceX96 - sqrtPriceX96Bitmap) <= 10
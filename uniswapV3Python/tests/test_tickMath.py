@@ -1,4 +1,5 @@
 import math
+from hypothesis import example, given, settings, strategies as st
 from .utilities import *
 from ..src.libraries import TickMath
 
@@ -151,3 +152,57 @@ def test_ticks():
         ratioOfTickPlusOne = TickMath.getSqrtRatioAtTick(tick + 1)
         assert ratio >= ratioOfTick
         assert ratio < ratioOfTickPlusOne
+
+
+# getTickAtSqrtRatioBounded
+
+
+# Prices spread over the whole tick range, uniformly over the uint160 range, and right around a tick boundary
+sqrtPrices = st.one_of(
+    st.floats(MIN_TICK, MAX_TICK).map(
+        lambda tick: min(
+            max(int(2**96 * 1.0001 ** (tick / 2)), MIN_SQRT_RATIO), MAX_SQRT_RATIO - 1
+        )
+    ),
+    st.integers(MIN_SQRT_RATIO, MAX_SQRT_RATIO - 1),
+    st.builds(
+        lambda tick, offset: TickMath.getSqrtRatioAtTick(tick) + offset,
+        st.integers(MIN_TICK + 1, MAX_TICK - 1),
+        st.integers(-1, 1),
+    ),
+)
+
+
+@given(sqrtPrices, st.integers(0, 2000), st.integers(0, 2000))
+@example(MIN_SQRT_RATIO, 0, 0)
+@example(MIN_SQRT_RATIO + 1, 0, 0)
+@example(MAX_SQRT_RATIO - 1, 0, 0)
+@settings(max_examples=1000)
+def test_bounded_matchesReference(price, belowTick, aboveTick):
+    print("returns the same tick as getTickAtSqrtRatio within the step interval")
+    tick = TickMath.getTickAtSqrtRatio(price)
+    tickLower = max(tick - belowTick, MIN_TICK)
+    tickUpper = min(tick + aboveTick, MAX_TICK)
+    assert TickMath.getTickAtSqrtRatioBounded(price, tickLower, tickUpper) == tick
+    assert TickMath.getTickAtSqrtRatioBounded(price, tick, tick) == tick
+
+
+# Bounds that don't contain the tick, as far as the other end of the tick range
+@given(sqrtPrices, st.integers(MIN_TICK, MAX_TICK), st.integers(1, MAX_TICK - MIN_TICK))
+@example(MIN_SQRT_RATIO, MAX_TICK, 1)
+@example(MAX_SQRT_RATIO - 1, MIN_TICK, 1)
+def test_bounded_wrongBounds(price, tickLower, width):
+    print("returns the right tick even if the bounds don't contain it")
+    tick = TickMath.getTickAtSqrtRatio(price)
+    tickUpper = min(tickLower + width, MAX_TICK)
+    assert TickMath.getTickAtSqrtRatioBounded(price, tickLower, tickUpper) == tick
+
+
+def test_bounded_throws():
+    print("throws for prices out of range")
+    tryExceptHandler(
+        TickMath.getTickAtSqrtRatioBounded, "R", MIN_SQRT_RATIO - 1, MIN_TICK, MAX_TICK
+    )
+    tryExceptHandler(
+        TickMath.getTickAtSqrtRatioBounded, "R", MAX_SQRT_RATIO, MIN_TICK, MAX_TICK
+    )
@@ -2,7 +2,7 @@ from .utilities import *
 from .test_uniswapPool import ledger
 
 from ..src.UniswapPool import *
-from ..src.libraries import TickMath
+from ..src.libraries import TickMath, Tick
 
 # Instead of testing tickBitmap library, we test the UniswapPool ticks python dict and
 # nextTick functionality, which should be equivalent.
@@ -176,3 +176,40 @@ def test_wordBoundaryInitialized(ledger):
     (next, initialized) = pool.nextTick(456, True)
     assert next == 329
     assert initialized == True
+
+
+# Sorted tick index
+
+
+def test_sortedIndex_insertAndClear(ledger):
+    print("keeps the sorted tick index in sync with the initialized ticks")
+    pool = initializePoolWithMockTicks(1, ledger)
+    assert pool.ticks.sortedTicks == [-200, -55, -4, 70, 78, 84, 139, 240, 535]
+
+    insertUninitializedTickstoMapping(pool.ticks, [100])
+    Tick.clear(pool.ticks, 78)
+    assert pool.ticks.sortedTicks == [-200, -55, -4, 70, 84, 100, 139, 240, 535]
+
+    (next, initialized) = pool.nextTick(78, True)
+    assert next == 70
+    assert initialized == True
+    (next, initialized) = pool.nextTick(84, False)
+    assert next == 100
+    assert initialized == True
+
+
+def test_sortedIndex_mintAndBurn(ledger):
+    print("keeps the sorted tick index in sync through mint and burn")
+    accounts = list(ledger.accounts.keys())
+    pool = UniswapPool(TEST_TOKENS[0], TEST_TOKENS[1], FeeAmount.MEDIUM, 60, ledger)
+    pool.initialize(encodePriceSqrt(1, 1))
+    pool.mint(accounts[0], -120, 60, 100)
+    pool.mint(accounts[0], -60, 60, 100)
+    assert pool.ticks.sortedTicks == [-120, -60, 60]
+
+    pool.burn(accounts[0], -120, 60, 100)
+    assert pool.ticks.sortedTicks == [-60, 60]
+    assert sorted(pool.ticks.keys()) == pool.ticks.sortedTicks
+
+    poolCopy = copy.deepcopy(pool)
+    assert poolCopy.ticks.sortedTicks == [-60, 60]
@@ -76,3 +76,119 @@ def test_tokenReceive():
     tryExceptHandler(
         ledger.receiveToken, "OF or UF of UINT256", accounts[0], TEST_TOKENS[1], -25
     )
+
+
+def test_transferMany():
+    ledger = Ledger([["ALICE", TEST_TOKENS, [100, 100]], ["BOB", TEST_TOKENS, [0, 0]]])
+    accounts = list(ledger.accounts.keys())
+    (alice, bob) = [ledger.getHandle(account) for account in accounts]
+    (token0, token1) = [ledger.getTokenId(token) for token in TEST_TOKENS]
+
+    # Transfers are applied in order, so received tokens can be sent on
+    ledger.transferMany([(alice, bob, token0, 60), (bob, alice, token0, 10)])
+    assert ledger.getBalance(alice, token0) == 50
+    assert ledger.balanceOf(accounts[1], TEST_TOKENS[0]) == 50
+
+    # All or nothing
+    tryExceptHandler(
+        ledger.transferMany,
+        "Insufficient balance",
+        [(alice, bob, token1, 30), (bob, alice, token1, 40)],
+    )
+    assert ledger.getBalance(alice, token1) == 100
+    assert ledger.getBalance(bob, token1) == 0
+
+    # Also for exceptions other than reverts
+    with pytest.raises(IndexError):
+        ledger.transferMany([(alice, bob, token1, 30), (alice, bob, 99, 1)])
+    assert ledger.getBalance(alice, token1) == 100
+    assert ledger.getBalance(bob, token1) == 0
+
+
+def test_ledgerColumns():
+    ledger = Ledger([["ALICE", TEST_TOKENS, [100, 100]]])
+    address = ledger.createAccount("BOB", ["Token2"], [5])
+
+    # Every account holds every token
+    assert ledger.balanceOf(address, TEST_TOKENS[0]) == 0
+    assert dict(ledger.accounts[address].balances) == {
+        TEST_TOKENS[0]: 0,
+        TEST_TOKENS[1]: 0,
+        "Token2": 5,
+    }
+    assert ledger.columns[ledger.getTokenId("Token2")] == [0, 5]
+
+
+def test_ledgerFork():
+    ledger = Ledger([["ALICE", TEST_TOKENS, [100, 100]], ["BOB", TEST_TOKENS, [0, 0]]])
+    accounts = list(ledger.accounts.keys())
+    fork = ledger.fork()
+
+    fork.transferToken(accounts[0], accounts[1], TEST_TOKENS[0], 25)
+    # The columns are shared and only the balances written are held by the fork
+    assert fork.columns[0] is ledger.columns[0] and ledger.columns[0] == [100, 0]
+    assert fork.overlay == {(0, 0): 75, (1, 0): 25}
+    ledger.transferToken(accounts[0], accounts[1], TEST_TOKENS[1], 10)
+    assert ledger.overlay == {(0, 1): 90, (1, 1): 10}
+    assert fork.balanceOf(accounts[1], TEST_TOKENS[1]) == 0
+
+    newAccount = fork.createAccount("CHARLIE", TEST_TOKENS, [1, 1])
+    otherAccount = fork.createAccount("DENICE", ["Token2"], [7])
+    assert ledger.balanceOf(accounts[1], TEST_TOKENS[0]) == 0
+    assert list(ledger.accounts) == accounts
+    assert fork.accounts[accounts[1]].balances[TEST_TOKENS[0]] == 25
+
+    ledger.merge(fork)
+    assert ledger.balanceOf(accounts[1], TEST_TOKENS[0]) == 25
+    assert ledger.balanceOf(accounts[1], TEST_TOKENS[1]) == 10
+    assert ledger.balanceOf(newAccount, TEST_TOKENS[1]) == 1
+    assert ledger.balanceOf(otherAccount, "Token2") == 7
+    assert ledger.balanceOf(accounts[0], "Token2") == 0
+
+
+def test_ledgerMerge_keepsParentTransfers():
+    ledger = Ledger([["ALICE", TEST_TOKENS, [100, 100]], ["BOB", TEST_TOKENS, [0, 0]]])
+    accounts = list(ledger.accounts.keys())
+    fork = ledger.fork()
+
+    fork.transferToken(accounts[0], accounts[1], TEST_TOKENS[0], 25)
+    ledger.transferToken(accounts[0], accounts[1], TEST_TOKENS[0], 10)
+    ledger.merge(fork)
+    assert ledger.balanceOf(accounts[0], TEST_TOKENS[0]) == 65
+    assert ledger.balanceOf(accounts[1], TEST_TOKENS[0]) == 35
+
+
+def test_ledgerMerge_insufficientBalance():
+    ledger = Ledger([["ALICE", TEST_TOKENS, [100, 100]], ["BOB", TEST_TOKENS, [0, 0]]])
+    accounts = list(ledger.accounts.keys())
+    fork = ledger.fork()
+
+    # Both ledgers spend the same balance
+    fork.transferToken(accounts[0], accounts[1], TEST_TOKENS[0], 60)
+    fork.transferToken(accounts[0], accounts[1], TEST_TOKENS[1], 60)
+    ledger.transferToken(accounts[0], accounts[1], TEST_TOKENS[1], 50)
+    with pytest.raises(Revert, match="Insufficient balance"):
+        ledger.merge(fork)
+    assert ledger.balanceOf(accounts[0], TEST_TOKENS[0]) == 100
+    assert ledger.balanceOf(accounts[1], TEST_TOKENS[1]) == 50
+
+
+def test_ledgerMerge_accountsCreatedOnBoth():
+    ledger = Ledger([["ALICE", TEST_TOKENS, [100, 100]]])
+    fork = ledger.fork()
+    fork.createAccount("BOB", TEST_TOKENS, [1, 1])
+    ledger.createAccount("CHARLIE", TEST_TOKENS, [1, 1])
+    with pytest.raises(Revert, match="Accounts created on both ledgers"):
+        ledger.merge(fork)
+
+
+def test_deterministicAddresses():
+    accountsParams = [["ALICE", TEST_TOKENS, [1, 1]], ["BOB", TEST_TOKENS, [1, 1]]]
+    ledger = Ledger(accountsParams)
+    accounts = list(ledger.accounts.keys())
+
+    # Same addresses for the same sequence of accounts created
+    assert list(Ledger(accountsParams).accounts.keys()) == accounts
+    assert len(set(accounts)) == 2 and len(accounts[0]) == 80
+    # Different addresses for a different seed
+    assert set(Ledger(accountsParams, seed=1).accounts.keys()).isdisjoint(accounts)
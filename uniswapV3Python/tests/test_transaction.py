@@ -0,0 +1,123 @@
+from .utilities import *
+from .test_uniswapPool import ledger, accounts
+from .test_fork import pool, poolState
+
+from ..src.UniswapPool import *
+
+
+def test_transaction_commits(pool, accounts):
+    print("keeps the changes if nothing reverts")
+    poolCopy = copy.deepcopy(pool)
+    with pool.transaction():
+        pool.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+        pool.mint(accounts[2], -120, 1200, expandTo18Decimals(1))
+    poolCopy.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+    poolCopy.mint(accounts[2], -120, 1200, expandTo18Decimals(1))
+
+    assert poolState(pool, accounts) == poolState(poolCopy, accounts)
+    assert pool.ticks.journals == [] and pool.ledger.journals == []
+
+
+def test_transaction_revertsPartialWrites(pool, accounts):
+    print("restores the ticks updated before the tick spacing check")
+    stateBefore = poolState(pool, accounts)
+    with pytest.raises(AssertionError):
+        with pool.transaction():
+            pool.mint(accounts[2], -125, 1200, 1)
+
+    assert poolState(pool, accounts) == stateBefore
+    assert pool.ticks.sortedTicks == sorted(pool.ticks.keys())
+
+
+def test_transaction_revertsAllCalls(pool, accounts):
+    print("restores all the state written within the transaction")
+    stateBefore = poolState(pool, accounts)
+    with pytest.raises(AssertionError, match="SPL"):
+        with pool.transaction():
+            pool.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+            pool.burn(accounts[1], -1200, 120, expandTo18Decimals(1))
+            pool.collect(accounts[1], -1200, 120, MAX_UINT128, MAX_UINT128)
+            pool.setFeeProtocol(6, 6)
+            pool.mint(accounts[2], -60, 60, expandTo18Decimals(1))
+            pool.swap(accounts[2], False, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+
+    assert poolState(pool, accounts) == stateBefore
+    assert pool.ticks.sortedTicks == sorted(pool.ticks.keys())
+
+
+def test_transaction_nested(pool, accounts):
+    print("an inner revert only restores the writes of the inner transaction")
+    with pool.transaction():
+        pool.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+        stateAfterSwap = poolState(pool, accounts)
+        with pytest.raises(AssertionError):
+            with pool.transaction():
+                pool.burn(accounts[1], -1200, 120, expandTo18Decimals(1))
+                pool.swap(accounts[2], False, 0, encodePriceSqrt(2, 1))
+        assert poolState(pool, accounts) == stateAfterSwap
+    assert poolState(pool, accounts) == stateAfterSwap
+
+
+def test_transaction_fork(pool, accounts):
+    print("reverting a transaction on a fork doesn't affect the parent")
+    stateBefore = poolState(pool, accounts)
+    fork = pool.fork()
+    with pytest.raises(AssertionError):
+        with fork.transaction():
+            fork.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+            fork.swap(accounts[2], True, 0, encodePriceSqrt(1, 2))
+
+    assert poolState(fork, accounts) == stateBefore
+    assert poolState(pool, accounts) == stateBefore
+
+
+# Calls that write to the pool and the ledger before reverting, with their revert message
+
+
+def mintInvalidTickSpacing(pool, accounts):
+    pool.mint(accounts[2], -125, 1200, 1)
+
+
+def swapPastLimit(pool, accounts):
+    pool.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+    pool.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(2, 1))
+
+
+def mintInsufficientBalance(pool, accounts):
+    pool.burn(accounts[1], -1200, 120, expandTo18Decimals(1))
+    pool.collect(accounts[1], -1200, 120, MAX_UINT128, MAX_UINT128)
+    pool.ledger.setBalance(accounts[2], TEST_TOKENS[0], 10)
+    pool.mint(accounts[2], -120, 120, expandTo18Decimals(1))
+
+
+def setInvalidFeeProtocol(pool, accounts):
+    pool.setFeeProtocol(6, 6)
+    pool.setFeeProtocol(3, 3)
+
+
+@pytest.mark.parametrize(
+    "calls, message",
+    [
+        (mintInvalidTickSpacing, ""),
+        (swapPastLimit, "SPL"),
+        (mintInsufficientBalance, "Insufficient balance"),
+        (setInvalidFeeProtocol, ""),
+    ],
+)
+def test_transaction_matchesDeepcopyRollback(pool, accounts, calls, message):
+    print("restores the same state as discarding a reverted deep copy of the pool")
+    poolCopy = copy.deepcopy(pool)
+    with pytest.raises(AssertionError) as transactionRevert:
+        with pool.transaction():
+            calls(pool, accounts)
+    with pytest.raises(AssertionError) as copyRevert:
+        calls(copy.deepcopy(poolCopy), accounts)
+
+    assert str(transactionRevert.value) == str(copyRevert.value) == message
+    assert poolState(pool, accounts) == poolState(poolCopy, accounts)
+    assert pool.ticks.sortedTicks == poolCopy.ticks.sortedTicks
+    # Both pools behave the same afterwards
+    for p in [pool, poolCopy]:
+        p.mint(accounts[2], -60, 60, expandTo18Decimals(1))
+        p.swap(accounts[2], True, expandTo18Decimals(1), encodePriceSqrt(1, 2))
+    assert poolState(pool, accounts) == poolState(poolCopy, accounts)
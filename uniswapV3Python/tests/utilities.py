@@ -105,11 +105,11 @@ def tryExceptHandler(fcn, assertMessage, *args):
 
 
 def getPositionKey(address, lowerTick, upperTick):
-    return hash((address, lowerTick, upperTick))
+    return (address, lowerTick, upperTick)
 
 
 def getLimitPositionKey(address, tick, isToken0):
-    return hash((address, tick, isToken0))
+    return (address, tick, isToken0)
 
 
 ### POOL SWAPS ###
@@ -178,6 +178,26 @@ def swap(pool, inputToken, amounts, recipient, sqrtPriceLimitX96):
             return pool.swap(recipient, False, -amount, sqrtPriceLimitX96)
 
 
+# Get the swap parameters (zeroForOne, amountSpecified, sqrtPriceLimitX96) of a swap test case
+def swapCaseToParams(testCase):
+    zeroForOne = testCase["zeroForOne"]
+    if testCase.__contains__("sqrtPriceLimit"):
+        sqrtPriceLimitX96 = testCase["sqrtPriceLimit"]
+    else:
+        sqrtPriceLimitX96 = getSqrtPriceLimitX96(
+            TEST_TOKENS[0] if zeroForOne else TEST_TOKENS[1]
+        )
+
+    if not testCase.__contains__("exactOut"):
+        return (zeroForOne, MAX_INT256, sqrtPriceLimitX96)
+    elif testCase["exactOut"]:
+        amount = testCase["amount1"] if zeroForOne else testCase["amount0"]
+        return (zeroForOne, -amount, sqrtPriceLimitX96)
+    else:
+        amount = testCase["amount0"] if zeroForOne else testCase["amount1"]
+        return (zeroForOne, amount, sqrtPriceLimitX96)
+
+
 def getSqrtPriceLimitX96(inputToken):
     if inputToken == TEST_TOKENS[0]:
         return MIN_SQRT_RATIO + 1